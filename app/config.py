@@ -1,6 +1,6 @@
 """Configuración de la aplicación"""
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Any, Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -8,21 +8,148 @@ class Settings(BaseSettings):
     
     # OpenAI
     openai_api_key: str
+    openai_base_url: str = "https://api.openai.com/v1"
+    
+    # Endpoints compatibles con OpenAI por etapa (vacío: OPENAI_BASE_URL), p. ej.
+    # [{"base_url": "https://gw-eu.example.com/v1", "weight": 2, "api_key": "...", "name": "eu"}]
+    asr_endpoints: List[Dict[str, Any]] = []
+    llm_endpoints: List[Dict[str, Any]] = []
+    tts_endpoints: List[Dict[str, Any]] = []
+    router_ewma_alpha: float = 0.3  # Peso de la última muestra en las medias de latencia y error
+    router_error_threshold: float = 0.5  # Tasa de error (EWMA) que pone un endpoint en cuarentena
+    router_cooldown_seconds: float = 30.0
+    router_error_half_life_seconds: float = 60.0  # La tasa de error decae a la mitad sin llamadas en ese tiempo
+    router_max_retries: int = 2  # Reintentos sobre el último endpoint ante errores transitorios
+    router_retry_backoff_seconds: float = 0.5  # Espera antes del primer reintento (se duplica en cada uno)
+    
+    # Deadlines y timeouts por etapa
+    deadline_default_seconds: float = 60.0  # 0 deshabilita el deadline por defecto
+    deadline_endpoint_seconds: Dict[str, float] = {"voice_agent_batch": 300.0}  # Por endpoint
+    deadline_max_seconds: float = 300.0  # Tope para X-Request-Timeout
+    asr_timeout_seconds: float = 60.0
+    llm_timeout_seconds: float = 30.0
+    tts_timeout_seconds: float = 60.0
+    
+    # Pool de conexiones HTTP con OpenAI
+    http_pool_warm_connections: int = 4  # Conexiones abiertas al arrancar (0 deshabilita)
+    http_pool_max_connections: int = 20
+    http_keepalive_expiry_seconds: float = 120.0  # Tiempo que una conexión ociosa sigue abierta
+    http_keepalive_interval_seconds: float = 30.0  # Periodo de las sondas keep-alive (0 deshabilita)
+    http_connect_timeout_seconds: float = 5.0
+    http_timeout_seconds: float = 600.0
     
     # App
     app_name: str = "Voice Agent AI"
     app_version: str = "1.0.0"
     debug: bool = False
+    static_cache_max_age: int = 300  # Segundos de caché para las páginas demo
+    
+    # Logging
+    log_format: str = "json"  # json | text
+    log_level: Optional[str] = None  # None: INFO con DEBUG=True, WARNING si no
+    log_sample_rate: float = 1.0  # Fracción de logs verbosos por etapa que se conservan
+    log_payload_max_chars: int = 120  # Recorte de transcripciones/respuestas en logs
+    log_redact_payloads: bool = False  # Ocultar por completo el texto de usuario y del modelo
+    
+    # Administración y diagnóstico
+    admin_token: Optional[str] = None  # Sin token, /admin responde 404
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0  # Fracción de peticiones perfiladas sin pedirlo por header
+    profiling_paths: List[str] = ["/voice-agent", "/audio-chat"]
+    profiling_interval_ms: float = 5.0
+    profiling_dir: str = "profiles"
+    profiling_max_files: int = 50
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_ms: float = 100.0  # Periodo de medición del lag del event loop
+    loop_block_threshold_ms: float = 250.0  # Bloqueo a partir del cual se loguea la pila
+    memory_tracemalloc: bool = False  # Trazar desde el arranque (pico por petición); cuesta CPU
+    memory_tracemalloc_frames: int = 1
+    memory_snapshots_max: int = 5
     
     # Audio
     max_audio_size_mb: int = 10
     allowed_audio_formats: str = ".wav,.mp3,.webm,.m4a,.ogg"
+    max_audio_duration_seconds: int = 600  # 0 deshabilita el límite
+    upload_overhead_kb: int = 64  # Margen para cabeceras y delimitadores multipart
+    
+    # Coalescencia de llamadas idénticas concurrentes a OpenAI
+    single_flight_enabled: bool = True
+    
+    # Respuestas locales para frases triviales (sin LLM)
+    fast_path_enabled: bool = True
+    fast_path_intents: Dict[str, Dict[str, Any]] = {
+        "greeting": {
+            "phrases": ["hola", "buenas", "hola buenas", "buenos días", "buenas tardes", "buenas noches"],
+            "response": "¡Hola! ¿En qué puedo ayudarte?",
+        },
+        "thanks": {
+            "phrases": ["gracias", "muchas gracias", "mil gracias", "te lo agradezco"],
+            "response": "¡De nada! ¿Necesitas algo más?",
+        },
+        "goodbye": {
+            "phrases": ["adiós", "chao", "chau", "hasta luego", "hasta pronto", "nos vemos"],
+            "response": "¡Hasta luego! Que tengas un buen día.",
+        },
+        # Sin respuesta fija: repite el último mensaje del asistente de la sesión
+        "repeat": {
+            "phrases": ["repite", "repítelo", "puedes repetir", "puedes repetirlo", "otra vez", "qué dijiste"],
+        },
+    }
+    
+    # Audio chat
+    chat_duplicate_turn_policy: str = "queue"  # queue | coalesce | reject (audio idéntico en curso)
+    
+    # Rate limiting por cliente (POST a las rutas indicadas)
+    rate_limit_enabled: bool = True
+    rate_limit_paths: List[str] = ["/voice-agent", "/audio-chat", "/jobs"]
+    # Claves X-Api-Key reconocidas: tienen bucket propio; cualquier otro cliente se limita por IP
+    rate_limit_api_keys: List[str] = []
+    rate_limit_requests_burst: int = 30
+    rate_limit_requests_per_minute: float = 60
+    rate_limit_audio_seconds_burst: float = 900
+    rate_limit_audio_seconds_per_minute: float = 600
+    rate_limit_unknown_duration_bytes_per_second: int = 4000  # Audio sin duración en la cabecera (~32 kbps)
+    rate_limit_backend: str = "memory"  # memory (por proceso) | sqlite (compartido entre workers)
+    rate_limit_db_path: str = "jobs/rate_limit.db"
+    
+    # Batch
+    batch_max_files: int = 20
+    batch_max_concurrency: int = 4
+    
+    # Jobs asíncronos
+    jobs_db_path: str = "jobs/jobs.db"
+    jobs_workers: int = 2
+    jobs_result_ttl_seconds: int = 3600
+    jobs_poll_interval_seconds: float = 5.0
+    jobs_heartbeat_interval_seconds: float = 10.0  # Renovación del claim de un job en ejecución
+    jobs_claim_timeout_seconds: float = 60.0  # Sin heartbeat en este tiempo el job se re-encola
+    jobs_webhook_timeout_seconds: float = 10.0
+    # Webhooks solo a estos hosts y firmados con JOBS_WEBHOOK_SECRET (sin ambos, deshabilitados)
+    jobs_webhook_allowed_hosts: List[str] = []
+    jobs_webhook_secret: Optional[str] = None
+    
+    # Banco de frases pre-sintetizadas
+    phrase_bank_enabled: bool = True
+    phrase_bank_dir: str = "phrase_bank"
+    phrase_bank_load_timeout_seconds: float = 60.0  # Tope de la carga en segundo plano al arrancar
+    phrase_bank_phrases: Dict[str, str] = {
+        "error": "Lo siento, tuve un problema procesando tu mensaje. Por favor, inténtalo de nuevo.",
+        "thinking": "Un momento, por favor.",
+    }
+    thinking_filler_enabled: bool = False
+    thinking_filler_delay_ms: int = 800  # Espera del primer token antes de emitir el filler
     
     # Models
     asr_model: str = "gpt-4o-mini-transcribe"
     llm_model: str = "gpt-5-nano"
+    llm_max_completion_tokens: int = 1000  # Incluye el reasoning oculto
+    llm_reasoning_effort: Optional[str] = None  # minimal | low | medium | high (None: default del modelo)
+    # Ajustes por endpoint, p. ej. {"voice_agent_stream": {"reasoning_effort": "minimal"}}
+    llm_endpoint_profiles: Dict[str, Dict[str, Any]] = {}
+    llm_usage_in_response: bool = False  # Incluir el uso de tokens en las respuestas
     tts_model: str = "gpt-4o-mini-tts"
     tts_voice: str = "alloy"
+    tts_stream_chunk_bytes: int = 16384  # Tamaño de los eventos `audio` en SSE
     
     class Config:
         env_file = ".env"
@@ -37,6 +164,16 @@ class Settings(BaseSettings):
     def max_audio_size_bytes(self) -> int:
         """Convierte MB a bytes"""
         return self.max_audio_size_mb * 1024 * 1024
+    
+    @property
+    def max_request_body_bytes(self) -> int:
+        """Tamaño máximo del body de una petición con un archivo de audio"""
+        return self.max_audio_size_bytes + self.upload_overhead_kb * 1024
+    
+    @property
+    def max_batch_body_bytes(self) -> int:
+        """Tamaño máximo del body de una petición batch"""
+        return self.max_request_body_bytes * self.batch_max_files
 
 
 # Instancia global de configuración
@@ -1,9 +1,10 @@
 """API principal - Voice Agent AI"""
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.responses import JSONResponse, Response, HTMLResponse
 import time
 import logging
 from contextlib import asynccontextmanager
+import tracemalloc
 import base64
 
 from app.config import settings
@@ -11,14 +12,24 @@ from app.models.schemas import VoiceAgentResponse, ErrorResponse
 from app.services.asr_service import transcribe_audio
 from app.services.llm_service import process_text
 from app.services.tts_service import generate_speech
-from app.utils.audio_utils import validate_audio_file, save_temp_file, cleanup_temp_file
-from app.routes import audio_chat
-
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO if settings.debug else logging.WARNING,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+from app.services.pipeline import Pipeline, PipelineContext, Stage
+from app.utils.audio_utils import validate_audio_file, save_temp_file
+from app.utils.static_assets import static_assets
+from app.utils.metrics import metrics
+from app.utils.loop_monitor import loop_monitor
+from app.utils.json_response import FastJSONResponse
+from app.services.job_queue import job_pool
+from app.services.phrase_bank import phrase_bank
+from app.services.connection_pool import connection_pool
+from app.routes import admin, audio_chat, batch, jobs, streaming
+from app.middleware import (
+    UploadGuardMiddleware, RateLimitMiddleware, DeadlineMiddleware, ProfilingMiddleware, MemoryAccountingMiddleware
 )
+from app.utils.rate_limit import rate_limiter
+from app.utils.logging_config import configure_logging, payload, SAMPLED
+
+# Configurar logging (JSON por una cola, escrito desde un hilo aparte)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
@@ -27,8 +38,20 @@ async def lifespan(app: FastAPI):
     """Gestión del ciclo de vida de la aplicación"""
     logger.info(f"Iniciando {settings.app_name} v{settings.app_version}")
     logger.info(f"Modelos configurados: ASR={settings.asr_model}, LLM={settings.llm_model}, TTS={settings.tts_model}")
+    static_assets.load()
+    if settings.memory_tracemalloc:
+        tracemalloc.start(settings.memory_tracemalloc_frames)
+    await loop_monitor.start()
+    await connection_pool.start()
+    if settings.phrase_bank_enabled:
+        await phrase_bank.start(generate_speech)
+    await job_pool.start()
     yield
     logger.info("Cerrando aplicación")
+    await job_pool.stop()
+    await phrase_bank.stop()
+    await connection_pool.stop()
+    await loop_monitor.stop()
 
 
 # Crear aplicación FastAPI
@@ -39,8 +62,42 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Rechazar uploads inválidos o muy grandes antes de parsear multipart
+app.add_middleware(
+    UploadGuardMiddleware,
+    max_body_bytes=settings.max_request_body_bytes,
+    path_limits={"/voice-agent/batch": settings.max_batch_body_bytes},
+    no_sniff_paths={"/voice-agent/batch"}  # Cada archivo se valida y reporta por item
+)
+
+# Profiler por muestreo opcional (PROFILING_ENABLED), por dentro del rate limiting
+app.add_middleware(ProfilingMiddleware)
+
+# Rate limiting por cliente (se añade después: corre antes de leer el body)
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
+# Deadline por petición (el último añadido es el más externo: cuenta desde la llegada)
+app.add_middleware(DeadlineMiddleware)
+
+# Bytes de upload/respuesta retenidos y pico de memoria por petición (el más externo)
+app.add_middleware(MemoryAccountingMiddleware)
+
+# Pipeline de /voice-agent y /voice-agent-audio. Las etapas buscan los
+# servicios de este módulo al ejecutarse, así que se pueden reemplazar
+voice_pipeline = Pipeline("voice_agent", [
+    Stage("validate", lambda ctx: validate_audio_file(ctx.upload)),
+    Stage("save", lambda ctx: save_temp_file(ctx.upload), output="audio_path"),
+    Stage("asr", lambda ctx: transcribe_audio(ctx.audio_path), output="transcription"),
+    Stage("llm", lambda ctx: process_text(ctx["transcription"]), output="response_text"),
+    Stage("tts", lambda ctx: generate_speech(ctx["response_text"]), output="audio_base64"),
+])
+
 # Incluir routers adicionales
+app.include_router(admin.router)
 app.include_router(audio_chat.router)
+app.include_router(batch.router)
+app.include_router(jobs.router)
+app.include_router(streaming.router)
 
 
 @app.get("/")
@@ -52,11 +109,16 @@ async def root():
         "status": "running",
         "endpoints": {
             "voice_agent": "/voice-agent",
+            "voice_agent_batch": "/voice-agent/batch",
+            "voice_agent_stream": "/voice-agent/stream",
+            "jobs": "/jobs",
             "audio_chat": "/audio-chat",
             "audio_chat_demo": "/audio-chat/demo",
             "voice_agent_audio": "/voice-agent-audio",
             "test_page": "/test-audio",
             "health": "/health",
+            "ready": "/ready",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -71,186 +133,30 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 503 hasta que termina el pre-calentamiento de conexiones"""
+    if not connection_pool.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Métricas del proceso (p. ej. llamadas a OpenAI evitadas por single-flight)"""
+    return metrics.snapshot()
+
+
 @app.get("/test-audio", response_class=HTMLResponse)
-async def test_audio_page():
+async def test_audio_page(request: Request):
     """Página de prueba para el voice agent"""
-    html_content = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Voice Agent Test</title>
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                max-width: 800px;
-                margin: 50px auto;
-                padding: 20px;
-                background: #f5f5f5;
-            }
-            .container {
-                background: white;
-                padding: 30px;
-                border-radius: 10px;
-                box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            }
-            h1 {
-                color: #333;
-                border-bottom: 3px solid #007bff;
-                padding-bottom: 10px;
-            }
-            .upload-section {
-                margin: 30px 0;
-                padding: 20px;
-                background: #f8f9fa;
-                border-radius: 5px;
-            }
-            input[type="file"] {
-                margin: 10px 0;
-            }
-            button {
-                background: #007bff;
-                color: white;
-                border: none;
-                padding: 12px 30px;
-                border-radius: 5px;
-                cursor: pointer;
-                font-size: 16px;
-                margin-top: 10px;
-            }
-            button:hover {
-                background: #0056b3;
-            }
-            button:disabled {
-                background: #ccc;
-                cursor: not-allowed;
-            }
-            #result {
-                margin-top: 30px;
-                padding: 20px;
-                background: #e8f4f8;
-                border-radius: 5px;
-                display: none;
-            }
-            .info {
-                margin: 10px 0;
-                padding: 10px;
-                background: white;
-                border-left: 4px solid #007bff;
-            }
-            audio {
-                width: 100%;
-                margin-top: 15px;
-            }
-            .loading {
-                display: none;
-                color: #007bff;
-                margin-top: 10px;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>🎤 Voice Agent AI - Test</h1>
-            <p>Sube un archivo de audio (.wav o .mp3) para probar el sistema end-to-end</p>
-            
-            <div class="upload-section">
-                <input type="file" id="audioFile" accept="audio/*">
-                <br>
-                <button onclick="processAudio()">🚀 Procesar Audio</button>
-                <div class="loading" id="loading">⏳ Procesando... (puede tomar 5-10 segundos)</div>
-            </div>
-            
-            <div id="result">
-                <h3>Resultados:</h3>
-                <div class="info">
-                    <strong>📝 Transcripción:</strong>
-                    <p id="transcription"></p>
-                </div>
-                <div class="info">
-                    <strong>💬 Respuesta del LLM:</strong>
-                    <p id="response"></p>
-                </div>
-                <div class="info">
-                    <strong>🔊 Audio Generado:</strong>
-                    <audio id="audioPlayer" controls></audio>
-                </div>
-                <div class="info">
-                    <strong>⏱️ Tiempo de procesamiento:</strong>
-                    <p id="time"></p>
-                </div>
-            </div>
-        </div>
-
-        <script>
-            async function processAudio() {
-                const fileInput = document.getElementById('audioFile');
-                const loading = document.getElementById('loading');
-                const result = document.getElementById('result');
-                const button = document.querySelector('button');
-                
-                if (!fileInput.files[0]) {
-                    alert('Por favor selecciona un archivo de audio');
-                    return;
-                }
-                
-                // Mostrar loading
-                loading.style.display = 'block';
-                button.disabled = true;
-                result.style.display = 'none';
-                
-                try {
-                    // Preparar FormData
-                    const formData = new FormData();
-                    formData.append('audio', fileInput.files[0]);
-                    
-                    // Llamar al endpoint
-                    const response = await fetch('/voice-agent', {
-                        method: 'POST',
-                        body: formData
-                    });
-                    
-                    if (!response.ok) {
-                        throw new Error('Error en el servidor: ' + response.status);
-                    }
-                    
-                    const data = await response.json();
-                    
-                    // Mostrar resultados
-                    document.getElementById('transcription').textContent = data.transcription;
-                    document.getElementById('response').textContent = data.response_text;
-                    document.getElementById('time').textContent = data.processing_time + ' segundos';
-                    
-                    // Crear blob de audio y reproducir
-                    const audioBytes = atob(data.audio_base64);
-                    const audioArray = new Uint8Array(audioBytes.length);
-                    for (let i = 0; i < audioBytes.length; i++) {
-                        audioArray[i] = audioBytes.charCodeAt(i);
-                    }
-                    const audioBlob = new Blob([audioArray], { type: 'audio/mpeg' });
-                    const audioUrl = URL.createObjectURL(audioBlob);
-                    
-                    const audioPlayer = document.getElementById('audioPlayer');
-                    audioPlayer.src = audioUrl;
-                    
-                    result.style.display = 'block';
-                    
-                } catch (error) {
-                    alert('Error: ' + error.message);
-                } finally {
-                    loading.style.display = 'none';
-                    button.disabled = false;
-                }
-            }
-        </script>
-    </body>
-    </html>
-    """
-    return HTMLResponse(content=html_content)
+    return static_assets.response(request, "test_audio.html")
 
 
 @app.post(
     "/voice-agent",
     response_model=VoiceAgentResponse,
+    response_model_exclude_none=True,
     responses={
         400: {"model": ErrorResponse, "description": "Archivo inválido"},
         500: {"model": ErrorResponse, "description": "Error en procesamiento"}
@@ -275,57 +181,20 @@ async def voice_agent(audio: UploadFile = File(..., description="Archivo de audi
     Returns:
         VoiceAgentResponse: Respuesta con transcripción, texto y audio
     """
-    temp_file_path = None
-    start_time = time.time()
+    logger.info("Nueva petición recibida: %s", audio.filename)
+    ctx = await voice_pipeline.handle(PipelineContext("voice_agent", upload=audio), "Error en el procesamiento")
+    processing_time = ctx.elapsed()
+    logger.info("Procesamiento completado en %ss", processing_time)
     
-    try:
-        logger.info(f"Nueva petición recibida: {audio.filename}")
-        
-        # 1. Validar archivo
-        await validate_audio_file(audio)
-        
-        # 2. Guardar archivo temporal
-        temp_file_path = await save_temp_file(audio)
-        
-        # 3. Transcribir audio a texto (ASR)
-        logger.info("Iniciando transcripción (ASR)")
-        transcription = await transcribe_audio(temp_file_path)
-        
-        # 4. Procesar texto con LLM
-        logger.info("Procesando texto con LLM")
-        response_text = await process_text(transcription)
-        
-        # 5. Generar audio de respuesta (TTS)
-        logger.info("Generando audio de respuesta (TTS)")
-        audio_base64 = await generate_speech(response_text)
-        
-        # Calcular tiempo total
-        processing_time = round(time.time() - start_time, 2)
-        
-        logger.info(f"Procesamiento completado en {processing_time}s")
-        
-        return VoiceAgentResponse(
-            transcription=transcription,
-            response_text=response_text,
-            audio_base64=audio_base64,
-            processing_time=processing_time
-        )
-        
-    except HTTPException:
-        # Re-lanzar excepciones HTTP
-        raise
-        
-    except Exception as e:
-        logger.error(f"Error en procesamiento: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error en el procesamiento: {str(e)}"
-        )
-        
-    finally:
-        # Limpiar archivo temporal
-        if temp_file_path:
-            cleanup_temp_file(temp_file_path)
+    # Todos los campos los produjo el pipeline: se serializa sin revalidar el audio
+    result = VoiceAgentResponse.model_construct(
+        transcription=ctx["transcription"],
+        response_text=ctx["response_text"],
+        audio_base64=ctx["audio_base64"],
+        processing_time=processing_time,
+        usage=ctx.usage.as_dict() if settings.llm_usage_in_response else None
+    )
+    return FastJSONResponse(result.model_dump(exclude_none=True))
 
 
 @app.exception_handler(HTTPException)
@@ -336,7 +205,8 @@ async def http_exception_handler(request, exc):
         content=ErrorResponse(
             error=exc.detail,
             detail=str(exc.detail) if exc.detail else None
-        ).model_dump()
+        ).model_dump(),
+        headers=exc.headers  # p. ej. Retry-After en 429
     )
 
 
@@ -376,62 +246,27 @@ async def voice_agent_audio(audio: UploadFile = File(..., description="Archivo d
     Returns:
         Response: Audio MP3 de la respuesta
     """
-    temp_file_path = None
+    logger.info("Nueva petición voice-agent-audio: %s", audio.filename)
+    ctx = await voice_pipeline.handle(PipelineContext("voice_agent_audio", upload=audio), "Error en el procesamiento")
+    transcription, response_text = ctx["transcription"], ctx["response_text"]
+    logger.info("Transcripción: %s | Respuesta LLM: %s", payload(transcription), payload(response_text), extra=SAMPLED)
     
-    try:
-        logger.info(f"Nueva petición voice-agent-audio: {audio.filename}")
-        
-        # 1. Validar archivo
-        await validate_audio_file(audio)
-        
-        # 2. Guardar archivo temporal
-        temp_file_path = await save_temp_file(audio)
-        
-        # 3. Transcribir audio a texto (ASR)
-        logger.info("Iniciando transcripción (ASR)")
-        transcription = await transcribe_audio(temp_file_path)
-        logger.info(f"Transcripción: {transcription}")
-        
-        # 4. Procesar texto con LLM
-        logger.info("Procesando texto con LLM")
-        response_text = await process_text(transcription)
-        logger.info(f"Respuesta LLM: {response_text}")
-        
-        # 5. Generar audio de respuesta (TTS)
-        logger.info("Generando audio de respuesta (TTS)")
-        audio_base64 = await generate_speech(response_text)
-        
-        # Decodificar base64 a bytes
-        audio_bytes = base64.b64decode(audio_base64)
-        
-        logger.info(f"Audio generado: {len(audio_bytes)} bytes")
-        
-        # Retornar audio directamente
-        return Response(
-            content=audio_bytes,
-            media_type="audio/mpeg",
-            headers={
-                "Content-Disposition": "inline; filename=response.mp3",
-                "X-Transcription": transcription[:100],  # Primeros 100 chars
-                "X-Response-Text": response_text[:100],
-                "Accept-Ranges": "bytes",
-                "Cache-Control": "no-cache"
-            }
-        )
-        
-    except HTTPException:
-        raise
-        
-    except Exception as e:
-        logger.error(f"Error en procesamiento: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error en el procesamiento: {str(e)}"
-        )
-        
-    finally:
-        if temp_file_path:
-            cleanup_temp_file(temp_file_path)
+    # Decodificar base64 a bytes
+    audio_bytes = base64.b64decode(ctx["audio_base64"])
+    logger.info("Audio generado: %d bytes", len(audio_bytes), extra=SAMPLED)
+    
+    # Retornar audio directamente
+    return Response(
+        content=audio_bytes,
+        media_type="audio/mpeg",
+        headers={
+            "Content-Disposition": "inline; filename=response.mp3",
+            "X-Transcription": transcription[:100],  # Primeros 100 chars
+            "X-Response-Text": response_text[:100],
+            "Accept-Ranges": "bytes",
+            "Cache-Control": "no-cache"
+        }
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,14 @@
+"""Middlewares ASGI"""
+from .upload_guard import UploadGuardMiddleware
+from .rate_limit import RateLimitMiddleware
+from .deadline import DeadlineMiddleware
+from .profiling import ProfilingMiddleware
+from .memory import MemoryAccountingMiddleware
+
+__all__ = [
+    "UploadGuardMiddleware",
+    "RateLimitMiddleware",
+    "DeadlineMiddleware",
+    "ProfilingMiddleware",
+    "MemoryAccountingMiddleware",
+]
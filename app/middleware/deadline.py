@@ -0,0 +1,29 @@
+"""Middleware ASGI que registra la llegada de cada petición para su deadline"""
+from app.utils.deadline import DEADLINE_HEADER, mark_arrival, parse_timeout_header, reset_arrival
+
+_HEADER = DEADLINE_HEADER.encode("latin-1")
+
+
+class DeadlineMiddleware:
+    """
+    Marca el instante de llegada y el X-Request-Timeout del cliente
+
+    Va por fuera de los demás middlewares para que el deadline cuente desde
+    el primer byte, antes de recibir el upload. Cada endpoint lo convierte
+    en deadline con `start_deadline`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = parse_timeout_header(dict(scope.get("headers") or []).get(_HEADER))
+        token = mark_arrival(requested)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_arrival(token)
@@ -0,0 +1,49 @@
+"""Middleware ASGI que contabiliza la memoria retenida por cada petición"""
+from app.utils.memory import memory_accounting
+
+
+class MemoryAccountingMiddleware:
+    """
+    Cuenta los bytes de upload y de respuesta que retiene cada petición
+
+    Los bytes del body recibido se consideran retenidos hasta que termina
+    la petición; los de cada mensaje de respuesta, hasta que el servidor
+    los acepta. Con tracemalloc activo también mide el pico de la petición.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_counted():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                size = len(message.get("body", b""))
+                received += size
+                memory_accounting.hold("upload", size)
+            return message
+
+        async def send_counted(message):
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            size = len(message.get("body", b""))
+            memory_accounting.hold("response", size)
+            try:
+                await send(message)
+            finally:
+                memory_accounting.release("response", size)
+
+        baseline = memory_accounting.begin_request()
+        try:
+            await self.app(scope, receive_counted, send_counted)
+        finally:
+            memory_accounting.release("upload", received)
+            memory_accounting.end_request(scope["path"], baseline)
@@ -0,0 +1,72 @@
+"""Middleware ASGI que perfila peticiones puntuales del pipeline"""
+import asyncio
+import logging
+import random
+import time
+
+from app.config import settings
+from app.utils.admin_auth import is_admin_token
+from app.utils.profiler import SamplingProfiler, profile_store
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+ADMIN_TOKEN_HEADER = b"x-admin-token"
+
+
+class ProfilingMiddleware:
+    """
+    Corre el profiler por muestreo alrededor de una petición elegida
+
+    Con PROFILING_ENABLED=False la petición pasa directo (sin costo). Si
+    está habilitado, se perfila una petición POST a PROFILING_PATHS cuando
+    trae `X-Profile` junto con un `X-Admin-Token` válido, o por sorteo con
+    PROFILING_SAMPLE_RATE. Solo hay un perfil en curso a la vez: el
+    profiler ve todos los hilos y dos perfiles simultáneos se mezclarían.
+    El nombre del perfil va en el header `X-Profile-Id` de la respuesta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._active = False
+
+    async def __call__(self, scope, receive, send):
+        if not settings.profiling_enabled or not self._selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._active = True
+        name = profile_store.new_name(scope["path"])
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", name.encode("latin-1"))
+                ]
+            await send(message)
+
+        profiler = SamplingProfiler(settings.profiling_interval_ms / 1000)
+        start = time.monotonic()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            try:
+                content = await asyncio.to_thread(profiler.stop)
+                await asyncio.to_thread(profile_store.save, name, content)
+                logger.info("Perfil %s guardado (%.0f ms)", name, (time.monotonic() - start) * 1000)
+            except OSError as e:
+                logger.warning("No se pudo guardar el perfil %s: %s", name, e)
+            finally:
+                self._active = False
+
+    def _selected(self, scope) -> bool:
+        if self._active or scope["type"] != "http" or scope["method"] != "POST":
+            return False
+        if not any(scope["path"].startswith(prefix) for prefix in settings.profiling_paths):
+            return False
+        headers = dict(scope.get("headers") or [])
+        if PROFILE_HEADER in headers and is_admin_token(headers.get(ADMIN_TOKEN_HEADER)):
+            return True
+        return random.random() < settings.profiling_sample_rate
+
@@ -0,0 +1,96 @@
+"""Middleware ASGI de rate limiting por cliente"""
+import hashlib
+import hmac
+import json
+import logging
+from typing import Optional
+
+from app.config import settings
+from app.utils.rate_limit import REQUESTS_BUCKET, RateLimiter, reset_client_key, set_client_key
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitMiddleware:
+    """
+    Limita las peticiones POST a las rutas de RATE_LIMIT_PATHS por cliente
+
+    - El cliente se identifica por su IP, o por su X-Api-Key si es una de
+      RATE_LIMIT_API_KEYS. Headers sin validar no cuentan: con un valor
+      nuevo en cada petición se obtendría un bucket nuevo.
+    - Cada petición consume un token del bucket de peticiones; sin tokens
+      se responde 429 con Retry-After sin leer el body.
+    - Las respuestas llevan los headers RateLimit-*.
+    - El cliente queda en contexto para descontar segundos de audio al
+      validar el archivo (ver `charge_audio_seconds`).
+    """
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if not self._applies(scope):
+            await self.app(scope, receive, send)
+            return
+
+        key = client_key(scope)
+        decision = await self.limiter.take(key, REQUESTS_BUCKET)
+        headers = decision.headers(self.limiter.policy_header())
+        if not decision.allowed:
+            logger.warning("Rate limit de peticiones alcanzado para %s", key)
+            await _send_too_many_requests(send, headers, decision.retry_after)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                existing = {name.lower() for name, _ in message.get("headers", [])}
+                message["headers"] = list(message.get("headers", [])) + [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in headers.items()
+                    if name.lower().encode("latin-1") not in existing
+                ]
+            await send(message)
+
+        token = set_client_key(key)
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            reset_client_key(token)
+
+    def _applies(self, scope) -> bool:
+        if scope["type"] != "http" or not settings.rate_limit_enabled or scope["method"] != "POST":
+            return False
+        return any(scope["path"].startswith(prefix) for prefix in settings.rate_limit_paths)
+
+
+def client_key(scope) -> str:
+    """Identidad del cliente: su API key si es una de las configuradas, o la IP"""
+    headers = dict(scope.get("headers") or [])
+    api_key: Optional[bytes] = headers.get(b"x-api-key")
+    if api_key and _is_known_api_key(api_key):
+        # No guardar credenciales en claro como clave del bucket
+        return f"x-api-key:{hashlib.sha256(api_key).hexdigest()[:16]}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+def _is_known_api_key(value: bytes) -> bool:
+    # Se comparan todas, en tiempo constante
+    matches = [hmac.compare_digest(value, key.encode("utf-8")) for key in settings.rate_limit_api_keys]
+    return any(matches)
+
+
+async def _send_too_many_requests(send, headers: dict, retry_after: int) -> None:
+    """Envía una respuesta 429 con el mismo formato que ErrorResponse"""
+    detail = f"Demasiadas peticiones. Reintente en {retry_after} segundos"
+    body = json.dumps({"error": detail, "detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ] + [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,142 @@
+"""Guardia ASGI para uploads: límite de tamaño y sniffing de formato en streaming"""
+import json
+import logging
+import re
+from typing import Dict, Iterable, Optional
+
+from app.config import settings
+from app.utils.audio_metadata import sniff_audio_format, SNIFF_HEADER_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Ventana inicial del body donde se busca la cabecera de la primera parte con archivo
+SNIFF_WINDOW_BYTES = 64 * 1024
+
+_FILE_PART_RE = re.compile(rb'filename="[^"]*"[^\r\n]*\r\n(?:[^\r\n]+\r\n)*\r\n')
+
+
+class UploadRejected(Exception):
+    """El upload se rechazó durante la recepción del body"""
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class UploadGuardMiddleware:
+    """
+    Rechaza uploads inválidos antes de que multipart los procese completos
+    
+    - Si `Content-Length` supera el límite, responde 400 sin leer el body.
+    - Mientras el body llega, corta la recepción al superar el límite.
+    - En peticiones multipart, revisa los magic bytes del primer archivo
+      y aborta si no es un formato de audio permitido, salvo en las rutas
+      de `no_sniff_paths` (p. ej. el batch, que valida y reporta cada
+      archivo por separado).
+    """
+
+    def __init__(
+        self,
+        app,
+        max_body_bytes: int,
+        path_limits: Optional[Dict[str, int]] = None,
+        no_sniff_paths: Optional[Iterable[str]] = None
+    ):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        self.path_limits = path_limits or {}
+        self.no_sniff_paths = frozenset(no_sniff_paths or ())
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        max_body_bytes = self.path_limits.get(scope["path"], self.max_body_bytes)
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit():
+            if int(content_length) > max_body_bytes:
+                logger.warning("Upload rechazado por Content-Length: %d bytes", int(content_length))
+                await _send_error(send, _too_large_detail())
+                return
+
+        is_multipart = headers.get(b"content-type", b"").startswith(b"multipart/form-data")
+        state = _GuardState(sniff=is_multipart and scope["path"] not in self.no_sniff_paths)
+        response_started = False
+
+        async def guarded_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                state.feed(message.get("body", b""), max_body_bytes)
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if state.rejected is not None:
+                # La app convirtió el corte en su propio error; se descarta
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, guarded_receive, guarded_send)
+        except UploadRejected:
+            pass
+
+        if state.rejected is not None and not response_started:
+            logger.warning("Upload abortado en streaming: %s", state.rejected)
+            await _send_error(send, state.rejected)
+
+
+class _GuardState:
+    """Estado incremental de la recepción del body"""
+
+    def __init__(self, sniff: bool):
+        self.received = 0
+        self.sniff = sniff
+        self.head = b""
+        self.rejected: Optional[str] = None
+
+    def feed(self, chunk: bytes, max_body_bytes: int) -> None:
+        self.received += len(chunk)
+        if self.received > max_body_bytes:
+            self.rejected = _too_large_detail()
+            raise UploadRejected(self.rejected)
+
+        if not self.sniff:
+            return
+        self.head += chunk
+        match = _FILE_PART_RE.search(self.head)
+        if match is None:
+            if len(self.head) > SNIFF_WINDOW_BYTES:
+                self.sniff = False
+                self.head = b""
+            return
+        header = self.head[match.end():match.end() + SNIFF_HEADER_BYTES]
+        if len(header) < SNIFF_HEADER_BYTES and b"\r\n--" not in header:
+            return  # Faltan bytes de la firma; un archivo corto termina en el delimitador
+        self.sniff = False
+        self.head = b""
+        if not header.startswith(b"\r\n--") and sniff_audio_format(header) not in settings.allowed_formats_list:
+            self.rejected = f"Formato no permitido. Use: {', '.join(settings.allowed_formats_list)}"
+            raise UploadRejected(self.rejected)
+
+
+def _too_large_detail() -> str:
+    return f"Archivo muy grande. Máximo: {settings.max_audio_size_mb}MB"
+
+
+async def _send_error(send, detail: str) -> None:
+    """Envía una respuesta 400 con el mismo formato que ErrorResponse"""
+    body = json.dumps({"error": detail, "detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 400,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"connection", b"close"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
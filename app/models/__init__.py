@@ -1,4 +1,4 @@
 """Modelos de datos"""
-from .schemas import VoiceAgentResponse, ErrorResponse
+from .schemas import VoiceAgentResponse, ErrorResponse, BatchItemResult, JobStatusResponse
 
-__all__ = ["VoiceAgentResponse", "ErrorResponse"]
+__all__ = ["VoiceAgentResponse", "ErrorResponse", "BatchItemResult", "JobStatusResponse"]
@@ -1,6 +1,6 @@
 """Schemas de Pydantic para requests/responses"""
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, Optional
 
 
 class VoiceAgentResponse(BaseModel):
@@ -9,6 +9,7 @@ class VoiceAgentResponse(BaseModel):
     response_text: str = Field(..., description="Respuesta generada por el LLM")
     audio_base64: str = Field(..., description="Audio de respuesta codificado en base64")
     processing_time: float = Field(..., description="Tiempo total de procesamiento en segundos")
+    usage: Optional[Dict[str, int]] = Field(None, description="Tokens del LLM (solo con LLM_USAGE_IN_RESPONSE)")
     
     class Config:
         json_schema_extra = {
@@ -21,6 +22,29 @@ class VoiceAgentResponse(BaseModel):
         }
 
 
+class BatchItemResult(BaseModel):
+    """Resultado de un archivo dentro de un batch (una línea NDJSON)"""
+    index: int = Field(..., description="Posición del archivo en la petición")
+    filename: Optional[str] = Field(None, description="Nombre del archivo recibido")
+    status: str = Field(..., description="'ok' o 'error'")
+    transcription: Optional[str] = Field(None, description="Texto transcrito del audio de entrada")
+    response_text: Optional[str] = Field(None, description="Respuesta generada por el LLM")
+    audio_base64: Optional[str] = Field(None, description="Audio de respuesta codificado en base64")
+    processing_time: float = Field(..., description="Tiempo de procesamiento del archivo en segundos")
+    error: Optional[str] = Field(None, description="Mensaje de error si el archivo falló")
+
+
+class JobStatusResponse(BaseModel):
+    """Estado de un job asíncrono"""
+    job_id: str = Field(..., description="ID del job")
+    status: str = Field(..., description="queued, running, completed o failed")
+    created_at: float = Field(..., description="Timestamp de creación")
+    updated_at: float = Field(..., description="Timestamp de la última actualización")
+    expires_at: Optional[float] = Field(None, description="Timestamp a partir del cual se descarta el resultado")
+    result: Optional[VoiceAgentResponse] = Field(None, description="Resultado cuando el job terminó")
+    error: Optional[str] = Field(None, description="Mensaje de error si el job falló")
+
+
 class ErrorResponse(BaseModel):
     """Respuesta de error"""
     error: str = Field(..., description="Mensaje de error")
@@ -0,0 +1,81 @@
+"""Router de administración y diagnóstico (requiere X-Admin-Token)"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+from typing import Optional
+import asyncio
+import logging
+
+from app.routes.audio_chat import chat_sessions
+from app.utils.admin_auth import require_admin
+from app.utils.memory import estimate_sessions_bytes, memory_accounting
+from app.utils.metrics import metrics
+from app.utils.profiler import profile_store
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin)],
+    include_in_schema=False
+)
+
+
+@router.get("/profiles", summary="Listar perfiles guardados")
+async def list_profiles():
+    """Perfiles de peticiones (más recientes primero)"""
+    return {"profiles": await asyncio.to_thread(profile_store.list)}
+
+
+@router.get("/profiles/{name}", summary="Descargar un perfil")
+async def download_profile(name: str):
+    """
+    Descarga un perfil en formato collapsed
+
+    Se puede abrir en https://www.speedscope.app o convertir con flamegraph.pl.
+    """
+    path = profile_store.path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=name)
+
+
+@router.get("/memory", summary="Estado de la memoria del proceso")
+async def memory_status():
+    """RSS, bytes retenidos por peticiones, tracemalloc y tamaño estimado de las sesiones de chat"""
+    sessions_bytes = await asyncio.to_thread(estimate_sessions_bytes, chat_sessions)
+    metrics.set_gauge("memory.chat_sessions_bytes", sessions_bytes)
+    return {
+        **memory_accounting.status(),
+        "chat_sessions": {
+            "sessions": len(chat_sessions),
+            "messages": sum(len(history) for history in list(chat_sessions.values())),
+            "estimated_bytes": sessions_bytes,
+        },
+    }
+
+
+@router.post("/memory/snapshots", summary="Tomar un snapshot de tracemalloc")
+async def take_memory_snapshot():
+    """Toma un snapshot; si tracemalloc no estaba activo lo inicia y este queda como línea base"""
+    return await asyncio.to_thread(memory_accounting.take_snapshot)
+
+
+@router.get("/memory/snapshots/{snapshot_id}/diff", summary="Comparar snapshots de tracemalloc")
+async def diff_memory_snapshots(
+    snapshot_id: str,
+    against: Optional[str] = Query(None, description="Snapshot posterior (por defecto, uno nuevo)"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """Líneas de código cuya memoria más creció (o decreció) desde `snapshot_id`"""
+    stats = await asyncio.to_thread(memory_accounting.diff, snapshot_id, against, limit)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Snapshot no encontrado")
+    return {"since": snapshot_id, "against": against, "top": stats}
+
+
+@router.delete("/memory/snapshots", summary="Descartar snapshots")
+async def clear_memory_snapshots():
+    """Descarta los snapshots y detiene tracemalloc salvo que MEMORY_TRACEMALLOC lo pida"""
+    memory_accounting.clear_snapshots()
+    return {"message": "Snapshots descartados"}
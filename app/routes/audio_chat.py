@@ -1,19 +1,32 @@
 """Router para Audio Chat conversacional"""
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form, Request, Query, Header
+from fastapi.responses import Response
 from fastapi.responses import JSONResponse, HTMLResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict
-import time
+from typing import Optional, List, Dict, AsyncIterator
+import asyncio
+import hashlib
 import logging
 import uuid
 from pathlib import Path
 import tempfile
-import os
 
+from app.config import settings
 from app.services.asr_service import transcribe_audio
-from app.services.llm_service import process_text
+from app.services.llm_service import process_text, process_text_stream
 from app.services.tts_service import generate_speech
+from app.services.fast_path import fast_path
+from app.services.pipeline import Pipeline, PipelineContext, Stage
 from app.utils.audio_utils import validate_audio_file, save_temp_file, cleanup_temp_file
+from app.utils.static_assets import static_assets
+from app.utils.http_cache import etag_matches
+from app.utils.json_response import FastJSONResponse
+from app.utils.sse import format_sse, sse_response
+from app.utils.session_turns import session_turns
+from app.utils.llm_usage import track_llm_usage
+from app.utils.deadline import start_deadline
+from app.utils.logging_config import payload, SAMPLED
+from app.routes.streaming import pipeline_events
 
 logger = logging.getLogger(__name__)
 
@@ -25,472 +38,9 @@ router = APIRouter(prefix="/audio-chat", tags=["Audio Chat"])
 
 
 @router.get("/demo", response_class=HTMLResponse)
-async def audio_chat_demo():
+async def audio_chat_demo(request: Request):
     """Página de demo para el audio chat conversacional"""
-    html_content = """
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Audio Chat - Voice Agent AI</title>
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                max-width: 900px;
-                margin: 30px auto;
-                padding: 20px;
-                background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            }
-            .container {
-                background: white;
-                padding: 30px;
-                border-radius: 15px;
-                box-shadow: 0 10px 30px rgba(0,0,0,0.3);
-            }
-            h1 {
-                color: #667eea;
-                border-bottom: 3px solid #667eea;
-                padding-bottom: 10px;
-            }
-            .chat-box {
-                height: 400px;
-                overflow-y: auto;
-                border: 2px solid #e0e0e0;
-                border-radius: 10px;
-                padding: 20px;
-                margin: 20px 0;
-                background: #f8f9fa;
-            }
-            .message {
-                margin: 15px 0;
-                padding: 12px 15px;
-                border-radius: 10px;
-                max-width: 70%;
-                word-wrap: break-word;
-            }
-            .user-message {
-                background: #667eea;
-                color: white;
-                margin-left: auto;
-                text-align: right;
-            }
-            .assistant-message {
-                background: #e9ecef;
-                color: #333;
-            }
-            .upload-section {
-                margin: 20px 0;
-                padding: 20px;
-                background: #f8f9fa;
-                border-radius: 10px;
-            }
-            .record-section {
-                display: flex;
-                align-items: center;
-                gap: 10px;
-                margin: 15px 0;
-                padding: 15px;
-                background: white;
-                border-radius: 8px;
-                border: 2px solid #e0e0e0;
-            }
-            .recording {
-                border-color: #dc3545;
-                animation: pulse 1.5s infinite;
-            }
-            @keyframes pulse {
-                0%, 100% { border-color: #dc3545; }
-                50% { border-color: #ff6b7a; }
-            }
-            input[type="file"] {
-                margin: 10px 0;
-            }
-            button {
-                background: #667eea;
-                color: white;
-                border: none;
-                padding: 12px 30px;
-                border-radius: 8px;
-                cursor: pointer;
-                font-size: 16px;
-                margin: 5px;
-            }
-            button:hover {
-                background: #5568d3;
-            }
-            button:disabled {
-                background: #ccc;
-                cursor: not-allowed;
-            }
-            .record-btn {
-                background: #dc3545;
-                width: 60px;
-                height: 60px;
-                border-radius: 50%;
-                font-size: 24px;
-                padding: 0;
-            }
-            .record-btn.recording {
-                background: #dc3545;
-                animation: pulse-btn 1.5s infinite;
-            }
-            @keyframes pulse-btn {
-                0%, 100% { transform: scale(1); }
-                50% { transform: scale(1.1); }
-            }
-            .record-btn:hover {
-                background: #c82333;
-            }
-            .timer {
-                font-size: 20px;
-                font-weight: bold;
-                color: #dc3545;
-                min-width: 60px;
-            }
-            .clear-btn {
-                background: #dc3545;
-            }
-            .clear-btn:hover {
-                background: #c82333;
-            }
-            .info-badge {
-                display: inline-block;
-                background: #28a745;
-                color: white;
-                padding: 5px 12px;
-                border-radius: 20px;
-                font-size: 12px;
-                margin: 5px 0;
-            }
-            .loading {
-                display: none;
-                color: #667eea;
-                margin-top: 10px;
-            }
-            audio {
-                width: 100%;
-                margin-top: 10px;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h1>🎙️ Audio Chat Conversacional</h1>
-            <p>Mantén conversaciones naturales por voz. El sistema recuerda el contexto! 💬</p>
-            
-            <div class="info-badge" id="sessionBadge">Nueva conversación</div>
-            
-            <div class="chat-box" id="chatBox">
-                <p style="text-align: center; color: #999;">
-                    La conversación aparecerá aquí...
-                </p>
-            </div>
-            
-            <div class="upload-section">
-                <h3>🎤 Grabar Audio</h3>
-                <div class="record-section" id="recordSection">
-                    <button class="record-btn" id="recordBtn" onclick="toggleRecording()">⏺️</button>
-                    <span class="timer" id="timer">0:00</span>
-                    <span id="recordStatus">Presiona para grabar</span>
-                </div>
-                
-                <h3>📁 O Subir Archivo</h3>
-                <input type="file" id="audioFile" accept="audio/*">
-                <br>
-                <button onclick="sendAudio()">🚀 Enviar Audio</button>
-                <button class="clear-btn" onclick="clearChat()">🗑️ Nueva Conversación</button>
-                <div class="loading" id="loading">⏳ Procesando... (5-10 segundos)</div>
-            </div>
-        </div>
-
-        <script>
-            let sessionId = null;
-            let conversationHistory = [];
-            let mediaRecorder = null;
-            let audioChunks = [];
-            let recordingInterval = null;
-            let recordingStartTime = 0;
-
-            async function toggleRecording() {
-                const recordBtn = document.getElementById('recordBtn');
-                const recordStatus = document.getElementById('recordStatus');
-                const recordSection = document.getElementById('recordSection');
-                const timer = document.getElementById('timer');
-                
-                if (!mediaRecorder || mediaRecorder.state === 'inactive') {
-                    // Iniciar grabación
-                    try {
-                        const stream = await navigator.mediaDevices.getUserMedia({ 
-                            audio: {
-                                sampleRate: 48000,
-                                channelCount: 1,
-                                echoCancellation: true,
-                                noiseSuppression: true
-                            }
-                        });
-                        
-                        // Intentar usar formato compatible directamente
-                        let options = { mimeType: 'audio/webm' };
-                        if (MediaRecorder.isTypeSupported('audio/webm;codecs=opus')) {
-                            options = { mimeType: 'audio/webm;codecs=opus' };
-                        }
-                        
-                        mediaRecorder = new MediaRecorder(stream, options);
-                        audioChunks = [];
-                        
-                        mediaRecorder.ondataavailable = (event) => {
-                            if (event.data.size > 0) {
-                                audioChunks.push(event.data);
-                            }
-                        };
-                        
-                        mediaRecorder.onstop = async () => {
-                            // Crear blob con el tipo MIME correcto
-                            const audioBlob = new Blob(audioChunks, { type: 'audio/webm' });
-                            
-                            // Crear archivo con extensión correcta
-                            const audioFile = new File([audioBlob], 'recording.webm', { 
-                                type: 'audio/webm'
-                            });
-                            
-                            // Auto-enviar el audio grabado
-                            await sendRecordedAudio(audioFile);
-                            
-                            // Detener el stream
-                            stream.getTracks().forEach(track => track.stop());
-                        };
-                        
-                        mediaRecorder.start();
-                        recordingStartTime = Date.now();
-                        
-                        // UI de grabación
-                        recordBtn.classList.add('recording');
-                        recordBtn.textContent = '⏹️';
-                        recordSection.classList.add('recording');
-                        recordStatus.textContent = 'Grabando... (presiona para detener)';
-                        
-                        // Iniciar timer
-                        recordingInterval = setInterval(() => {
-                            const elapsed = Math.floor((Date.now() - recordingStartTime) / 1000);
-                            const minutes = Math.floor(elapsed / 60);
-                            const seconds = elapsed % 60;
-                            timer.textContent = `${minutes}:${seconds.toString().padStart(2, '0')}`;
-                        }, 1000);
-                        
-                    } catch (error) {
-                        alert('Error al acceder al micrófono: ' + error.message);
-                    }
-                } else {
-                    // Detener grabación
-                    mediaRecorder.stop();
-                    clearInterval(recordingInterval);
-                    
-                    // Reset UI
-                    recordBtn.classList.remove('recording');
-                    recordBtn.textContent = '⏺️';
-                    recordSection.classList.remove('recording');
-                    recordStatus.textContent = 'Presiona para grabar';
-                    timer.textContent = '0:00';
-                }
-            }
-
-            async function sendRecordedAudio(audioFile) {
-                const loading = document.getElementById('loading');
-                const chatBox = document.getElementById('chatBox');
-                
-                // Mostrar loading
-                loading.style.display = 'block';
-                document.querySelectorAll('button').forEach(btn => btn.disabled = true);
-                
-                try {
-                    const formData = new FormData();
-                    formData.append('audio', audioFile);
-                    if (sessionId) {
-                        formData.append('session_id', sessionId);
-                    }
-                    
-                    const response = await fetch('/audio-chat/', {
-                        method: 'POST',
-                        body: formData
-                    });
-                    
-                    if (!response.ok) {
-                        throw new Error('Error en el servidor: ' + response.status);
-                    }
-                    
-                    const data = await response.json();
-                    
-                    // Guardar session_id
-                    if (!sessionId) {
-                        sessionId = data.session_id;
-                        document.getElementById('sessionBadge').textContent = 
-                            '✓ Conversación activa';
-                    }
-                    
-                    // Limpiar placeholder
-                    if (chatBox.children.length === 1 && 
-                        chatBox.children[0].textContent.includes('aparecerá aquí')) {
-                        chatBox.innerHTML = '';
-                    }
-                    
-                    // Agregar mensaje del usuario
-                    const userDiv = document.createElement('div');
-                    userDiv.className = 'message user-message';
-                    userDiv.textContent = '🎤 ' + data.transcription;
-                    chatBox.appendChild(userDiv);
-                    
-                    // Agregar respuesta del asistente
-                    const assistantDiv = document.createElement('div');
-                    assistantDiv.className = 'message assistant-message';
-                    assistantDiv.innerHTML = `
-                        <strong>🤖 Asistente:</strong><br>
-                        ${data.response_text}
-                    `;
-                    chatBox.appendChild(assistantDiv);
-                    
-                    // Agregar audio
-                    const audioDiv = document.createElement('div');
-                    audioDiv.className = 'message assistant-message';
-                    const audioBytes = atob(data.audio_base64);
-                    const audioArray = new Uint8Array(audioBytes.length);
-                    for (let i = 0; i < audioBytes.length; i++) {
-                        audioArray[i] = audioBytes.charCodeAt(i);
-                    }
-                    const audioBlob = new Blob([audioArray], { type: 'audio/mpeg' });
-                    const audioUrl = URL.createObjectURL(audioBlob);
-                    
-                    audioDiv.innerHTML = '<audio controls autoplay src="' + audioUrl + '"></audio>';
-                    chatBox.appendChild(audioDiv);
-                    
-                    chatBox.scrollTop = chatBox.scrollHeight;
-                    
-                } catch (error) {
-                    alert('Error: ' + error.message);
-                } finally {
-                    loading.style.display = 'none';
-                    document.querySelectorAll('button').forEach(btn => btn.disabled = false);
-                }
-            }
-
-            async function sendAudio() {
-                const fileInput = document.getElementById('audioFile');
-                const loading = document.getElementById('loading');
-                const chatBox = document.getElementById('chatBox');
-                
-                if (!fileInput.files[0]) {
-                    alert('Por favor selecciona un archivo de audio');
-                    return;
-                }
-                
-                // Mostrar loading
-                loading.style.display = 'block';
-                document.querySelectorAll('button').forEach(btn => btn.disabled = true);
-                
-                try {
-                    // Preparar FormData
-                    const formData = new FormData();
-                    formData.append('audio', fileInput.files[0]);
-                    if (sessionId) {
-                        formData.append('session_id', sessionId);
-                    }
-                    
-                    // Llamar al endpoint
-                    const response = await fetch('/audio-chat/', {
-                        method: 'POST',
-                        body: formData
-                    });
-                    
-                    if (!response.ok) {
-                        throw new Error('Error en el servidor: ' + response.status);
-                    }
-                    
-                    const data = await response.json();
-                    
-                    // Guardar session_id
-                    if (!sessionId) {
-                        sessionId = data.session_id;
-                        document.getElementById('sessionBadge').textContent = 
-                            '✓ Conversación activa';
-                    }
-                    
-                    // Limpiar placeholder si es el primer mensaje
-                    if (chatBox.children.length === 1 && 
-                        chatBox.children[0].textContent.includes('aparecerá aquí')) {
-                        chatBox.innerHTML = '';
-                    }
-                    
-                    // Agregar mensaje del usuario
-                    const userDiv = document.createElement('div');
-                    userDiv.className = 'message user-message';
-                    userDiv.textContent = '🎤 ' + data.transcription;
-                    chatBox.appendChild(userDiv);
-                    
-                    // Agregar respuesta del asistente
-                    const assistantDiv = document.createElement('div');
-                    assistantDiv.className = 'message assistant-message';
-                    assistantDiv.innerHTML = `
-                        <strong>🤖 Asistente:</strong><br>
-                        ${data.response_text}
-                    `;
-                    chatBox.appendChild(assistantDiv);
-                    
-                    // Crear y agregar reproductor de audio
-                    const audioDiv = document.createElement('div');
-                    audioDiv.className = 'message assistant-message';
-                    const audioBytes = atob(data.audio_base64);
-                    const audioArray = new Uint8Array(audioBytes.length);
-                    for (let i = 0; i < audioBytes.length; i++) {
-                        audioArray[i] = audioBytes.charCodeAt(i);
-                    }
-                    const audioBlob = new Blob([audioArray], { type: 'audio/mpeg' });
-                    const audioUrl = URL.createObjectURL(audioBlob);
-                    
-                    audioDiv.innerHTML = '<audio controls src="' + audioUrl + '"></audio>';
-                    chatBox.appendChild(audioDiv);
-                    
-                    // Scroll al final
-                    chatBox.scrollTop = chatBox.scrollHeight;
-                    
-                    // Limpiar input
-                    fileInput.value = '';
-                    
-                } catch (error) {
-                    alert('Error: ' + error.message);
-                } finally {
-                    loading.style.display = 'none';
-                    document.querySelectorAll('button').forEach(btn => btn.disabled = false);
-                }
-            }
-
-            async function clearChat() {
-                if (!sessionId) {
-                    alert('No hay conversación activa');
-                    return;
-                }
-                
-                if (!confirm('¿Seguro que quieres borrar esta conversación?')) {
-                    return;
-                }
-                
-                try {
-                    await fetch('/audio-chat/' + sessionId, {
-                        method: 'DELETE'
-                    });
-                    
-                    // Resetear UI
-                    sessionId = null;
-                    document.getElementById('chatBox').innerHTML = 
-                        '<p style="text-align: center; color: #999;">La conversación aparecerá aquí...</p>';
-                    document.getElementById('sessionBadge').textContent = 'Nueva conversación';
-                    
-                } catch (error) {
-                    alert('Error al borrar conversación: ' + error.message);
-                }
-            }
-        </script>
-    </body>
-    </html>
-    """
-    return HTMLResponse(content=html_content)
+    return static_assets.response(request, "audio_chat_demo.html")
 
 
 class AudioChatResponse(BaseModel):
@@ -499,13 +49,19 @@ class AudioChatResponse(BaseModel):
     transcription: str = Field(..., description="Texto transcrito del audio")
     response_text: str = Field(..., description="Respuesta del LLM con contexto")
     audio_base64: str = Field(..., description="Audio de respuesta en base64")
-    conversation_history: List[Dict[str, str]] = Field(..., description="Historial de la conversación")
+    new_messages: List[Dict[str, str]] = Field(..., description="Mensajes posteriores al cursor del cliente")
+    cursor: int = Field(..., description="Posición del historial tras este turno (crece en cada turno)")
+    conversation_history: Optional[List[Dict[str, str]]] = Field(
+        None, description="Historial completo (solo si se pidió con include_history)"
+    )
     processing_time: float = Field(..., description="Tiempo de procesamiento")
+    usage: Optional[Dict[str, int]] = Field(None, description="Tokens del LLM (solo con LLM_USAGE_IN_RESPONSE)")
 
 
 @router.post(
     "/",
     response_model=AudioChatResponse,
+    response_model_exclude_none=True,
     summary="Audio Chat conversacional con historial",
     description="""
     Endpoint de chat por voz que mantiene contexto de conversación.
@@ -513,15 +69,26 @@ class AudioChatResponse(BaseModel):
     - Envía audio y opcionalmente un session_id
     - El sistema recuerda conversaciones previas
     - El LLM responde con contexto completo
-    - Retorna audio + historial actualizado
+    - Retorna audio + los mensajes nuevos del historial y un `cursor`
     
     Primera vez: no envíes session_id, se creará uno nuevo
-    Conversaciones siguientes: usa el session_id retornado
+    Conversaciones siguientes: usa el session_id y el cursor retornados
+    
+    `new_messages` contiene los mensajes posteriores al `cursor` enviado
+    (sin cursor, solo los de este turno). Con `include_history=true` se
+    retorna además el historial completo en `conversation_history`.
+    
+    Los turnos de una misma sesión se procesan de a uno en orden de llegada.
+    Un audio idéntico enviado mientras el original sigue en curso se encola
+    (`CHAT_DUPLICATE_TURN_POLICY=queue`), reutiliza su resultado (`coalesce`)
+    o se rechaza con 409 (`reject`).
     """
 )
 async def audio_chat(
     audio: UploadFile = File(..., description="Archivo de audio (.wav o .mp3)"),
-    session_id: Optional[str] = Form(None, description="ID de sesión (opcional, se crea si no existe)")
+    session_id: Optional[str] = Form(None, description="ID de sesión (opcional, se crea si no existe)"),
+    cursor: Optional[int] = Form(None, ge=0, description="Último cursor recibido por el cliente (opcional)"),
+    include_history: bool = Form(False, description="Incluir el historial completo en la respuesta")
 ):
     """
     Chat conversacional por audio con historial
@@ -529,94 +96,213 @@ async def audio_chat(
     Args:
         audio: Archivo de audio del usuario
         session_id: ID de sesión para mantener contexto (opcional)
+        cursor: Posición del historial que el cliente ya conoce
+        include_history: Si se retorna el historial completo
         
     Returns:
         AudioChatResponse: Respuesta con audio, texto e historial
     """
-    temp_file_path = None
-    start_time = time.time()
+    # Log detallado de la petición recibida
+    logger.info(
+        "Nueva petición audio chat: %s (%s), sesión %s",
+        audio.filename, audio.content_type, session_id
+    )
+    
+    # Crear o recuperar sesión
+    if not session_id or session_id not in chat_sessions:
+        session_id = str(uuid.uuid4())
+        chat_sessions[session_id] = []
+        logger.info("Nueva sesión creada: %s", session_id)
+    else:
+        logger.info("Continuando sesión: %s", session_id, extra=SAMPLED)
     
+    ctx = PipelineContext("audio_chat", upload=audio, values={"session_id": session_id})
     try:
-        # Log detallado de la petición recibida
-        logger.info(f"=== NUEVA PETICIÓN AUDIO CHAT ===")
-        logger.info(f"Archivo recibido: {audio.filename}")
-        logger.info(f"Content-Type: {audio.content_type}")
-        logger.info(f"Session ID recibido: {session_id}")
-        
-        # Crear o recuperar sesión
-        if not session_id or session_id not in chat_sessions:
-            session_id = str(uuid.uuid4())
-            chat_sessions[session_id] = []
-            logger.info(f"Nueva sesión creada: {session_id}")
-        else:
-            logger.info(f"Continuando sesión: {session_id}")
-        
-        # 1. Validar y procesar audio
-        logger.info("Iniciando validación de audio...")
-        await validate_audio_file(audio)
-        logger.info("Audio validado exitosamente")
-        
-        logger.info("Guardando archivo temporal...")
-        temp_file_path = await save_temp_file(audio)
-        logger.info(f"Archivo guardado en: {temp_file_path}")
-        
-        # 2. Transcribir audio (ASR) - OpenAI acepta WAV, MP3, WEBM, OGG, etc
-        logger.info("Transcribiendo audio...")
-        transcription = await transcribe_audio(temp_file_path)
-        logger.info(f"Transcripción: {transcription}")
-        
-        # 4. Agregar mensaje del usuario al historial
-        chat_sessions[session_id].append({
-            "role": "user",
-            "content": transcription
-        })
-        
-        # 5. Procesar con LLM usando todo el contexto
-        logger.info("Procesando con LLM (con contexto)...")
-        response_text = await process_text_with_context(
-            transcription, 
-            chat_sessions[session_id][:-1]  # Historial sin el mensaje actual
-        )
-        logger.info(f"Respuesta LLM: {response_text}")
-        
-        # 6. Agregar respuesta del asistente al historial
-        chat_sessions[session_id].append({
-            "role": "assistant",
-            "content": response_text
-        })
-        
-        # 7. Generar audio de respuesta (TTS)
-        logger.info("Generando audio...")
-        audio_base64 = await generate_speech(response_text)
-        
-        # Calcular tiempo
-        processing_time = round(time.time() - start_time, 2)
-        
-        logger.info(f"Chat procesado en {processing_time}s")
-        
-        return AudioChatResponse(
-            session_id=session_id,
-            transcription=transcription,
-            response_text=response_text,
-            audio_base64=audio_base64,
-            conversation_history=chat_sessions[session_id],
-            processing_time=processing_time
-        )
-        
+        await chat_pipeline.handle(ctx, "Error procesando audio chat")
     except HTTPException as he:
-        logger.error(f"HTTPException: {he.status_code} - {he.detail}")
+        logger.error("HTTPException: %s - %s", he.status_code, he.detail)
         raise
+    
+    processing_time = ctx.elapsed()
+    logger.info("Chat procesado en %ss", processing_time)
+    
+    history = chat_sessions[session_id]
+    turn_start = ctx["turn_start"]
+    since = min(cursor, turn_start) if cursor is not None else turn_start
+    
+    result = AudioChatResponse.model_construct(
+        session_id=session_id,
+        transcription=ctx["transcription"],
+        response_text=ctx["response_text"],
+        audio_base64=ctx["audio_base64"],
+        new_messages=history[since:],
+        cursor=len(history),
+        conversation_history=history if include_history else None,
+        processing_time=processing_time,
+        usage=ctx.usage.as_dict() if settings.llm_usage_in_response else None
+    )
+    return FastJSONResponse(result.model_dump(exclude_none=True))
+
+
+async def _reply_in_session(ctx: PipelineContext) -> str:
+    """Responde con el contexto de la sesión y agrega ambos mensajes al historial"""
+    history = chat_sessions[ctx["session_id"]]
+    transcription = ctx["transcription"]
+    logger.info("Transcripción: %s", payload(transcription), extra=SAMPLED)
+    ctx.values["turn_start"] = len(history)
+    history.append({"role": "user", "content": transcription})
+    
+    response_text = await process_text_with_context(transcription, history[:-1])  # Sin el mensaje actual
+    logger.info("Respuesta LLM: %s", payload(response_text), extra=SAMPLED)
+    history.append({"role": "assistant", "content": response_text})
+    return response_text
+
+
+# ASR y LLM de un turno: corren dentro del turno de la sesión (nunca intercalados)
+turn_pipeline = Pipeline("audio_chat_turn", [
+    Stage("asr", lambda ctx: transcribe_audio(ctx.audio_path), output="transcription"),
+    Stage("llm", _reply_in_session, output="response_text"),
+])
+
+
+async def _run_session_turn(ctx: PipelineContext) -> None:
+    """Ejecuta el turno en orden de llegada, aplicando la política de turnos duplicados"""
+    session_id = ctx["session_id"]
+    
+    async def run_turn():
+        await turn_pipeline.run(ctx)
+        return ctx["transcription"], ctx["response_text"], ctx["turn_start"]
+    
+    key = await _turn_key(ctx.audio_path)
+    duplicate = session_turns.find_duplicate(session_id, key) if key else None
+    result = None
+    if duplicate is not None:
+        if settings.chat_duplicate_turn_policy == "reject":
+            raise HTTPException(status_code=409, detail="Ya hay un turno idéntico en curso en esta sesión")
+        logger.info("Turno duplicado en %s: se reutiliza el resultado en curso", session_id)
+        result = await _await_duplicate(duplicate)
+    if result is None:
+        result = await session_turns.run(session_id, key, run_turn)
+    ctx.values["transcription"], ctx.values["response_text"], ctx.values["turn_start"] = result
+
+
+# El TTS corre fuera del turno: no bloquea al siguiente de la sesión
+chat_pipeline = Pipeline("audio_chat", [
+    Stage("validate", lambda ctx: validate_audio_file(ctx.upload)),
+    Stage("save", lambda ctx: save_temp_file(ctx.upload), output="audio_path"),
+    Stage("turn", _run_session_turn),
+    Stage("tts", lambda ctx: generate_speech(ctx["response_text"]), output="audio_base64"),
+])
+
+
+@router.post(
+    "/stream",
+    responses={
+        200: {"content": {"text/event-stream": {}}, "description": "Eventos SSE del turno"},
+        400: {"description": "Archivo inválido"}
+    },
+    summary="Audio Chat con eventos SSE por etapa",
+    description="""
+    Variante SSE de `/audio-chat/`. Emite, en orden:
+    
+    - `session`: session_id del turno (nuevo o continuado)
+    - `transcription_delta` / `transcription`: transcripción parcial y final
+    - `response_text`: fragmentos (`delta`) de la respuesta con contexto
+    - `audio`: fragmentos MP3 en base64
+    - `usage`: tokens del LLM (solo con LLM_USAGE_IN_RESPONSE)
+    - `history`: mensajes nuevos del turno y `cursor`
+    - `timings`: tiempos por etapa (evento final)
+    - `error`: el turno falló; el stream termina
+    
+    Los turnos de la sesión se serializan igual que en `/audio-chat/`; con
+    `coalesce` o `reject`, un audio duplicado en curso se rechaza con 409.
+    """
+)
+async def audio_chat_stream(
+    audio: UploadFile = File(..., description="Archivo de audio"),
+    session_id: Optional[str] = Form(None, description="ID de sesión (opcional, se crea si no existe)")
+):
+    """
+    Chat conversacional por audio transmitido como Server-Sent Events
+    
+    Args:
+        audio: Archivo de audio del usuario
+        session_id: ID de sesión para mantener contexto (opcional)
         
-    except Exception as e:
-        logger.error(f"Error en audio chat: {str(e)}", exc_info=True)
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error procesando audio chat: {str(e)}"
-        )
+    Returns:
+        StreamingResponse: Stream text/event-stream
+    """
+    track_llm_usage("audio_chat_stream")
+    start_deadline("audio_chat_stream")
+    if not session_id or session_id not in chat_sessions:
+        session_id = str(uuid.uuid4())
+        chat_sessions[session_id] = []
+        logger.info("Nueva sesión creada: %s", session_id)
+    
+    await validate_audio_file(audio)
+    temp_file_path = await save_temp_file(audio)
+    
+    # Los eventos de otro turno no se pueden repetir: coalesce se comporta como reject
+    key = await _turn_key(temp_file_path)
+    if key and session_turns.find_duplicate(session_id, key) is not None:
+        cleanup_temp_file(temp_file_path)
+        raise HTTPException(status_code=409, detail="Ya hay un turno idéntico en curso en esta sesión")
+    
+    return sse_response(_chat_stream_events(session_id, temp_file_path, key))
+
+
+async def _chat_stream_events(session_id: str, temp_file_path: str, key: Optional[str]) -> AsyncIterator[bytes]:
+    """Eventos de un turno: el historial se actualiza igual que en /audio-chat/"""
+    turn_start = len(chat_sessions[session_id])
+    
+    async def respond(transcription: str) -> AsyncIterator[str]:
+        nonlocal turn_start
+        history = chat_sessions[session_id]
+        turn_start = len(history)
+        # El fast path se evalúa una vez por turno ("repite" necesita el historial)
+        answer = fast_path.match(transcription, history)
+        prompt = build_context_prompt(transcription, history)
+        history.append({"role": "user", "content": transcription})
         
+        if answer is not None:
+            response_text = answer.response_text
+            yield response_text
+        else:
+            response_text = ""
+            async for delta in process_text_stream(prompt, skip_fast_path=True):
+                response_text += delta
+                yield delta
+        history.append({"role": "assistant", "content": response_text})
+    
+    yield format_sse("session", {"session_id": session_id})
+    try:
+        events = session_turns.stream(session_id, key, pipeline_events(temp_file_path, respond))
+        async for event, data in events:
+            if event == "timings":
+                history = chat_sessions[session_id]
+                yield format_sse("history", {"new_messages": history[turn_start:], "cursor": len(history)})
+            yield format_sse(event, data)
     finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            cleanup_temp_file(temp_file_path)
+        # Si el cliente se va mientras espera su turno el pipeline no llega a iniciar
+        cleanup_temp_file(temp_file_path)
+
+
+async def _await_duplicate(future: asyncio.Future) -> Optional[tuple]:
+    """Resultado del turno original; None si se canceló y el duplicado debe procesarse"""
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        if future.cancelled():
+            return None
+        raise
+
+
+async def _turn_key(temp_file_path: str) -> Optional[str]:
+    """Clave de deduplicación del turno (hash del audio), salvo con la política `queue`"""
+    if settings.chat_duplicate_turn_policy == "queue":
+        return None
+    content = await asyncio.to_thread(Path(temp_file_path).read_bytes)
+    return hashlib.sha256(content).hexdigest()
 
 
 @router.delete("/{session_id}", summary="Eliminar sesión de chat")
@@ -624,40 +310,68 @@ async def delete_session(session_id: str):
     """Elimina una sesión de chat y su historial"""
     if session_id in chat_sessions:
         del chat_sessions[session_id]
-        logger.info(f"Sesión eliminada: {session_id}")
+        logger.info("Sesión eliminada: %s", session_id)
         return {"message": f"Sesión {session_id} eliminada"}
     else:
         raise HTTPException(status_code=404, detail="Sesión no encontrada")
 
 
-@router.get("/{session_id}/history", summary="Obtener historial de sesión")
-async def get_session_history(session_id: str):
-    """Obtiene el historial de una sesión"""
+@router.get(
+    "/{session_id}/history",
+    summary="Obtener historial de sesión",
+    responses={304: {"description": "El historial no cambió desde el ETag enviado"}}
+)
+async def get_session_history(
+    session_id: str,
+    response: Response,
+    after: Optional[int] = Query(None, ge=0, description="Retornar solo mensajes posteriores a este cursor"),
+    limit: Optional[int] = Query(None, ge=1, description="Máximo de mensajes por página"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Obtiene el historial de una sesión, paginado por cursor
+    
+    El ETag depende de la versión de la sesión y de la página pedida:
+    si el cliente envía If-None-Match con el ETag vigente se responde 304.
+    """
     if session_id not in chat_sessions:
         raise HTTPException(status_code=404, detail="Sesión no encontrada")
     
+    history = chat_sessions[session_id]
+    version = len(history)  # El historial solo crece: su longitud es la versión
+    etag = f'"{version}-{after or 0}-{limit or 0}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    
+    start = min(after or 0, version)
+    end = version if limit is None else min(start + limit, version)
+    response.headers.update(headers)
+    
     return {
         "session_id": session_id,
-        "history": chat_sessions[session_id],
-        "message_count": len(chat_sessions[session_id])
+        "history": history[start:end],
+        "message_count": version,
+        "version": version,
+        "cursor": end,
+        "next_cursor": end if end < version else None
     }
 
 
-async def process_text_with_context(current_message: str, history: List[Dict[str, str]]) -> str:
+def build_context_prompt(current_message: str, history: List[Dict[str, str]]) -> str:
     """
-    Procesa el mensaje actual con el contexto del historial
+    Construye el prompt del LLM con los últimos mensajes del historial
     
     Args:
         current_message: Mensaje actual del usuario
         history: Historial previo de la conversación
         
     Returns:
-        str: Respuesta del LLM con contexto
+        str: Prompt con contexto (o el mensaje tal cual si no hay historial)
     """
-    # Construir contexto para el LLM
     if not history:
-        # Primera interacción, usar el servicio normal
-        return await process_text(current_message)
+        return current_message
     
     # Construir un prompt con contexto
     context_prompt = "Historial de conversación:\n"
@@ -666,6 +380,24 @@ async def process_text_with_context(current_message: str, history: List[Dict[str
         context_prompt += f"{role}: {msg['content']}\n"
     
     context_prompt += f"\nUsuario: {current_message}\nAsistente:"
+    return context_prompt
+
+
+async def process_text_with_context(current_message: str, history: List[Dict[str, str]]) -> str:
+    """
+    Procesa el mensaje actual con el contexto del historial
+    
+    Args:
+        current_message: Mensaje actual del usuario
+        history: Historial previo de la conversación
+        
+    Returns:
+        str: Respuesta del LLM con contexto
+    """
+    # Frases triviales ("repite" necesita el historial), evaluadas una sola vez
+    answer = fast_path.match(current_message, history)
+    if answer is not None:
+        return answer.response_text
     
     # Usar el servicio LLM con el contexto completo
-    return await process_text(context_prompt)
+    return await process_text(build_context_prompt(current_message, history), skip_fast_path=True)
@@ -0,0 +1,152 @@
+"""Router para procesamiento batch del voice agent"""
+from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, AsyncIterator
+import asyncio
+import time
+import logging
+
+from app.config import settings
+from app.models.schemas import BatchItemResult, ErrorResponse
+from app.services.asr_service import transcribe_audio
+from app.services.llm_service import process_text
+from app.services.tts_service import generate_speech
+from app.services.pipeline import Pipeline, PipelineContext, Stage, limited, timed
+from app.utils.audio_utils import validate_audio_file, save_temp_file, cleanup_temp_file
+from app.utils.llm_usage import track_llm_usage
+from app.utils.deadline import start_deadline
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/voice-agent", tags=["Voice Agent Batch"])
+
+
+@router.post(
+    "/batch",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "Un BatchItemResult por línea, en orden de finalización"
+        },
+        400: {"model": ErrorResponse, "description": "Petición inválida"}
+    },
+    summary="Procesa varios audios y transmite cada resultado al completarse",
+    description="""
+    Procesa varios archivos de audio en una sola petición (ASR → LLM → TTS)
+    con a lo sumo `BATCH_MAX_CONCURRENCY` llamadas simultáneas por etapa.
+
+    - La respuesta es NDJSON: una línea JSON por archivo
+    - Las líneas llegan en orden de finalización; `index` indica el archivo
+    - Un archivo inválido o fallido produce una línea con `status: "error"`
+      sin afectar al resto del batch
+    """
+)
+async def voice_agent_batch(
+    audios: List[UploadFile] = File(..., description="Archivos de audio")
+):
+    """
+    Procesa un batch de audios y transmite los resultados como NDJSON
+
+    Args:
+        audios: Archivos de audio del usuario
+
+    Returns:
+        StreamingResponse: Resultados por archivo, uno por línea
+    """
+    if len(audios) > settings.batch_max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Demasiados archivos. Máximo: {settings.batch_max_files}"
+        )
+
+    logger.info("Nueva petición batch: %d archivos", len(audios))
+    track_llm_usage("voice_agent_batch")
+    start_deadline("voice_agent_batch")
+
+    # Validar y guardar antes de responder: los UploadFile se cierran
+    # al terminar el handler, antes de que corra el stream
+    prepared = []
+    for index, audio in enumerate(audios):
+        try:
+            await validate_audio_file(audio)
+            temp_file_path = await save_temp_file(audio)
+            prepared.append((index, audio.filename, temp_file_path, None))
+        except HTTPException as e:
+            prepared.append((index, audio.filename, None, str(e.detail)))
+
+    return StreamingResponse(
+        _stream_results(prepared),
+        media_type="application/x-ndjson"
+    )
+
+
+async def _stream_results(prepared: list) -> AsyncIterator[bytes]:
+    """Ejecuta los items con paralelismo limitado y emite cada uno al terminar"""
+    semaphore = asyncio.Semaphore(settings.batch_max_concurrency)
+    tasks = [
+        asyncio.create_task(_process_item(semaphore, index, filename, temp_file_path, error))
+        for index, filename, temp_file_path, error in prepared
+    ]
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            yield result.model_dump_json().encode("utf-8") + b"\n"
+    finally:
+        # Cliente desconectado: cancelar pendientes y limpiar temporales
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for _, _, temp_file_path, _ in prepared:
+            if temp_file_path:
+                cleanup_temp_file(temp_file_path)
+
+
+# Etapas de cada archivo (validado y guardado antes de iniciar el stream); cada
+# etapa toma el semáforo del batch, así un item puede estar en TTS mientras
+# otro empieza su ASR
+item_pipeline = Pipeline("voice_agent_batch", [
+    Stage("asr", lambda ctx: transcribe_audio(ctx.audio_path), output="transcription"),
+    Stage("llm", lambda ctx: process_text(ctx["transcription"]), output="response_text"),
+    Stage("tts", lambda ctx: generate_speech(ctx["response_text"]), output="audio_base64"),
+], hooks=[timed, limited("semaphore")])
+
+
+async def _process_item(
+    semaphore: asyncio.Semaphore,
+    index: int,
+    filename: Optional[str],
+    temp_file_path: Optional[str],
+    error: Optional[str]
+) -> BatchItemResult:
+    """Procesa un archivo del batch; los errores quedan en el resultado del item"""
+    if error is not None:
+        return BatchItemResult(index=index, filename=filename, status="error", processing_time=0.0, error=error)
+
+    start_time = time.time()
+    try:
+        ctx = await item_pipeline.run(PipelineContext(
+            "voice_agent_batch", values={"audio_path": temp_file_path, "semaphore": semaphore}
+        ))
+
+        return BatchItemResult(
+            index=index,
+            filename=filename,
+            status="ok",
+            transcription=ctx["transcription"],
+            response_text=ctx["response_text"],
+            audio_base64=ctx["audio_base64"],
+            processing_time=round(time.time() - start_time, 2)
+        )
+    except Exception as e:
+        logger.error("Error en item %d del batch: %s", index, e)
+        return BatchItemResult(
+            index=index,
+            filename=filename,
+            status="error",
+            processing_time=round(time.time() - start_time, 2),
+            error=str(e)
+        )
+    finally:
+        cleanup_temp_file(temp_file_path)
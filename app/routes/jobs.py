@@ -0,0 +1,73 @@
+"""Router para jobs asíncronos del voice agent"""
+from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from typing import Optional
+import asyncio
+import logging
+
+from app.models.schemas import JobStatusResponse, ErrorResponse
+from app.services.job_queue import job_pool, job_payload, webhook_allowed
+from app.utils.audio_utils import validate_audio_file, save_temp_file, cleanup_temp_file
+from app.utils.json_response import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.post(
+    "/",
+    status_code=202,
+    response_model=JobStatusResponse,
+    responses={400: {"model": ErrorResponse, "description": "Archivo inválido"}},
+    summary="Encola un audio para procesarlo en segundo plano",
+    description="""
+    Valida y guarda el audio, y retorna inmediatamente un `job_id`.
+
+    - Consultar el estado con `GET /jobs/{job_id}`
+    - Opcionalmente enviar `webhook_url` para recibir el estado final por POST
+      (solo hosts de `JOBS_WEBHOOK_ALLOWED_HOSTS`; firmado con HMAC-SHA256 en
+      `X-Webhook-Signature` sobre `<X-Webhook-Timestamp>.<body>`)
+    - El resultado se conserva durante `JOBS_RESULT_TTL_SECONDS`
+    """
+)
+async def submit_job(
+    audio: UploadFile = File(..., description="Archivo de audio"),
+    webhook_url: Optional[str] = Form(None, description="URL a notificar al terminar (opcional)")
+):
+    """
+    Encola un job de voice agent
+
+    Args:
+        audio: Archivo de audio del usuario
+        webhook_url: URL que recibe el estado final del job
+
+    Returns:
+        JobStatusResponse: Estado inicial del job
+    """
+    if webhook_url and not webhook_allowed(webhook_url):
+        raise HTTPException(
+            status_code=400,
+            detail="webhook_url no permitida: debe ser http(s) a un host de JOBS_WEBHOOK_ALLOWED_HOSTS"
+        )
+
+    await validate_audio_file(audio)
+    temp_file_path = await save_temp_file(audio)
+
+    try:
+        job_id = await job_pool.submit(audio.filename, temp_file_path, webhook_url)
+    except Exception:
+        cleanup_temp_file(temp_file_path)
+        raise
+
+    logger.info("Job encolado: %s", job_id)
+    return job_payload(await asyncio.to_thread(job_pool.get, job_id))
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse, summary="Consultar estado de un job")
+async def get_job(job_id: str):
+    """Obtiene el estado y, si terminó, el resultado de un job"""
+    job = await asyncio.to_thread(job_pool.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    # El resultado viene de la base tal como lo guardó el worker: no se revalida
+    return FastJSONResponse(job_payload(job))
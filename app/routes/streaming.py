@@ -0,0 +1,180 @@
+"""Router para el voice agent con eventos SSE"""
+from fastapi import APIRouter, UploadFile, File
+from typing import Any, AsyncIterator, Callable, Dict, Tuple
+import asyncio
+import base64
+import time
+import logging
+
+from app.config import settings
+from app.models.schemas import ErrorResponse
+from app.services.asr_service import transcribe_audio_stream
+from app.services.llm_service import process_text_stream
+from app.services.tts_service import generate_speech_stream
+from app.services.phrase_bank import phrase_bank
+from app.services.pipeline import Pipeline, PipelineContext, Stage
+from app.utils.audio_utils import validate_audio_file, save_temp_file, cleanup_temp_file
+from app.utils.sse import format_sse, sse_response
+from app.utils.llm_usage import current_endpoint, current_usage, track_llm_usage
+from app.utils.deadline import start_deadline
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/voice-agent", tags=["Voice Agent Streaming"])
+
+
+@router.post(
+    "/stream",
+    responses={
+        200: {
+            "content": {"text/event-stream": {}},
+            "description": "Eventos SSE del pipeline"
+        },
+        400: {"model": ErrorResponse, "description": "Archivo inválido"}
+    },
+    summary="Procesa audio y transmite cada etapa como Server-Sent Events",
+    description="""
+    Igual que /voice-agent, pero la respuesta es un stream SSE con los
+    eventos en orden a medida que cada etapa produce resultados:
+
+    - `transcription_delta`: fragmento nuevo de la transcripción parcial
+    - `transcription`: transcripción final (inicia de inmediato el LLM)
+    - `filler`: audio "un momento" si el LLM tarda (THINKING_FILLER_ENABLED)
+    - `response_text`: fragmento (`delta`) de la respuesta del LLM
+    - `audio`: fragmento MP3 en base64 (`chunk`, con su `index`)
+    - `usage`: tokens del LLM (solo con LLM_USAGE_IN_RESPONSE)
+    - `timings`: evento final con los tiempos por etapa en segundos
+    - `error`: el pipeline falló (con audio pre-sintetizado); el stream termina
+    """
+)
+async def voice_agent_stream(audio: UploadFile = File(..., description="Archivo de audio")):
+    """
+    Procesa un audio emitiendo cada etapa del pipeline por SSE
+
+    Args:
+        audio: Archivo de audio del usuario
+
+    Returns:
+        StreamingResponse: Stream text/event-stream
+    """
+    logger.info("Nueva petición voice-agent/stream: %s", audio.filename)
+    track_llm_usage("voice_agent_stream")
+    start_deadline("voice_agent_stream")
+
+    # Validar y guardar antes de iniciar el stream (los errores siguen siendo 400)
+    await validate_audio_file(audio)
+    temp_file_path = await save_temp_file(audio)
+
+    return sse_response(_format_events(pipeline_events(temp_file_path, process_text_stream)))
+
+
+async def _format_events(events: AsyncIterator[Tuple[str, Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    async for event, data in events:
+        yield format_sse(event, data)
+
+
+async def pipeline_events(
+    temp_file_path: str,
+    respond: Callable[[str], AsyncIterator[str]]
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Ejecuta ASR → LLM → TTS en streaming y emite (evento, datos) por etapa
+
+    Las etapas siguen avanzando mientras se envían sus eventos al cliente.
+
+    Args:
+        temp_file_path: Audio ya validado; se elimina al terminar
+        respond: Genera los deltas de la respuesta a partir de la transcripción
+
+    Yields:
+        Tuple[str, Dict[str, Any]]: Eventos SSE sin serializar
+    """
+    ctx = PipelineContext(current_endpoint(), values={"audio_path": temp_file_path, "respond": respond})
+    try:
+        async for event in stream_pipeline.events(ctx):
+            yield event
+
+        usage = current_usage()
+        if settings.llm_usage_in_response and usage is not None:
+            yield "usage", usage.as_dict()
+        
+        yield "timings", {**ctx.timings, "total": round(time.time() - ctx.started_at, 3)}
+
+    except Exception as e:
+        logger.error("Error en pipeline SSE: %s", e)
+        error = {"error": f"Error en el procesamiento: {str(e)}"}
+        error_audio = phrase_bank.get_base64("error")
+        if error_audio is not None:
+            error["audio_base64"] = error_audio
+        yield "error", error
+
+    finally:
+        cleanup_temp_file(temp_file_path)
+
+
+async def _stream_transcription(ctx: PipelineContext) -> str:
+    transcription = ""
+    async for is_final, text in transcribe_audio_stream(ctx.audio_path):
+        if is_final:
+            transcription = text
+        else:
+            await ctx.emit("transcription_delta", {"text": text})
+    await ctx.emit("transcription", {"text": transcription})
+    return transcription
+
+
+async def _stream_response(ctx: PipelineContext) -> str:
+    llm_start = time.time()
+    response_text = ""
+    async for kind, value in _with_thinking_filler(ctx["respond"](ctx["transcription"])):
+        if kind == "filler":
+            await ctx.emit("filler", {"audio_base64": value})
+            continue
+        if not response_text:
+            ctx.timings["llm_first_token"] = round(time.time() - llm_start, 3)
+        response_text += value
+        await ctx.emit("response_text", {"delta": value})
+    return response_text
+
+
+async def _stream_speech(ctx: PipelineContext) -> None:
+    tts_start = time.time()
+    index = 0
+    async for chunk in generate_speech_stream(ctx["response_text"]):
+        if index == 0:
+            ctx.timings["tts_first_chunk"] = round(time.time() - tts_start, 3)
+        await ctx.emit("audio", {"index": index, "chunk": base64.b64encode(chunk).decode("ascii")})
+        index += 1
+
+
+# Etapas en streaming: cada una publica sus eventos con ctx.emit
+stream_pipeline = Pipeline("stream", [
+    Stage("asr", _stream_transcription, output="transcription"),
+    Stage("llm", _stream_response, output="response_text"),
+    Stage("tts", _stream_speech),
+])
+
+
+async def _with_thinking_filler(deltas: AsyncIterator[str]) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Reenvía los deltas del LLM como ("delta", texto); si el primer token tarda
+    más que THINKING_FILLER_DELAY_MS, antes emite ("filler", audio_base64)
+    """
+    iterator = deltas.__aiter__()
+    filler = phrase_bank.get_base64("thinking") if settings.thinking_filler_enabled else None
+    if filler is not None:
+        first = asyncio.ensure_future(iterator.__anext__())
+        try:
+            done, _ = await asyncio.wait({first}, timeout=settings.thinking_filler_delay_ms / 1000)
+            if not done:
+                yield "filler", filler
+            try:
+                yield "delta", await first
+            except StopAsyncIteration:
+                return
+        finally:
+            if not first.done():
+                first.cancel()
+
+    async for delta in iterator:
+        yield "delta", delta
@@ -1,6 +1,13 @@
 """Servicios de procesamiento"""
-from .asr_service import transcribe_audio
-from .llm_service import process_text
-from .tts_service import generate_speech
+from .asr_service import transcribe_audio, transcribe_audio_stream
+from .llm_service import process_text, process_text_stream
+from .tts_service import generate_speech, generate_speech_stream
 
-__all__ = ["transcribe_audio", "process_text", "generate_speech"]
+__all__ = [
+    "transcribe_audio",
+    "transcribe_audio_stream",
+    "process_text",
+    "process_text_stream",
+    "generate_speech",
+    "generate_speech_stream",
+]
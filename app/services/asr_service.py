@@ -1,15 +1,28 @@
 """Servicio de ASR (Automatic Speech Recognition)"""
 from openai import OpenAI
+import asyncio
+import hashlib
+from typing import AsyncIterator, Tuple
 from app.config import settings
+from app.services.connection_pool import connection_pool
+from app.services.endpoint_router import Endpoint, asr_router
+from app.utils.async_utils import iterate_in_thread
+from app.utils.deadline import DeadlineExceeded, stage_timeout
+from app.utils.single_flight import SingleFlight
+from app.utils.logging_config import payload, SAMPLED
 import logging
 
 logger = logging.getLogger(__name__)
 
+_flight = SingleFlight("asr")
+
 
 async def transcribe_audio(audio_file_path: str) -> str:
     """
     Transcribe audio a texto usando OpenAI API
     
+    Audios idénticos en curso comparten una sola llamada (single-flight).
+    
     Args:
         audio_file_path: Ruta al archivo de audio
         
@@ -20,28 +33,117 @@ async def transcribe_audio(audio_file_path: str) -> str:
         Exception: Si hay error en la transcripción
     """
     try:
-        client = OpenAI(api_key=settings.openai_api_key)
-        
+        digest = await asyncio.to_thread(_file_digest, audio_file_path)
+    except OSError:
+        # Sin clave no se comparte; la llamada reporta el error habitual
+        return await _transcribe_audio(audio_file_path)
+    return await _flight.do(f"{settings.asr_model}|{digest}", lambda: _transcribe_audio(audio_file_path))
+
+
+def _client(endpoint: Endpoint) -> OpenAI:
+    return OpenAI(
+        api_key=endpoint.api_key or settings.openai_api_key,
+        base_url=endpoint.base_url,
+        http_client=connection_pool.client,
+        max_retries=0  # Reintentos y failover los hace el router
+    )
+
+
+def _file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+async def _transcribe_audio(audio_file_path: str) -> str:
+    try:
         # Determinar el nombre del archivo con extensión correcta
         import os
         filename = os.path.basename(audio_file_path)
         
         with open(audio_file_path, "rb") as audio_file:
-            logger.info(f"Transcribiendo audio: {filename} con modelo {settings.asr_model}")
+            logger.info("Transcribiendo audio: %s con modelo %s", filename, settings.asr_model, extra=SAMPLED)
             
             # Importante: Especificar el nombre del archivo para que OpenAI detecte el formato
             from pathlib import Path
             file_tuple = (filename, audio_file, "application/octet-stream")
             
-            transcription = client.audio.transcriptions.create(
-                model=settings.asr_model,
-                file=file_tuple,
-                language="es"  # Especificamos español
-            )
+            def create(endpoint: Endpoint):
+                audio_file.seek(0)  # Tras un failover se reenvía el archivo completo
+                # La llamada es bloqueante: se ejecuta en un hilo para no frenar el event loop
+                return asyncio.to_thread(
+                    _client(endpoint).audio.transcriptions.create,
+                    model=settings.asr_model,
+                    file=file_tuple,
+                    language="es",  # Especificamos español
+                    timeout=stage_timeout(settings.asr_timeout_seconds)
+                )
+            
+            transcription = await asr_router.call(create)
         
-        logger.info(f"Transcripción exitosa: {transcription.text[:50]}...")
+        logger.info("Transcripción exitosa: %s", payload(transcription.text), extra=SAMPLED)
         return transcription.text
         
+    except DeadlineExceeded:
+        raise
+        
+    except Exception as e:
+        logger.error("Error en transcripción: %s", e, exc_info=True)
+        raise Exception(f"Error al transcribir audio: {str(e)}")
+
+
+async def transcribe_audio_stream(audio_file_path: str) -> AsyncIterator[Tuple[bool, str]]:
+    """
+    Transcribe audio emitiendo transcripciones parciales mientras avanza
+    
+    Args:
+        audio_file_path: Ruta al archivo de audio
+        
+    Yields:
+        Tuple[bool, str]: (False, fragmento nuevo) por cada delta y, al final,
+        (True, texto completo)
+        
+    Raises:
+        Exception: Si hay error en la transcripción
+    """
+    try:
+        import os
+        filename = os.path.basename(audio_file_path)
+        
+        with open(audio_file_path, "rb") as audio_file:
+            logger.info(
+                "Transcribiendo audio en streaming: %s con modelo %s", filename, settings.asr_model, extra=SAMPLED
+            )
+            
+            file_tuple = (filename, audio_file, "application/octet-stream")
+            
+            def create(endpoint: Endpoint):
+                audio_file.seek(0)
+                return asyncio.to_thread(
+                    _client(endpoint).audio.transcriptions.create,
+                    model=settings.asr_model,
+                    file=file_tuple,
+                    language="es",
+                    stream=True,
+                    timeout=stage_timeout(settings.asr_timeout_seconds)
+                )
+            
+            # Una vez abierto el stream ya no se cambia de endpoint
+            stream = await asr_router.call(create)
+            
+            text = ""
+            async for event in iterate_in_thread(stream):
+                if event.type == "transcript.text.delta":
+                    text += event.delta
+                    yield False, event.delta
+                elif event.type == "transcript.text.done":
+                    text = event.text
+        
+        logger.info("Transcripción exitosa: %s", payload(text), extra=SAMPLED)
+        yield True, text
+        
+    except DeadlineExceeded:
+        raise
+        
     except Exception as e:
-        logger.error(f"Error en transcripción: {str(e)}", exc_info=True)
+        logger.error("Error en transcripción: %s", e, exc_info=True)
         raise Exception(f"Error al transcribir audio: {str(e)}")
@@ -0,0 +1,101 @@
+"""Pool de conexiones HTTP compartido con la API de OpenAI, pre-calentado al arrancar"""
+import asyncio
+import logging
+import threading
+from typing import List, Optional
+
+import httpx
+from openai import DefaultHttpxClient
+
+from app.config import settings
+from app.services.endpoint_router import all_base_urls
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Cliente httpx compartido por los servicios ASR, LLM y TTS
+
+    Un único pool permite reutilizar conexiones TLS entre peticiones. Al
+    arrancar se abren `HTTP_POOL_WARM_CONNECTIONS` conexiones en paralelo
+    por endpoint configurado y se mantienen vivas con sondas periódicas
+    baratas (GET /models), de modo que el handshake no quede en el camino
+    crítico del usuario.
+    """
+
+    def __init__(self):
+        self._client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
+        self._tasks: List[asyncio.Task] = []
+        self.ready = False
+
+    @property
+    def client(self) -> httpx.Client:
+        """Cliente httpx del pool (se crea en el primer uso, una sola vez aunque se pida desde varios hilos)"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = DefaultHttpxClient(
+                        timeout=httpx.Timeout(
+                            settings.http_timeout_seconds, connect=settings.http_connect_timeout_seconds
+                        ),
+                        limits=httpx.Limits(
+                            max_connections=settings.http_pool_max_connections,
+                            max_keepalive_connections=settings.http_pool_max_connections,
+                            keepalive_expiry=settings.http_keepalive_expiry_seconds
+                        )
+                    )
+        return self._client
+
+    async def start(self) -> None:
+        """Lanza el pre-calentamiento y las sondas keep-alive en segundo plano"""
+        self.ready = False
+        if settings.http_pool_warm_connections <= 0:
+            self.ready = True
+            return
+        self._tasks = [asyncio.create_task(self._warm_up())]
+
+    async def stop(self) -> None:
+        """Detiene las sondas y cierra las conexiones del pool"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.ready = False
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def _warm_up(self) -> None:
+        warmed = await self._probe(settings.http_pool_warm_connections)
+        # Listo aunque falle: el servicio sigue funcionando con conexiones en frío
+        self.ready = True
+        logger.info("Pool HTTP pre-calentado: %d conexiones", warmed)
+
+        if settings.http_keepalive_interval_seconds > 0:
+            while True:
+                await asyncio.sleep(settings.http_keepalive_interval_seconds)
+                await self._probe(settings.http_pool_warm_connections)
+
+    async def _probe(self, connections: int) -> int:
+        """Envía sondas concurrentes (una por conexión y endpoint) y retorna cuántas respondieron"""
+        base_urls = all_base_urls()
+        self.client  # Se crea aquí, antes de repartir las sondas entre hilos
+        results = await asyncio.gather(
+            *(asyncio.to_thread(self._probe_once, url) for url in base_urls for _ in range(connections)),
+            return_exceptions=True
+        )
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            logger.warning("Sonda keep-alive fallida (%d/%d): %s", len(failures), len(results), failures[0])
+        return len(results) - len(failures)
+
+    def _probe_once(self, base_url: str) -> None:
+        # Cualquier respuesta HTTP (incluso 401) deja la conexión establecida, así
+        # que la sonda va sin credenciales: no expone claves a gateways de terceros
+        self.client.get(f"{base_url.rstrip('/')}/models", timeout=settings.http_connect_timeout_seconds)
+
+
+# Instancia global (se inicia en el lifespan de la app)
+connection_pool = ConnectionPool()
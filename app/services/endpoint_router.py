@@ -0,0 +1,201 @@
+"""Enrutamiento entre endpoints compatibles con OpenAI según latencia y errores"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+from urllib.parse import urlparse
+
+import openai
+
+from app.config import settings
+from app.utils.deadline import check_deadline, remaining
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Errores atribuibles al endpoint: se prueba el siguiente
+FAILOVER_ERRORS = (openai.APIConnectionError, openai.InternalServerError, openai.RateLimitError)
+
+
+@dataclass
+class Endpoint:
+    """Un endpoint upstream y sus estadísticas (EWMA) de latencia y errores"""
+    name: str
+    base_url: str
+    weight: float = 1.0
+    api_key: Optional[str] = None
+    latency_ewma: Optional[float] = None
+    error_ewma: float = 0.0
+    error_updated_at: float = 0.0
+    cooldown_until: float = 0.0
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def error_rate(self, now: float) -> float:
+        """
+        Tasa de error (EWMA) decaída con el tiempo desde la última llamada
+
+        Sin decaimiento, un endpoint que dejó de recibir tráfico tras unos
+        errores conservaría su penalización para siempre. Cada
+        ROUTER_ERROR_HALF_LIFE_SECONDS sin llamadas la tasa se reduce a la mitad.
+        """
+        idle = max(now - self.error_updated_at, 0.0)
+        return self.error_ewma * 0.5 ** (idle / max(settings.router_error_half_life_seconds, 1e-6))
+
+    def score(self, now: float) -> float:
+        """Menor es mejor; sin datos de latencia (ni errores) se prueba primero"""
+        # La tasa de error penaliza como segundos extra de latencia
+        return ((self.latency_ewma or 0.0) + self.error_rate(now)) / max(self.weight, 1e-6)
+
+
+class EndpointRouter:
+    """
+    Elige el endpoint de una etapa (asr, llm o tts) y hace failover
+
+    Los endpoints salen de `<ETAPA>_ENDPOINTS` (lista de {base_url, weight,
+    api_key, name}); sin configurar se usa `OPENAI_BASE_URL`. Se prefiere
+    el endpoint sano con menor latencia EWMA ajustada por peso y tasa de
+    error. Un endpoint cuya tasa de error supera ROUTER_ERROR_THRESHOLD
+    queda en cuarentena ROUTER_COOLDOWN_SECONDS y solo se usa como último
+    recurso.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._config: Optional[List[Dict[str, Any]]] = None
+        self._endpoints: List[Endpoint] = []
+
+    @property
+    def endpoints(self) -> List[Endpoint]:
+        config = getattr(settings, f"{self.stage}_endpoints")
+        # Se reconstruye solo si cambió la configuración
+        if self._config is not config or not self._endpoints:
+            self._config = config
+            self._endpoints = _build_endpoints(config)
+        return self._endpoints
+
+    def candidates(self) -> List[Endpoint]:
+        """Endpoints en orden de preferencia (los en cuarentena al final)"""
+        now = time.monotonic()
+        endpoints = self.endpoints
+        healthy = sorted((e for e in endpoints if e.healthy(now)), key=lambda e: e.score(now))
+        cooling = sorted((e for e in endpoints if not e.healthy(now)), key=lambda e: e.cooldown_until)
+        return healthy + cooling
+
+    async def call(self, request: Callable[[Endpoint], Awaitable[T]]) -> T:
+        """
+        Ejecuta `request` contra el mejor endpoint, con failover ante errores del endpoint
+
+        Los errores del endpoint pasan al siguiente candidato. Con el último
+        se reintenta hasta ROUTER_MAX_RETRIES veces con espera exponencial
+        (ROUTER_RETRY_BACKOFF_SECONDS), mientras lo que queda del deadline
+        cubra la espera y la latencia EWMA del endpoint. El cliente OpenAI no
+        reintenta por su cuenta (max_retries=0).
+
+        Args:
+            request: Llamada upstream que recibe el endpoint elegido
+
+        Returns:
+            T: Resultado del primer endpoint que responde
+
+        Raises:
+            DeadlineExceeded: Si no queda tiempo para la llamada (ni para
+                otro intento tras un fallo)
+            Exception: El error del último intento, o cualquier error que
+                no sea atribuible al endpoint (p. ej. 400)
+        """
+        candidates = self.candidates()
+        retries = 0
+        index = 0
+        while True:
+            endpoint = candidates[index]
+            # La latencia habitual del endpoint estima si la etapa cabe en el deadline
+            check_deadline(self.stage, endpoint.latency_ewma or 0.0)
+            start = time.monotonic()
+            try:
+                result = await request(endpoint)
+            except FAILOVER_ERRORS as e:
+                # Un timeout por deadline agotado es un 504 y no cuenta como error del endpoint
+                check_deadline(self.stage)
+                self.record(endpoint, time.monotonic() - start, ok=False)
+                if index < len(candidates) - 1:
+                    index += 1
+                    metrics.increment(f"router.{self.stage}.failovers")
+                    logger.warning(
+                        "Endpoint %s/%s falló (%s), probando el siguiente",
+                        self.stage, endpoint.name, type(e).__name__
+                    )
+                    continue
+                delay = settings.router_retry_backoff_seconds * 2 ** retries
+                if retries >= settings.router_max_retries or not _fits(delay + (endpoint.latency_ewma or 0.0)):
+                    raise
+                retries += 1
+                metrics.increment(f"router.{self.stage}.retries")
+                logger.warning(
+                    "Endpoint %s/%s falló (%s), reintento %d en %.2f s",
+                    self.stage, endpoint.name, type(e).__name__, retries, delay
+                )
+                await asyncio.sleep(delay)
+                continue
+            self.record(endpoint, time.monotonic() - start, ok=True)
+            return result
+
+    def record(self, endpoint: Endpoint, latency: float, ok: bool) -> None:
+        """Actualiza las EWMA de latencia y error del endpoint"""
+        alpha = settings.router_ewma_alpha
+        now = time.monotonic()
+        if ok:
+            endpoint.latency_ewma = latency if endpoint.latency_ewma is None else (
+                alpha * latency + (1 - alpha) * endpoint.latency_ewma
+            )
+        endpoint.error_ewma = alpha * (0.0 if ok else 1.0) + (1 - alpha) * endpoint.error_rate(now)
+        endpoint.error_updated_at = now
+        if not ok and endpoint.error_ewma >= settings.router_error_threshold:
+            endpoint.cooldown_until = now + settings.router_cooldown_seconds
+            logger.warning("Endpoint %s/%s en cuarentena por errores", self.stage, endpoint.name)
+
+        prefix = f"router.{self.stage}.{endpoint.name}"
+        metrics.increment(f"{prefix}.{'ok' if ok else 'errors'}")
+        metrics.set_gauge(f"{prefix}.error_rate", round(endpoint.error_ewma, 4))
+        if endpoint.latency_ewma is not None:
+            metrics.set_gauge(f"{prefix}.latency_ms", round(endpoint.latency_ewma * 1000, 1))
+
+
+def _fits(seconds: float) -> bool:
+    """True si lo que queda del deadline (si lo hay) alcanza para `seconds`"""
+    left = remaining()
+    return left is None or left > seconds
+
+
+def _build_endpoints(config: List[Dict[str, Any]]) -> List[Endpoint]:
+    if not config:
+        config = [{"base_url": settings.openai_base_url}]
+    return [
+        Endpoint(
+            name=item.get("name") or urlparse(item["base_url"]).netloc or item["base_url"],
+            base_url=item["base_url"],
+            weight=float(item.get("weight", 1.0)),
+            api_key=item.get("api_key")
+        )
+        for item in config
+    ]
+
+
+# Un router por etapa del pipeline
+asr_router = EndpointRouter("asr")
+llm_router = EndpointRouter("llm")
+tts_router = EndpointRouter("tts")
+
+
+def all_base_urls() -> List[str]:
+    """URLs base distintas de todas las etapas (para pre-calentar conexiones)"""
+    urls = []
+    for router in (asr_router, llm_router, tts_router):
+        for endpoint in router.endpoints:
+            if endpoint.base_url not in urls:
+                urls.append(endpoint.base_url)
+    return urls
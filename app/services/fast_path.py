@@ -0,0 +1,107 @@
+"""Respuestas locales para frases triviales (sin llamar al LLM)"""
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.utils.logging_config import SAMPLED
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Intent que repite la última respuesta del asistente en lugar de una respuesta fija
+REPEAT_INTENT = "repeat"
+
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_COURTESY_RE = re.compile(r"\bpor favor\b")
+
+
+@dataclass(frozen=True)
+class FastPathAnswer:
+    """Respuesta resuelta localmente"""
+    intent: str
+    response_text: str
+
+
+class FastPathEngine:
+    """
+    Reconoce frases triviales ("hola", "gracias", "adiós", "repite") y las responde sin LLM
+
+    Las reglas salen de `FAST_PATH_INTENTS`: por intent, las frases que lo
+    activan y la respuesta fija. La comparación es contra la frase completa,
+    normalizada (minúsculas, sin tildes, sin puntuación ni "por favor"),
+    para no capturar mensajes que solo empiezan con un saludo.
+    """
+
+    def __init__(self):
+        self._rules: Optional[Dict[str, Dict]] = None
+        self._index: Dict[str, str] = {}
+
+    def match(self, transcription: str, history: Optional[List[Dict[str, str]]] = None) -> Optional[FastPathAnswer]:
+        """
+        Busca una respuesta local para la transcripción
+
+        Args:
+            transcription: Texto del usuario
+            history: Historial previo de la sesión (necesario para "repite")
+
+        Returns:
+            Optional[FastPathAnswer]: Respuesta local, o None si debe ir al LLM
+        """
+        if not settings.fast_path_enabled:
+            return None
+
+        answer = self._resolve(transcription, history or [])
+        metrics.increment("fast_path.evaluated")
+        if answer is not None:
+            metrics.increment("fast_path.hits")
+            metrics.increment(f"fast_path.hits.{answer.intent}")
+            logger.info("Fast path '%s': respuesta local sin LLM", answer.intent, extra=SAMPLED)
+        metrics.set_gauge(
+            "fast_path.hit_rate",
+            round(metrics.get("fast_path.hits") / metrics.get("fast_path.evaluated"), 4)
+        )
+        return answer
+
+    def responses(self) -> Dict[str, str]:
+        """Respuestas fijas por intent (para pre-sintetizarlas en el banco de frases)"""
+        return {
+            intent: rule["response"]
+            for intent, rule in settings.fast_path_intents.items()
+            if rule.get("response")
+        }
+
+    def _resolve(self, transcription: str, history: List[Dict[str, str]]) -> Optional[FastPathAnswer]:
+        intent = self._lookup_index().get(normalize_utterance(transcription))
+        if intent is None:
+            return None
+        if intent == REPEAT_INTENT:
+            previous = next((m["content"] for m in reversed(history) if m["role"] == "assistant"), None)
+            return FastPathAnswer(intent, previous) if previous else None
+        response_text = settings.fast_path_intents[intent].get("response")
+        return FastPathAnswer(intent, response_text) if response_text else None
+
+    def _lookup_index(self) -> Dict[str, str]:
+        # Se reconstruye solo si cambió la configuración
+        if self._rules is not settings.fast_path_intents:
+            self._rules = settings.fast_path_intents
+            self._index = {
+                normalize_utterance(phrase): intent
+                for intent, rule in self._rules.items()
+                for phrase in rule.get("phrases", [])
+            }
+        return self._index
+
+
+def normalize_utterance(text: str) -> str:
+    """Minúsculas, sin tildes, sin puntuación ni fórmulas de cortesía"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = _COURTESY_RE.sub(" ", _NON_WORD_RE.sub(" ", text))
+    return " ".join(text.split())
+
+
+# Instancia global
+fast_path = FastPathEngine()
@@ -0,0 +1,399 @@
+"""Cola persistente de jobs y pool de workers para procesamiento asíncrono"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+from app.services.asr_service import transcribe_audio
+from app.services.llm_service import process_text
+from app.services.tts_service import generate_speech
+from app.services.pipeline import Pipeline, PipelineContext, Stage
+from app.utils.audio_utils import cleanup_temp_file
+from app.utils.llm_usage import track_llm_usage
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+WEBHOOK_SIGNATURE_HEADER = "X-Webhook-Signature"
+WEBHOOK_TIMESTAMP_HEADER = "X-Webhook-Timestamp"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    filename TEXT,
+    audio_path TEXT,
+    webhook_url TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    expires_at REAL,
+    claimed_by TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at);
+"""
+
+# Columnas agregadas después de la primera versión del esquema
+_MIGRATIONS = {"claimed_by": "TEXT", "heartbeat_at": "REAL"}
+
+
+# Etapas de un job; sin deadline: el cliente no espera la respuesta
+job_pipeline = Pipeline("jobs", [
+    Stage("asr", lambda ctx: transcribe_audio(ctx.audio_path), output="transcription"),
+    Stage("llm", lambda ctx: process_text(ctx["transcription"]), output="response_text"),
+    Stage("tts", lambda ctx: generate_speech(ctx["response_text"]), output="audio_base64"),
+])
+
+
+class JobStore:
+    """
+    Almacén de jobs en SQLite local
+
+    La base se comparte entre procesos: cada almacén marca los jobs que toma
+    con su `owner` y renueva `heartbeat_at` mientras los procesa. Solo se
+    re-encolan los jobs cuyo heartbeat tiene más de JOBS_CLAIM_TIMEOUT_SECONDS
+    (su proceso murió), nunca los que otro proceso vivo sigue procesando.
+    """
+
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in _MIGRATIONS.items():
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self.requeue_stale()
+
+    def create(self, filename: Optional[str], audio_path: str, webhook_url: Optional[str]) -> str:
+        """Encola un job nuevo y retorna su id"""
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, filename, audio_path, webhook_url, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, JOB_QUEUED, filename, audio_path, webhook_url, now, now)
+            )
+        return job_id
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Toma el job encolado más antiguo y lo marca en ejecución"""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (JOB_QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            # La condición sobre status evita que otro proceso tome el mismo job
+            now = time.time()
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, claimed_by = ?, heartbeat_at = ? "
+                "WHERE id = ? AND status = ?",
+                (JOB_RUNNING, now, self.owner, now, row["id"], JOB_QUEUED)
+            ).rowcount
+        return dict(row) if claimed else None
+
+    def heartbeat(self, job_id: str) -> bool:
+        """Renueva el claim de un job en ejecución; False si ya no es de este almacén"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ? AND claimed_by = ?",
+                (time.time(), job_id, JOB_RUNNING, self.owner)
+            ).rowcount > 0
+
+    def requeue_stale(self) -> int:
+        """Vuelve a encolar los jobs cuyo heartbeat venció y retorna cuántos"""
+        now = time.time()
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, claimed_by = NULL, heartbeat_at = NULL "
+                "WHERE status = ? AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (JOB_QUEUED, now, JOB_RUNNING, now - settings.jobs_claim_timeout_seconds)
+            ).rowcount
+
+    def release(self) -> int:
+        """Devuelve a la cola los jobs en ejecución de este almacén (al detener el pool)"""
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ?, claimed_by = NULL, heartbeat_at = NULL "
+                "WHERE status = ? AND claimed_by = ?",
+                (JOB_QUEUED, time.time(), JOB_RUNNING, self.owner)
+            ).rowcount
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]], error: Optional[str], ttl_seconds: int) -> bool:
+        """
+        Guarda el resultado (o error) y fija su expiración
+
+        Returns:
+            bool: False si el claim ya no era de este almacén (el job se
+                re-encoló y lo tomó otro worker): no se guarda nada
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ?, expires_at = ? "
+                "WHERE id = ? AND status = ? AND claimed_by = ?",
+                (
+                    JOB_FAILED if error else JOB_COMPLETED,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    now,
+                    now + ttl_seconds,
+                    job_id,
+                    JOB_RUNNING,
+                    self.owner
+                )
+            ).rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Retorna el job si existe y no ha expirado"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or (row["expires_at"] is not None and row["expires_at"] < time.time()):
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def purge_expired(self) -> List[str]:
+        """Elimina jobs expirados y retorna los audios que quedaban asociados"""
+        now = time.time()
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT audio_path FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (now,)
+            ).fetchall()
+            self._conn.execute("DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        return [row["audio_path"] for row in rows if row["audio_path"]]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorkerPool:
+    """
+    Pool de workers asyncio que consume la cola de jobs
+
+    Su tamaño (`JOBS_WORKERS`) es independiente de los workers HTTP,
+    de modo que los jobs largos no retienen conexiones de clientes.
+    """
+
+    def __init__(self):
+        self.store: Optional[JobStore] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """Abre el almacén y arranca los workers y la limpieza por TTL"""
+        self.store = await asyncio.to_thread(JobStore, settings.jobs_db_path)
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()  # Procesar jobs pendientes de una ejecución anterior
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(settings.jobs_workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+        logger.info("Pool de jobs iniciado con %d workers", settings.jobs_workers)
+
+    async def stop(self) -> None:
+        """Detiene los workers y devuelve a la cola los jobs que tenían en curso"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.store:
+            await asyncio.to_thread(self.store.release)
+            self.store.close()
+            self.store = None
+
+    async def submit(self, filename: Optional[str], audio_path: str, webhook_url: Optional[str]) -> str:
+        """Encola un audio ya guardado en disco y despierta a los workers"""
+        if self.store is None:
+            raise RuntimeError("El pool de jobs no está iniciado")
+        job_id = await asyncio.to_thread(self.store.create, filename, audio_path, webhook_url)
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        if self.store is None:
+            raise RuntimeError("El pool de jobs no está iniciado")
+        return self.store.get(job_id)
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            try:
+                # Limpiar antes de consultar para no perder un submit concurrente
+                self._wakeup.clear()
+                job = await asyncio.to_thread(self.store.claim_next)
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=settings.jobs_poll_interval_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(job)
+            except Exception:
+                # Un fallo del almacén o del webhook no debe matar al worker (p. ej. "database is locked")
+                logger.exception("Error en el worker de jobs %d", worker_id)
+                await asyncio.sleep(settings.jobs_poll_interval_seconds)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        start_time = time.time()
+        result = None
+        error = None
+        logger.info("Procesando job %s", job_id)
+        # Cada worker es una tarea propia: el uso se reinicia por job
+        usage = track_llm_usage("jobs")
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            ctx = await job_pipeline.run(PipelineContext("jobs", values={"audio_path": job["audio_path"]}))
+            result = {
+                "transcription": ctx["transcription"],
+                "response_text": ctx["response_text"],
+                "audio_base64": ctx["audio_base64"],
+                "processing_time": round(time.time() - start_time, 2)
+            }
+            if settings.llm_usage_in_response:
+                result["usage"] = usage.as_dict()
+        except Exception as e:
+            logger.error("Error en job %s: %s", job_id, e)
+            error = str(e)
+        finally:
+            heartbeat.cancel()
+        # Una cancelación (stop) se propaga sin tocar el audio: el job vuelve a
+        # la cola y quien lo tome aún lo necesita
+
+        finished = await asyncio.to_thread(
+            self.store.finish, job_id, result, error, settings.jobs_result_ttl_seconds
+        )
+        if not finished:
+            # El claim venció y otro worker tomó el job: el audio y el webhook son suyos
+            logger.warning("Job %s re-encolado durante su ejecución: se descarta este resultado", job_id)
+            return
+        cleanup_temp_file(job["audio_path"])
+        if job["webhook_url"]:
+            await self._notify(job["webhook_url"], job_id)
+
+    async def _heartbeat(self, job_id: str) -> None:
+        """Renueva el claim del job mientras se procesa"""
+        while True:
+            await asyncio.sleep(settings.jobs_heartbeat_interval_seconds)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, job_id)
+            except Exception as e:
+                logger.warning("No se pudo renovar el claim del job %s: %s", job_id, e)
+
+    async def _notify(self, webhook_url: str, job_id: str) -> None:
+        """Envía el estado final del job al webhook (firmado), con reintentos"""
+        # La configuración pudo cambiar desde que se encoló el job
+        if not webhook_allowed(webhook_url):
+            logger.warning("Webhook del job %s descartado: host no permitido", job_id)
+            return
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None:
+            # Con un TTL corto el resultado puede haber expirado antes de notificar
+            logger.warning("Webhook del job %s descartado: el job ya expiró", job_id)
+            return
+        body = json.dumps(job_payload(job)).encode("utf-8")
+        async with httpx.AsyncClient(timeout=settings.jobs_webhook_timeout_seconds) as client:
+            for attempt in range(1, 4):
+                timestamp = str(int(time.time()))
+                headers = {
+                    "Content-Type": "application/json",
+                    WEBHOOK_TIMESTAMP_HEADER: timestamp,
+                    WEBHOOK_SIGNATURE_HEADER: sign_webhook(timestamp, body),
+                }
+                try:
+                    response = await client.post(webhook_url, content=body, headers=headers)
+                    if response.status_code < 500:
+                        return
+                except httpx.HTTPError as e:
+                    logger.warning("Webhook del job %s falló (intento %d): %s", job_id, attempt, e)
+                if attempt < 3:
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+        logger.error("No se pudo notificar el job %s a %s", job_id, webhook_url)
+
+    async def _sweeper(self) -> None:
+        # Al menos 1 s entre pasadas: con TTL 0 no se queda girando en sleep(0)
+        interval = max(min(settings.jobs_result_ttl_seconds, 60), 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                # Jobs de procesos que murieron sin terminarlos
+                requeued = await asyncio.to_thread(self.store.requeue_stale)
+                if requeued:
+                    logger.warning("%d jobs re-encolados por claim vencido", requeued)
+                    self._wakeup.set()
+                for audio_path in await asyncio.to_thread(self.store.purge_expired):
+                    cleanup_temp_file(audio_path)
+            except Exception:
+                logger.exception("Error al purgar jobs expirados")
+
+
+def webhook_allowed(webhook_url: str) -> bool:
+    """
+    Indica si se puede notificar a `webhook_url`
+
+    Solo URLs http(s) cuyo host esté en JOBS_WEBHOOK_ALLOWED_HOSTS, y solo
+    con JOBS_WEBHOOK_SECRET configurado. Evita que un cliente haga que el
+    servidor publique resultados en direcciones internas.
+    """
+    if not settings.jobs_webhook_secret:
+        return False
+    try:
+        parts = urlsplit(webhook_url)
+    except ValueError:
+        return False
+    allowed = {host.lower() for host in settings.jobs_webhook_allowed_hosts}
+    return parts.scheme in ("http", "https") and (parts.hostname or "") in allowed
+
+
+def sign_webhook(timestamp: str, body: bytes) -> str:
+    """
+    Firma HMAC-SHA256 de una notificación: "sha256=" + hex(HMAC(secreto, "<timestamp>.<body>"))
+
+    El receptor recalcula la firma con el mismo secreto y rechaza
+    timestamps viejos para evitar reenvíos.
+    """
+    message = timestamp.encode("ascii") + b"." + body
+    digest = hmac.new(settings.jobs_webhook_secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def job_payload(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Representación pública de un job"""
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "expires_at": job["expires_at"],
+        "result": job["result"],
+        "error": job["error"]
+    }
+
+
+# Instancia global del pool (se inicia en el lifespan de la app)
+job_pool = JobWorkerPool()
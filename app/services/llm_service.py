@@ -1,17 +1,41 @@
 """Servicio de procesamiento de lenguaje con LLM"""
 from openai import OpenAI
+import asyncio
+from typing import Any, AsyncIterator, Dict
 from app.config import settings
+from app.services.connection_pool import connection_pool
+from app.services.endpoint_router import Endpoint, llm_router
+from app.services.fast_path import fast_path
+from app.utils.async_utils import iterate_in_thread
+from app.utils.deadline import DeadlineExceeded, stage_timeout
+from app.utils.llm_usage import current_endpoint, record_llm_usage
+from app.utils.single_flight import SingleFlight
+from app.utils.logging_config import payload, SAMPLED
 import logging
 
 logger = logging.getLogger(__name__)
 
+_flight = SingleFlight("llm")
 
-async def process_text(transcription: str) -> str:
+# Prompt del sistema para el voice agent
+SYSTEM_PROMPT = """Eres un asistente de voz amigable y útil. 
+        Responde de manera concisa y natural, como en una conversación hablada.
+        Mantén tus respuestas cortas (máximo 2-3 oraciones) para facilitar la síntesis de voz.
+        Responde siempre en español."""
+
+# Respuesta cuando el LLM no devuelve texto
+FALLBACK_RESPONSE = "Lo siento, no pude generar una respuesta adecuada."
+
+
+async def process_text(transcription: str, skip_fast_path: bool = False) -> str:
     """
     Procesa el texto transcrito y genera una respuesta usando LLM
     
+    Las frases triviales (FAST_PATH_INTENTS) se responden localmente.
+    
     Args:
         transcription: Texto transcrito del usuario
+        skip_fast_path: True si quien llama ya evaluó el fast path sobre el mensaje
         
     Returns:
         str: Respuesta generada por el LLM
@@ -19,42 +43,140 @@ async def process_text(transcription: str) -> str:
     Raises:
         Exception: Si hay error en el procesamiento
     """
+    answer = None if skip_fast_path else fast_path.match(transcription)
+    if answer is not None:
+        return answer.response_text
+    
+    options = llm_request_options()
+    # Prompts idénticos (con el mismo presupuesto) en curso comparten una sola llamada
+    key = f"{settings.llm_model}|{sorted(options.items())}|{transcription}"
+    return await _flight.do(key, lambda: _process_text(transcription, options))
+
+
+def llm_request_options() -> Dict[str, Any]:
+    """
+    Presupuesto de la llamada al LLM para el endpoint de la petición en curso
+    
+    Parte de LLM_MAX_COMPLETION_TOKENS y LLM_REASONING_EFFORT, con los
+    valores de LLM_ENDPOINT_PROFILES[endpoint] por encima.
+    
+    Returns:
+        Dict[str, Any]: Parámetros extra para chat.completions.create
+    """
+    profile = settings.llm_endpoint_profiles.get(current_endpoint(), {})
+    options: Dict[str, Any] = {
+        # Incluye reasoning + respuesta visible
+        "max_completion_tokens": profile.get("max_completion_tokens", settings.llm_max_completion_tokens)
+    }
+    reasoning_effort = profile.get("reasoning_effort", settings.llm_reasoning_effort)
+    if reasoning_effort:
+        options["reasoning_effort"] = reasoning_effort
+    return options
+
+
+def _client(endpoint: Endpoint) -> OpenAI:
+    return OpenAI(
+        api_key=endpoint.api_key or settings.openai_api_key,
+        base_url=endpoint.base_url,
+        http_client=connection_pool.client,
+        max_retries=0  # Reintentos y failover los hace el router
+    )
+
+
+async def _process_text(transcription: str, options: Dict[str, Any]) -> str:
     try:
-        client = OpenAI(api_key=settings.openai_api_key)
-        
-        # Prompt del sistema para el voice agent
-        system_prompt = """Eres un asistente de voz amigable y útil. 
-        Responde de manera concisa y natural, como en una conversación hablada.
-        Mantén tus respuestas cortas (máximo 2-3 oraciones) para facilitar la síntesis de voz.
-        Responde siempre en español."""
-        
-        logger.info(f"Procesando texto con modelo {settings.llm_model}")
-        logger.info(f"Transcripción a procesar: {transcription}")
+        logger.info(
+            "Procesando texto con modelo %s: %s", settings.llm_model, payload(transcription), extra=SAMPLED
+        )
         
         # Usando gpt-5-nano (el más económico)
         # Nota: gpt-5-nano requiere max_completion_tokens (no max_tokens) 
         # y necesita más tokens porque usa reasoning interno
-        response = client.chat.completions.create(
+        response = await llm_router.call(lambda endpoint: asyncio.to_thread(
+            _client(endpoint).chat.completions.create,
             model=settings.llm_model,
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": transcription}
             ],
-            max_completion_tokens=1000,  # Incluye reasoning + respuesta visible
-            timeout=30.0  # Timeout de 30 segundos
-        )
+            timeout=stage_timeout(settings.llm_timeout_seconds),  # Lo que quede del deadline, máx. 30 s
+            **options
+        ))
+        record_llm_usage(response.usage)
         
         response_text = response.choices[0].message.content
         
         # Validar que la respuesta no esté vacía
         if not response_text or response_text.strip() == "":
             logger.warning("LLM devolvió respuesta vacía, usando respuesta por defecto")
-            response_text = "Lo siento, no pude generar una respuesta adecuada."
+            response_text = FALLBACK_RESPONSE
         
-        logger.info(f"Respuesta generada: {response_text[:100]}...")
+        logger.info("Respuesta generada: %s", payload(response_text), extra=SAMPLED)
         
         return response_text
         
+    except DeadlineExceeded:
+        raise
+        
+    except Exception as e:
+        logger.error("Error en procesamiento LLM: %s", e)
+        raise Exception(f"Error al procesar texto: {str(e)}")
+
+
+async def process_text_stream(transcription: str, skip_fast_path: bool = False) -> AsyncIterator[str]:
+    """
+    Genera la respuesta del LLM emitiendo los tokens a medida que llegan
+    
+    Args:
+        transcription: Texto transcrito del usuario
+        skip_fast_path: True si quien llama ya evaluó el fast path sobre el mensaje
+        
+    Yields:
+        str: Fragmentos (deltas) de la respuesta
+        
+    Raises:
+        Exception: Si hay error en el procesamiento
+    """
+    answer = None if skip_fast_path else fast_path.match(transcription)
+    if answer is not None:
+        yield answer.response_text
+        return
+    
+    try:
+        logger.info("Procesando texto en streaming con modelo %s", settings.llm_model, extra=SAMPLED)
+        
+        options = llm_request_options()
+        stream = await llm_router.call(lambda endpoint: asyncio.to_thread(
+            _client(endpoint).chat.completions.create,
+            model=settings.llm_model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": transcription}
+            ],
+            timeout=stage_timeout(settings.llm_timeout_seconds),
+            stream=True,
+            stream_options={"include_usage": True},
+            **options
+        ))
+        
+        produced = False
+        async for chunk in iterate_in_thread(stream):
+            if not chunk.choices:
+                # El último chunk trae solo el uso de tokens
+                record_llm_usage(getattr(chunk, "usage", None))
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                produced = True
+                yield delta
+        
+        if not produced:
+            logger.warning("LLM devolvió respuesta vacía, usando respuesta por defecto")
+            yield FALLBACK_RESPONSE
+        
+    except DeadlineExceeded:
+        raise
+        
     except Exception as e:
-        logger.error(f"Error en procesamiento LLM: {str(e)}")
+        logger.error("Error en procesamiento LLM: %s", e)
         raise Exception(f"Error al procesar texto: {str(e)}")
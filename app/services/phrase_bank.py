@@ -0,0 +1,117 @@
+"""Banco de frases pre-sintetizadas (fallback, errores y fillers)"""
+import asyncio
+import base64
+import hashlib
+import logging
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.config import settings
+from app.services.fast_path import fast_path
+from app.services.llm_service import FALLBACK_RESPONSE
+
+logger = logging.getLogger(__name__)
+
+
+class PhraseBank:
+    """
+    Audio en memoria para frases fijas que se sirven sin llamar a TTS
+
+    Las frases se sintetizan una vez al arrancar (o se leen de disco si ya
+    existen para la misma voz y modelo) y quedan indexadas por clave y por texto.
+    La carga corre en segundo plano: cada frase se sirve desde que está lista
+    y, mientras tanto, se usa TTS bajo demanda.
+    """
+
+    def __init__(self):
+        self._by_key: Dict[str, bytes] = {}
+        self._by_text: Dict[str, bytes] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.ready = False
+
+    async def start(self, synthesize: Callable[[str], Awaitable[str]]) -> None:
+        """Lanza la carga en segundo plano, limitada a PHRASE_BANK_LOAD_TIMEOUT_SECONDS"""
+        self.ready = False
+        self._task = asyncio.create_task(self._load_in_background(synthesize))
+
+    async def stop(self) -> None:
+        """Cancela la carga si sigue en curso"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _load_in_background(self, synthesize: Callable[[str], Awaitable[str]]) -> None:
+        try:
+            await asyncio.wait_for(self.load(synthesize), timeout=settings.phrase_bank_load_timeout_seconds)
+        except asyncio.TimeoutError:
+            # Las frases ya preparadas se conservan; el resto sigue usando TTS bajo demanda
+            logger.warning(
+                "Banco de frases incompleto tras %.0f s: %d frases listas",
+                settings.phrase_bank_load_timeout_seconds, len(self._by_key)
+            )
+        except Exception as e:
+            logger.warning("No se pudo cargar el banco de frases: %s", e)
+        self.ready = True
+
+    async def load(self, synthesize: Callable[[str], Awaitable[str]]) -> None:
+        """
+        Carga o sintetiza todas las frases configuradas
+
+        Args:
+            synthesize: Función TTS que retorna el audio en base64
+        """
+        directory = Path(settings.phrase_bank_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        # La respuesta por defecto del LLM y las del fast path siempre forman parte del banco
+        phrases = {"fallback": FALLBACK_RESPONSE, **settings.phrase_bank_phrases}
+        for intent, text in fast_path.responses().items():
+            phrases[f"fast_path.{intent}"] = text
+        await asyncio.gather(*(
+            self._prepare(directory, key, text, synthesize) for key, text in phrases.items()
+        ))
+        logger.info("Banco de frases listo: %d/%d frases", len(self._by_key), len(phrases))
+
+    async def _prepare(
+        self,
+        directory: Path,
+        key: str,
+        text: str,
+        synthesize: Callable[[str], Awaitable[str]]
+    ) -> None:
+        path = directory / f"{key}-{_fingerprint(text)}.mp3"
+        try:
+            if path.exists():
+                audio_bytes = await asyncio.to_thread(path.read_bytes)
+            else:
+                audio_bytes = base64.b64decode(await synthesize(text))
+                await asyncio.to_thread(path.write_bytes, audio_bytes)
+        except Exception as e:
+            # Sin la frase se sigue usando TTS bajo demanda
+            logger.warning("No se pudo preparar la frase '%s': %s", key, e)
+            return
+        self._by_key[key] = audio_bytes
+        self._by_text[text] = audio_bytes
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Audio MP3 de una frase por su clave (p. ej. 'error', 'thinking')"""
+        return self._by_key.get(key)
+
+    def get_base64(self, key: str) -> Optional[str]:
+        audio_bytes = self.get(key)
+        return base64.b64encode(audio_bytes).decode("utf-8") if audio_bytes is not None else None
+
+    def lookup(self, text: str) -> Optional[bytes]:
+        """Audio MP3 si el texto coincide exactamente con una frase del banco"""
+        return self._by_text.get(text)
+
+
+def _fingerprint(text: str) -> str:
+    """Identifica el audio de una frase para la voz y modelo configurados"""
+    key = f"{settings.tts_model}|{settings.tts_voice}|{text}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+
+# Instancia global (se carga en segundo plano desde el lifespan de la app)
+phrase_bank = PhraseBank()
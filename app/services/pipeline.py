@@ -0,0 +1,201 @@
+"""Motor del pipeline de voz: etapas declaradas con hooks comunes"""
+import asyncio
+import functools
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, UploadFile
+
+from app.utils.audio_utils import cleanup_temp_file
+from app.utils.deadline import start_deadline
+from app.utils.llm_usage import TokenUsage, track_llm_usage
+from app.utils.logging_config import SAMPLED
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+Event = Tuple[str, Dict[str, Any]]
+
+# Eventos en cola entre las etapas y quien los consume (contrapresión)
+EVENT_BUFFER = 16
+
+
+@dataclass
+class PipelineContext:
+    """
+    Estado de una ejecución del pipeline
+
+    Cada etapa lee sus entradas de `values` y deja ahí su salida. `audio_path`
+    es el archivo temporal de la petición: el motor lo elimina al terminar.
+    """
+    endpoint: str
+    upload: Optional[UploadFile] = None
+    values: Dict[str, Any] = field(default_factory=dict)
+    timings: Dict[str, float] = field(default_factory=dict)
+    usage: Optional[TokenUsage] = None
+    started_at: float = field(default_factory=time.time)
+    _emit: Optional[Callable[[Event], Awaitable[None]]] = field(default=None, repr=False)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.values[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.values.get(key, default)
+
+    @property
+    def audio_path(self) -> Optional[str]:
+        return self.values.get("audio_path")
+
+    def elapsed(self) -> float:
+        return round(time.time() - self.started_at, 2)
+
+    async def emit(self, event: str, data: Dict[str, Any]) -> None:
+        """Publica un evento intermedio (solo tiene efecto con `Pipeline.events`)"""
+        if self._emit is not None:
+            await self._emit((event, data))
+
+
+StageCall = Callable[[PipelineContext], Awaitable[Any]]
+# Un hook envuelve la ejecución de una etapa: hook(stage, ctx, proceed) -> resultado
+Hook = Callable[["Stage", PipelineContext, Callable[[], Awaitable[Any]]], Awaitable[Any]]
+
+
+@dataclass
+class Stage:
+    """
+    Una etapa del pipeline
+
+    `run` recibe el contexto y retorna la salida, que se guarda en
+    `ctx.values[output]`. Una etapa en streaming publica sus resultados
+    parciales con `ctx.emit` mientras corre.
+    """
+    name: str
+    run: StageCall
+    output: Optional[str] = None
+    hooks: Sequence[Hook] = ()
+
+
+class Pipeline:
+    """
+    Secuencia de etapas con hooks compartidos
+
+    Los hooks del pipeline envuelven cada etapa (el primero es el más
+    externo) y después van los propios de la etapa. Por defecto se mide el
+    tiempo de cada etapa (`timed`).
+    """
+
+    def __init__(self, name: str, stages: Sequence[Stage], hooks: Optional[Sequence[Hook]] = None):
+        self.name = name
+        self.stages = list(stages)
+        self.hooks = list(hooks) if hooks is not None else [timed]
+
+    async def run(self, ctx: PipelineContext) -> PipelineContext:
+        """Ejecuta las etapas en orden; los errores se propagan tal cual"""
+        for stage in self.stages:
+            result = await self._call(stage, ctx)
+            if stage.output:
+                ctx.values[stage.output] = result
+        return ctx
+
+    async def events(self, ctx: PipelineContext) -> AsyncIterator[Event]:
+        """
+        Ejecuta las etapas en una tarea propia y emite sus eventos a medida que llegan
+
+        Las etapas avanzan mientras el consumidor envía los eventos (hasta
+        EVENT_BUFFER en cola). Si el consumidor se detiene, la tarea se
+        cancela.
+
+        Yields:
+            Event: (evento, datos) publicados con `ctx.emit`
+
+        Raises:
+            Exception: El error de la etapa que falló, tras emitir los eventos previos
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_BUFFER)
+        ctx._emit = queue.put
+        runner = asyncio.ensure_future(self.run(ctx))
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter, runner}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    yield getter.result()
+                    continue
+                getter.cancel()
+                while not queue.empty():
+                    yield queue.get_nowait()
+                runner.result()
+                return
+        finally:
+            ctx._emit = None
+            if not runner.done():
+                runner.cancel()
+                await asyncio.gather(runner, return_exceptions=True)
+
+    async def handle(self, ctx: PipelineContext, error_detail: str) -> PipelineContext:
+        """
+        Ejecuta el pipeline para una petición HTTP
+
+        Marca el endpoint para el uso de tokens y el deadline, traduce los
+        errores a HTTPException y elimina el archivo temporal.
+
+        Args:
+            ctx: Contexto con el endpoint y el upload
+            error_detail: Prefijo del detalle del 500 ("Error en el procesamiento")
+
+        Returns:
+            PipelineContext: Contexto con las salidas de todas las etapas
+
+        Raises:
+            HTTPException: Las de validación/deadline tal cual; cualquier otro error como 500
+        """
+        begin_request(ctx)
+        try:
+            return await self.run(ctx)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error("Error en pipeline %s: %s", self.name, e, exc_info=True)
+            raise HTTPException(status_code=500, detail=f"{error_detail}: {str(e)}")
+        finally:
+            if ctx.audio_path:
+                cleanup_temp_file(ctx.audio_path)
+
+    async def _call(self, stage: Stage, ctx: PipelineContext) -> Any:
+        call: Callable[[], Awaitable[Any]] = functools.partial(stage.run, ctx)
+        for hook in reversed([*self.hooks, *stage.hooks]):
+            call = functools.partial(hook, stage, ctx, call)
+        return await call()
+
+
+def begin_request(ctx: PipelineContext) -> None:
+    """Asocia la petición en curso al endpoint (uso de tokens y deadline)"""
+    ctx.usage = track_llm_usage(ctx.endpoint)
+    start_deadline(ctx.endpoint)
+
+
+async def timed(stage: Stage, ctx: PipelineContext, proceed: Callable[[], Awaitable[Any]]) -> Any:
+    """Hook: guarda la duración de la etapa en `ctx.timings` y en la métrica `pipeline.<etapa>.last_ms`"""
+    start = time.time()
+    logger.info("Etapa %s (%s)", stage.name, ctx.endpoint, extra=SAMPLED)
+    try:
+        return await proceed()
+    finally:
+        seconds = time.time() - start
+        ctx.timings[stage.name] = round(seconds, 3)
+        metrics.set_gauge(f"pipeline.{stage.name}.last_ms", round(seconds * 1000, 1))
+
+
+def limited(slot: str) -> Hook:
+    """
+    Hook: la etapa corre dentro del semáforo guardado en `ctx.values[slot]`
+
+    El semáforo lo crea quien arma el contexto, así que el límite puede ser
+    por petición (p. ej. BATCH_MAX_CONCURRENCY dentro de un batch).
+    """
+    async def hook(stage: Stage, ctx: PipelineContext, proceed: Callable[[], Awaitable[Any]]) -> Any:
+        async with ctx[slot]:
+            return await proceed()
+    return hook
@@ -1,11 +1,22 @@
 """Servicio de TTS (Text to Speech)"""
 from openai import OpenAI
+import asyncio
+from typing import AsyncIterator
 from app.config import settings
+from app.services.connection_pool import connection_pool
+from app.services.endpoint_router import Endpoint, tts_router
+from app.services.phrase_bank import phrase_bank
+from app.utils.async_utils import iterate_in_thread
+from app.utils.deadline import DeadlineExceeded, stage_timeout
+from app.utils.single_flight import SingleFlight
+from app.utils.logging_config import SAMPLED
 import base64
 import logging
 
 logger = logging.getLogger(__name__)
 
+_flight = SingleFlight("tts")
+
 
 async def generate_speech(text: str) -> str:
     """
@@ -20,27 +31,97 @@ async def generate_speech(text: str) -> str:
     Raises:
         Exception: Si hay error en la generación
     """
+    # Frases fijas (fallback, errores) ya sintetizadas: sin llamada a TTS
+    cached = phrase_bank.lookup(text)
+    if cached is not None:
+        return base64.b64encode(cached).decode('utf-8')
+    
+    # Textos idénticos en curso comparten una sola síntesis (single-flight)
+    key = f"{settings.tts_model}|{settings.tts_voice}|{text}"
+    return await _flight.do(key, lambda: _generate_speech(text))
+
+
+def _client(endpoint: Endpoint) -> OpenAI:
+    return OpenAI(
+        api_key=endpoint.api_key or settings.openai_api_key,
+        base_url=endpoint.base_url,
+        http_client=connection_pool.client,
+        max_retries=0  # Reintentos y failover los hace el router
+    )
+
+
+async def _generate_speech(text: str) -> str:
     try:
-        client = OpenAI(api_key=settings.openai_api_key)
-        
-        logger.info(f"Generando audio con modelo {settings.tts_model}")
+        logger.info("Generando audio con modelo %s", settings.tts_model, extra=SAMPLED)
         
         # Usando gpt-4o-mini-tts (el más económico)
-        response = client.audio.speech.create(
+        response = await tts_router.call(lambda endpoint: asyncio.to_thread(
+            _client(endpoint).audio.speech.create,
             model=settings.tts_model,
             voice=settings.tts_voice,  # Voces: alloy, echo, fable, onyx, nova, shimmer
             input=text,
-            response_format="mp3"
-        )
+            response_format="mp3",
+            timeout=stage_timeout(settings.tts_timeout_seconds)
+        ))
         
         # Convertir audio a base64 para transmitir en JSON
         audio_bytes = response.content
         audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
         
-        logger.info(f"Audio generado exitosamente ({len(audio_bytes)} bytes)")
+        logger.info("Audio generado exitosamente (%d bytes)", len(audio_bytes), extra=SAMPLED)
         
         return audio_base64
         
+    except DeadlineExceeded:
+        raise
+        
+    except Exception as e:
+        logger.error("Error en generación TTS: %s", e)
+        raise Exception(f"Error al generar audio: {str(e)}")
+
+
+async def generate_speech_stream(text: str) -> AsyncIterator[bytes]:
+    """
+    Genera audio a partir de texto emitiendo los bytes MP3 a medida que llegan
+    
+    Args:
+        text: Texto a convertir en voz
+        
+    Yields:
+        bytes: Fragmentos consecutivos del MP3
+        
+    Raises:
+        Exception: Si hay error en la generación
+    """
+    cached = phrase_bank.lookup(text)
+    if cached is not None:
+        yield cached
+        return
+    
+    try:
+        logger.info("Generando audio en streaming con modelo %s", settings.tts_model, extra=SAMPLED)
+        
+        async def open_stream(endpoint: Endpoint):
+            context = _client(endpoint).audio.speech.with_streaming_response.create(
+                model=settings.tts_model,
+                voice=settings.tts_voice,
+                input=text,
+                response_format="mp3",
+                timeout=stage_timeout(settings.tts_timeout_seconds)
+            )
+            return context, await asyncio.to_thread(context.__enter__)
+        
+        # El failover solo aplica hasta recibir la respuesta, no a mitad del stream
+        stream_context, response = await tts_router.call(open_stream)
+        try:
+            async for chunk in iterate_in_thread(response.iter_bytes(settings.tts_stream_chunk_bytes)):
+                yield chunk
+        finally:
+            await asyncio.to_thread(stream_context.__exit__, None, None, None)
+        
+    except DeadlineExceeded:
+        raise
+        
     except Exception as e:
-        logger.error(f"Error en generación TTS: {str(e)}")
+        logger.error("Error en generación TTS: %s", e)
         raise Exception(f"Error al generar audio: {str(e)}")
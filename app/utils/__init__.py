@@ -1,4 +1,12 @@
 """Utilidades"""
 from .audio_utils import validate_audio_file, save_temp_file, cleanup_temp_file
+from .audio_metadata import AudioInfo, probe_audio, sniff_audio_format
 
-__all__ = ["validate_audio_file", "save_temp_file", "cleanup_temp_file"]
+__all__ = [
+    "validate_audio_file",
+    "save_temp_file",
+    "cleanup_temp_file",
+    "AudioInfo",
+    "probe_audio",
+    "sniff_audio_format",
+]
@@ -0,0 +1,30 @@
+"""Autenticación de los endpoints y headers de administración"""
+import hmac
+from typing import Optional, Union
+
+from fastapi import Header, HTTPException
+
+from app.config import settings
+
+
+def is_admin_token(value: Optional[Union[str, bytes]]) -> bool:
+    """Compara en tiempo constante con ADMIN_TOKEN (sin token configurado: nunca)"""
+    if not settings.admin_token or not value:
+        return False
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return hmac.compare_digest(value, settings.admin_token.encode("utf-8"))
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Dependencia de FastAPI para rutas /admin
+
+    Raises:
+        HTTPException: 404 si no hay ADMIN_TOKEN (la administración queda
+            oculta), 401 si el header X-Admin-Token no coincide
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=401, detail="Token de administración inválido")
@@ -0,0 +1,26 @@
+"""Utilidades para integrar código bloqueante con asyncio"""
+import asyncio
+from typing import AsyncIterator, Iterable, TypeVar
+
+T = TypeVar("T")
+
+_END = object()
+
+
+async def iterate_in_thread(iterable: Iterable[T]) -> AsyncIterator[T]:
+    """
+    Recorre un iterador bloqueante (p. ej. un stream del cliente OpenAI)
+    sin bloquear el event loop: cada `next()` se ejecuta en un hilo
+
+    Args:
+        iterable: Iterable síncrono
+
+    Yields:
+        T: Cada elemento en el mismo orden
+    """
+    iterator = iter(iterable)
+    while True:
+        item = await asyncio.to_thread(next, iterator, _END)
+        if item is _END:
+            return
+        yield item
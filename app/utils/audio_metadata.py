@@ -0,0 +1,387 @@
+"""Lectura de metadatos de audio desde las cabeceras del contenedor (sin decodificar)"""
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+
+# Bytes necesarios para identificar el contenedor por su firma (magic bytes)
+SNIFF_HEADER_BYTES = 16
+
+# Máximo de bytes leídos al buscar cabeceras al inicio o al final del archivo
+_HEAD_WINDOW = 64 * 1024
+_TAIL_WINDOW = 64 * 1024
+
+
+@dataclass(frozen=True)
+class AudioInfo:
+    """Metadatos básicos de un archivo de audio"""
+    format: str
+    duration: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+
+
+def sniff_audio_format(header: bytes) -> Optional[str]:
+    """
+    Identifica el contenedor de audio a partir de sus primeros bytes
+
+    Args:
+        header: Primeros bytes del archivo (al menos SNIFF_HEADER_BYTES)
+
+    Returns:
+        Optional[str]: Extensión canónica (".wav", ".ogg", ".webm", ".mp3", ".m4a")
+        o None si la firma no corresponde a un formato de audio conocido
+    """
+    if len(header) >= 12 and header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return ".wav"
+    if header[:4] == b"OggS":
+        return ".ogg"
+    if header[:4] == b"\x1a\x45\xdf\xa3":  # EBML (WebM/Matroska)
+        return ".webm"
+    if header[:3] == b"ID3":
+        return ".mp3"
+    if len(header) >= 2 and header[0] == 0xFF and (header[1] & 0xE0) == 0xE0:
+        # Frame sync MPEG; la capa 00 es reservada (ADTS/AAC), no MP3
+        if (header[1] >> 1) & 0x03:
+            return ".mp3"
+    if len(header) >= 8 and header[4:8] == b"ftyp":
+        return ".m4a"
+    return None
+
+
+def probe_audio(file: BinaryIO) -> Optional[AudioInfo]:
+    """
+    Obtiene duración, sample rate y canales leyendo solo las cabeceras
+
+    Args:
+        file: Archivo binario con soporte de seek (se restaura su posición)
+
+    Returns:
+        Optional[AudioInfo]: Metadatos encontrados, o None si el formato no
+        se reconoce. Los campos que el contenedor no declara quedan en None.
+    """
+    position = file.tell()
+    try:
+        file.seek(0, 2)
+        size = file.tell()
+        file.seek(0)
+        audio_format = sniff_audio_format(file.read(SNIFF_HEADER_BYTES))
+        if audio_format is None:
+            return None
+        try:
+            return _PARSERS[audio_format](file, size)
+        except (struct.error, ValueError, IndexError):
+            # Cabecera truncada o corrupta: se conoce el formato pero no los datos
+            return AudioInfo(format=audio_format)
+    finally:
+        file.seek(position)
+
+
+# --- WAV ---------------------------------------------------------------------
+
+def _probe_wav(file: BinaryIO, size: int) -> AudioInfo:
+    file.seek(12)
+    channels = sample_rate = byte_rate = None
+    duration = None
+    while True:
+        chunk = file.read(8)
+        if len(chunk) < 8:
+            break
+        chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+        if chunk_id == b"fmt ":
+            body = file.read(16)
+            _, channels, sample_rate, byte_rate = struct.unpack("<HHII", body[:12])
+            file.seek(chunk_size - len(body) + (chunk_size & 1), 1)
+        elif chunk_id == b"data":
+            # Grabaciones en streaming dejan el tamaño en 0 o 0xFFFFFFFF
+            available = size - file.tell()
+            data_size = chunk_size if 0 < chunk_size <= available else available
+            if byte_rate:
+                duration = data_size / byte_rate
+            break
+        else:
+            file.seek(chunk_size + (chunk_size & 1), 1)
+    return AudioInfo(format=".wav", duration=duration, sample_rate=sample_rate, channels=channels)
+
+
+# --- OGG (Opus / Vorbis) -----------------------------------------------------
+
+def _probe_ogg(file: BinaryIO, size: int) -> AudioInfo:
+    file.seek(0)
+    page = file.read(_HEAD_WINDOW)
+    segments = page[26]
+    packet = page[27 + segments:27 + segments + 32]
+    serial = page[14:18]
+
+    if packet.startswith(b"OpusHead"):
+        channels = packet[9]
+        pre_skip, input_rate = struct.unpack("<HI", packet[10:16])
+        sample_rate = input_rate or 48000
+        granule_rate, offset = 48000, pre_skip  # Opus siempre decodifica a 48 kHz
+    elif packet.startswith(b"\x01vorbis"):
+        channels = packet[11]
+        sample_rate = struct.unpack("<I", packet[12:16])[0]
+        granule_rate, offset = sample_rate, 0
+    else:
+        return AudioInfo(format=".ogg")
+
+    duration = None
+    granule = _last_ogg_granule(file, size, serial)
+    if granule is not None and granule_rate:
+        duration = max(granule - offset, 0) / granule_rate
+    return AudioInfo(format=".ogg", duration=duration, sample_rate=sample_rate, channels=channels)
+
+
+def _last_ogg_granule(file: BinaryIO, size: int, serial: bytes) -> Optional[int]:
+    """Granule position de la última página del stream (posición final en muestras)"""
+    start = max(size - _TAIL_WINDOW, 0)
+    file.seek(start)
+    tail = file.read(size - start)
+    index = tail.rfind(b"OggS")
+    while index != -1:
+        if len(tail) >= index + 18 and tail[index + 14:index + 18] == serial:
+            granule = struct.unpack("<q", tail[index + 6:index + 14])[0]
+            if granule >= 0:
+                return granule
+        index = tail.rfind(b"OggS", 0, index)
+    return None
+
+
+# --- WebM (EBML / Matroska) --------------------------------------------------
+
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_TRACKS = 0x1654AE6B
+_EBML_TRACK_ENTRY = 0xAE
+_EBML_AUDIO = 0xE1
+_EBML_CLUSTER = 0x1F43B675
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+_EBML_SAMPLING_FREQUENCY = 0xB5
+_EBML_CHANNELS = 0x9F
+
+
+def _read_vint(buf: bytes, pos: int, keep_marker: bool = False) -> Tuple[int, int, bool]:
+    """Lee un entero de longitud variable EBML: (valor, longitud, tamaño_desconocido)"""
+    first = buf[pos]
+    length, mask = 1, 0x80
+    while length <= 8 and not first & mask:
+        length += 1
+        mask >>= 1
+    if length > 8:
+        raise ValueError("VINT EBML inválido")
+    value = first if keep_marker else first & (mask - 1)
+    for byte in buf[pos + 1:pos + length]:
+        value = (value << 8) | byte
+    unknown = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, length, unknown
+
+
+def _ebml_elements(buf: bytes, start: int, end: int) -> Iterator[Tuple[int, int, int]]:
+    """Itera elementos hijos como (id, inicio_datos, fin_datos)"""
+    pos = start
+    while pos < end:
+        element_id, id_length, _ = _read_vint(buf, pos, keep_marker=True)
+        size, size_length, unknown = _read_vint(buf, pos + id_length)
+        data_start = pos + id_length + size_length
+        data_end = end if unknown else min(data_start + size, end)
+        yield element_id, data_start, data_end
+        pos = data_end
+
+
+def _ebml_float(data: bytes) -> float:
+    return struct.unpack(">f" if len(data) == 4 else ">d", data)[0]
+
+
+def _probe_webm(file: BinaryIO, size: int) -> AudioInfo:
+    file.seek(0)
+    buf = file.read(_HEAD_WINDOW)
+    scale = 1_000_000
+    raw_duration = sample_rate = channels = None
+
+    for element_id, start, end in _ebml_elements(buf, 0, len(buf)):
+        if element_id != _EBML_SEGMENT:
+            continue
+        for child_id, child_start, child_end in _ebml_elements(buf, start, end):
+            if child_id == _EBML_CLUSTER:
+                break  # Las cabeceras siempre preceden a los clusters
+            if child_id == _EBML_INFO:
+                for info_id, info_start, info_end in _ebml_elements(buf, child_start, child_end):
+                    if info_id == _EBML_TIMECODE_SCALE:
+                        scale = int.from_bytes(buf[info_start:info_end], "big")
+                    elif info_id == _EBML_DURATION:
+                        raw_duration = _ebml_float(buf[info_start:info_end])
+            elif child_id == _EBML_TRACKS and sample_rate is None:
+                sample_rate, channels = _webm_audio_track(buf, child_start, child_end)
+        break
+
+    # MediaRecorder no escribe Duration en WebM grabados en vivo
+    duration = raw_duration * scale / 1e9 if raw_duration is not None else None
+    return AudioInfo(format=".webm", duration=duration, sample_rate=sample_rate, channels=channels)
+
+
+def _webm_audio_track(buf: bytes, start: int, end: int) -> Tuple[Optional[int], Optional[int]]:
+    for entry_id, entry_start, entry_end in _ebml_elements(buf, start, end):
+        if entry_id != _EBML_TRACK_ENTRY:
+            continue
+        for field_id, field_start, field_end in _ebml_elements(buf, entry_start, entry_end):
+            if field_id != _EBML_AUDIO:
+                continue
+            sample_rate = None
+            channels = 1  # Valor por defecto de Matroska
+            for audio_id, audio_start, audio_end in _ebml_elements(buf, field_start, field_end):
+                if audio_id == _EBML_SAMPLING_FREQUENCY:
+                    sample_rate = int(_ebml_float(buf[audio_start:audio_end]))
+                elif audio_id == _EBML_CHANNELS:
+                    channels = int.from_bytes(buf[audio_start:audio_end], "big")
+            return sample_rate, channels
+    return None, None
+
+
+# --- MP3 ---------------------------------------------------------------------
+
+_MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _parse_mp3_frame_header(header: bytes) -> Optional[Tuple[int, int, int, int, int]]:
+    """Devuelve (versión, capa, bitrate kbps, sample rate, canales) o None"""
+    if header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return None
+    version_bits = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version_bits == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    version = 1 if version_bits == 3 else 2
+    bitrate = _MP3_BITRATES[(version, layer)][bitrate_index]
+    sample_rate = _MP3_SAMPLE_RATES[version_bits][rate_index]
+    channels = 1 if (header[3] >> 6) == 3 else 2
+    return version, layer, bitrate, sample_rate, channels
+
+
+def _probe_mp3(file: BinaryIO, size: int) -> AudioInfo:
+    file.seek(0)
+    head = file.read(10)
+    audio_start = 0
+    if head[:3] == b"ID3":
+        tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        audio_start = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+
+    file.seek(audio_start)
+    buf = file.read(4096)
+    for index in range(len(buf) - 3):
+        frame = _parse_mp3_frame_header(buf[index:index + 4])
+        if frame is not None:
+            break
+    else:
+        return AudioInfo(format=".mp3")
+
+    version, layer, bitrate, sample_rate, channels = frame
+    samples_per_frame = 384 if layer == 1 else (1152 if version == 1 or layer == 2 else 576)
+    frame_start = audio_start + index
+
+    # Cabecera VBR (Xing/Info tras la side info, o VBRI a offset fijo)
+    side_info = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+    xing = buf[index + 4 + side_info:index + 4 + side_info + 12]
+    vbri = buf[index + 36:index + 54]
+    frames = None
+    if xing[:4] in (b"Xing", b"Info") and struct.unpack(">I", xing[4:8])[0] & 0x01:
+        frames = struct.unpack(">I", xing[8:12])[0]
+    elif vbri[:4] == b"VBRI":
+        frames = struct.unpack(">I", vbri[14:18])[0]
+
+    if frames:
+        duration = frames * samples_per_frame / sample_rate
+    else:
+        audio_end = size
+        if size >= 128:
+            file.seek(size - 128)
+            if file.read(3) == b"TAG":
+                audio_end -= 128
+        duration = (audio_end - frame_start) * 8 / (bitrate * 1000)
+    return AudioInfo(format=".mp3", duration=duration, sample_rate=sample_rate, channels=channels)
+
+
+# --- M4A (ISO BMFF) ----------------------------------------------------------
+
+def _mp4_boxes(file: BinaryIO, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Itera boxes como (tipo, inicio_datos, fin_box) sin leer su contenido"""
+    pos = start
+    while pos + 8 <= end:
+        file.seek(pos)
+        size, box_type = struct.unpack(">I4s", file.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", file.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield box_type, pos + header, min(pos + size, end)
+        pos += size
+
+
+def _mp4_child(file: BinaryIO, start: int, end: int, box_type: bytes) -> Optional[Tuple[int, int]]:
+    for child_type, child_start, child_end in _mp4_boxes(file, start, end):
+        if child_type == box_type:
+            return child_start, child_end
+    return None
+
+
+def _probe_m4a(file: BinaryIO, size: int) -> AudioInfo:
+    moov = _mp4_child(file, 0, size, b"moov")
+    if moov is None:
+        return AudioInfo(format=".m4a")
+
+    duration = None
+    mvhd = _mp4_child(file, *moov, b"mvhd")
+    if mvhd is not None:
+        file.seek(mvhd[0])
+        version = file.read(4)[0]
+        if version == 1:
+            timescale, length = struct.unpack(">16xIQ", file.read(28))
+        else:
+            timescale, length = struct.unpack(">8xII", file.read(16))
+        if timescale:
+            duration = length / timescale
+
+    sample_rate = channels = None
+    for box_type, trak_start, trak_end in _mp4_boxes(file, *moov):
+        if box_type != b"trak":
+            continue
+        mdia = _mp4_child(file, trak_start, trak_end, b"mdia")
+        hdlr = mdia and _mp4_child(file, *mdia, b"hdlr")
+        if hdlr is None:
+            continue
+        file.seek(hdlr[0] + 8)
+        if file.read(4) != b"soun":
+            continue
+        minf = _mp4_child(file, *mdia, b"minf")
+        stbl = minf and _mp4_child(file, *minf, b"stbl")
+        stsd = stbl and _mp4_child(file, *stbl, b"stsd")
+        if stsd is not None:
+            # Entrada AudioSampleEntry: canales en +24 y sample rate 16.16 en +32
+            file.seek(stsd[0] + 8)
+            entry = file.read(36)
+            channels = struct.unpack(">H", entry[24:26])[0]
+            sample_rate = struct.unpack(">I", entry[32:36])[0] >> 16
+        break
+    return AudioInfo(format=".m4a", duration=duration, sample_rate=sample_rate, channels=channels)
+
+
+_PARSERS: Dict[str, Callable[[BinaryIO, int], AudioInfo]] = {
+    ".wav": _probe_wav,
+    ".ogg": _probe_ogg,
+    ".webm": _probe_webm,
+    ".mp3": _probe_mp3,
+    ".m4a": _probe_m4a,
+}
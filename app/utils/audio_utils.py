@@ -3,29 +3,31 @@ import os
 import tempfile
 import logging
 from pathlib import Path
+from typing import Optional
 from fastapi import UploadFile, HTTPException
 from app.config import settings
+from app.utils.audio_metadata import AudioInfo, probe_audio, sniff_audio_format, SNIFF_HEADER_BYTES
+from app.utils.rate_limit import charge_audio_seconds
+from app.utils.logging_config import SAMPLED
 
 logger = logging.getLogger(__name__)
 
-
-async def validate_audio_file(file: UploadFile) -> None:
+async def validate_audio_file(file: UploadFile) -> Optional[AudioInfo]:
     """
     Valida el archivo de audio subido
     
     Args:
         file: Archivo subido por el usuario
         
+    Returns:
+        Optional[AudioInfo]: Duración, sample rate y canales leídos de la cabecera
+        
     Raises:
         HTTPException: Si el archivo no es válido
     """
-    # Validar extensión
-    file_ext = Path(file.filename).suffix.lower()
-    if file_ext not in settings.allowed_formats_list:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Formato no permitido. Use: {', '.join(settings.allowed_formats_list)}"
-        )
+    # Validar formato por contenido (magic bytes), no por extensión
+    file.file.seek(0)
+    header = file.file.read(SNIFF_HEADER_BYTES)
     
     # Validar tamaño
     file.file.seek(0, 2)  # Ir al final del archivo
@@ -44,7 +46,30 @@ async def validate_audio_file(file: UploadFile) -> None:
             detail="El archivo está vacío"
         )
     
-    logger.info(f"Archivo validado: {file.filename} ({file_size} bytes)")
+    detected_format = sniff_audio_format(header)
+    if detected_format not in settings.allowed_formats_list:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato no permitido. Use: {', '.join(settings.allowed_formats_list)}"
+        )
+    
+    # Validar duración leyendo solo la cabecera del contenedor
+    info = probe_audio(file.file)
+    max_duration = settings.max_audio_duration_seconds
+    if max_duration and info and info.duration and info.duration > max_duration:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Audio muy largo. Máximo: {max_duration} segundos"
+        )
+    
+    # Cuota de segundos de audio del cliente (429 si está agotada)
+    await charge_audio_seconds(info.duration if info else None, file_size)
+    
+    logger.info(
+        "Archivo validado: %s (%d bytes, %ss)", file.filename, file_size, info.duration if info else None,
+        extra=SAMPLED
+    )
+    return info
 
 
 async def save_temp_file(file: UploadFile) -> str:
@@ -62,8 +87,11 @@ async def save_temp_file(file: UploadFile) -> str:
         temp_dir = Path("temp_audio")
         temp_dir.mkdir(exist_ok=True)
         
-        # Crear archivo temporal con extensión apropiada
-        file_ext = Path(file.filename).suffix
+        content = await file.read()
+        
+        # Crear archivo temporal con la extensión del contenido real
+        # (OpenAI detecta el formato por el nombre del archivo)
+        file_ext = sniff_audio_format(content[:SNIFF_HEADER_BYTES]) or Path(file.filename).suffix
         temp_file = tempfile.NamedTemporaryFile(
             delete=False,
             suffix=file_ext,
@@ -71,15 +99,14 @@ async def save_temp_file(file: UploadFile) -> str:
         )
         
         # Guardar contenido
-        content = await file.read()
         temp_file.write(content)
         temp_file.close()
         
-        logger.info(f"Archivo guardado temporalmente: {temp_file.name}")
+        logger.info("Archivo guardado temporalmente: %s", temp_file.name, extra=SAMPLED)
         return temp_file.name
         
     except Exception as e:
-        logger.error(f"Error al guardar archivo temporal: {str(e)}")
+        logger.error("Error al guardar archivo temporal: %s", e)
         raise HTTPException(
             status_code=500,
             detail="Error al procesar el archivo"
@@ -96,6 +123,6 @@ def cleanup_temp_file(file_path: str) -> None:
     try:
         if os.path.exists(file_path):
             os.unlink(file_path)
-            logger.info(f"Archivo temporal eliminado: {file_path}")
+            logger.info("Archivo temporal eliminado: %s", file_path, extra=SAMPLED)
     except Exception as e:
-        logger.warning(f"No se pudo eliminar archivo temporal {file_path}: {str(e)}")
+        logger.warning("No se pudo eliminar archivo temporal %s: %s", file_path, e)
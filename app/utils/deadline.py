@@ -0,0 +1,113 @@
+"""Deadline de extremo a extremo por petición"""
+import time
+from contextvars import ContextVar, Token
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+# Segundos que el cliente está dispuesto a esperar (sobrescribe el default del endpoint)
+DEADLINE_HEADER = "x-request-timeout"
+
+# (llegada en reloj monotónico, segundos pedidos por el cliente)
+_arrival: ContextVar[Optional[Tuple[float, Optional[float]]]] = ContextVar("request_arrival", default=None)
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(HTTPException):
+    """No queda tiempo para completar la siguiente etapa: 504 sin llamar upstream"""
+
+    def __init__(self, stage: str):
+        super().__init__(
+            status_code=504,
+            detail=f"Tiempo de la petición agotado antes de la etapa {stage}"
+        )
+        self.stage = stage
+
+
+def mark_arrival(requested_seconds: Optional[float]) -> Token:
+    """Registra la llegada de la petición (lo llama DeadlineMiddleware)"""
+    return _arrival.set((time.monotonic(), requested_seconds))
+
+
+def reset_arrival(token: Token) -> None:
+    _arrival.reset(token)
+
+
+def start_deadline(endpoint: str) -> Optional[float]:
+    """
+    Fija el deadline de la petición en curso
+
+    El presupuesto es el de X-Request-Timeout si el cliente lo envió o, si
+    no, DEADLINE_ENDPOINT_SECONDS[endpoint] / DEADLINE_DEFAULT_SECONDS,
+    siempre con DEADLINE_MAX_SECONDS como tope. Se cuenta desde la llegada
+    de la petición, así que incluye la subida del audio.
+
+    Args:
+        endpoint: Nombre del endpoint (mismas claves que LLM_ENDPOINT_PROFILES)
+
+    Returns:
+        Optional[float]: Segundos de presupuesto, o None si no hay deadline
+    """
+    arrival, requested = _arrival.get() or (time.monotonic(), None)
+    budget = requested if requested is not None else settings.deadline_endpoint_seconds.get(
+        endpoint, settings.deadline_default_seconds
+    )
+    if not budget or budget <= 0:
+        _deadline.set(None)
+        return None
+    budget = min(budget, settings.deadline_max_seconds)
+    _deadline.set(arrival + budget)
+    return budget
+
+
+def remaining() -> Optional[float]:
+    """Segundos que quedan hasta el deadline (None si la petición no tiene)"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def stage_timeout(default: float) -> float:
+    """
+    Timeout de una llamada upstream: lo que queda del presupuesto, sin pasar del de la etapa
+
+    Args:
+        default: Timeout propio de la etapa (ASR/LLM/TTS_TIMEOUT_SECONDS)
+
+    Returns:
+        float: Timeout en segundos para el cliente OpenAI
+    """
+    left = remaining()
+    if left is None:
+        return default
+    return max(min(left, default), 0.001)
+
+
+def check_deadline(stage: str, expected_seconds: float = 0.0) -> None:
+    """
+    Aborta si la etapa no puede terminar antes del deadline
+
+    Args:
+        stage: Etapa que está por empezar (asr, llm, tts)
+        expected_seconds: Duración esperada de la etapa (p. ej. su latencia EWMA)
+
+    Raises:
+        DeadlineExceeded: Si lo que queda no alcanza para la etapa
+    """
+    left = remaining()
+    if left is not None and left <= expected_seconds:
+        metrics.increment(f"deadline.{stage}.aborted")
+        raise DeadlineExceeded(stage)
+
+
+def parse_timeout_header(value: Optional[bytes]) -> Optional[float]:
+    """Segundos de X-Request-Timeout; valores ausentes o inválidos se ignoran"""
+    if not value:
+        return None
+    try:
+        seconds = float(value.decode("latin-1").strip())
+    except ValueError:
+        return None
+    return seconds if seconds > 0 else None
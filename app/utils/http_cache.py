@@ -0,0 +1,20 @@
+"""Utilidades de caché HTTP (ETag / If-None-Match)"""
+from typing import Optional
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Indica si el header If-None-Match coincide con el ETag actual
+
+    Args:
+        if_none_match: Valor del header enviado por el cliente
+        etag: ETag de la representación actual (con comillas)
+
+    Returns:
+        bool: True si el cliente ya tiene esta representación
+    """
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    # Comparación débil (RFC 9110): se ignora el prefijo W/
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
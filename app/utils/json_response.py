@@ -0,0 +1,27 @@
+"""Serialización JSON rápida para respuestas con audio en base64"""
+from typing import Any
+
+import pydantic_core
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Opcional: sin orjson se usa el serializador de pydantic-core
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa con orjson (o pydantic-core) sin revalidar
+
+    Al devolver una Response, FastAPI omite la validación contra
+    `response_model` y el paso por `jsonable_encoder`; el schema sigue
+    documentado en OpenAPI. Pensada para respuestas armadas por nosotros
+    (p. ej. con `Model.model_construct`) cuyo campo grande es base64: no
+    hay nada que escapar y no vale la pena recorrerlo dos veces.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return pydantic_core.to_json(content)
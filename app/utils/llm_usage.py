@@ -0,0 +1,84 @@
+"""Contabilidad de tokens del LLM por petición"""
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+from app.utils.metrics import metrics
+
+
+@dataclass
+class TokenUsage:
+    """Tokens consumidos por las llamadas al LLM de una petición"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    reasoning_tokens: int = 0
+    calls: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+_endpoint: ContextVar[str] = ContextVar("llm_endpoint", default="default")
+_usage: ContextVar[Optional[TokenUsage]] = ContextVar("llm_usage", default=None)
+
+
+def track_llm_usage(endpoint: str) -> TokenUsage:
+    """
+    Marca el endpoint de la petición en curso y empieza a acumular su uso
+
+    El contexto se hereda en las tareas creadas después (batch, streaming),
+    así que basta con llamarla al inicio del endpoint.
+
+    Args:
+        endpoint: Nombre del endpoint (clave de LLM_ENDPOINT_PROFILES)
+
+    Returns:
+        TokenUsage: Acumulador de la petición
+    """
+    usage = TokenUsage()
+    _endpoint.set(endpoint)
+    _usage.set(usage)
+    return usage
+
+
+def current_endpoint() -> str:
+    return _endpoint.get()
+
+
+def current_usage() -> Optional[TokenUsage]:
+    return _usage.get()
+
+
+def record_llm_usage(usage: Any) -> None:
+    """
+    Suma el `usage` de una respuesta de OpenAI a la petición y a las métricas
+
+    Args:
+        usage: Objeto `usage` de chat.completions (puede faltar)
+    """
+    if usage is None:
+        return
+    details = getattr(usage, "completion_tokens_details", None)
+    counts = {
+        "prompt_tokens": _as_int(getattr(usage, "prompt_tokens", 0)),
+        "completion_tokens": _as_int(getattr(usage, "completion_tokens", 0)),
+        "reasoning_tokens": _as_int(getattr(details, "reasoning_tokens", 0)),
+    }
+
+    request_usage = _usage.get()
+    if request_usage is not None:
+        request_usage.calls += 1
+        for name, value in counts.items():
+            setattr(request_usage, name, getattr(request_usage, name) + value)
+
+    endpoint = _endpoint.get()
+    metrics.increment("llm.calls")
+    metrics.increment(f"llm.{endpoint}.calls")
+    for name, value in counts.items():
+        metrics.increment(f"llm.{name}", value)
+        metrics.increment(f"llm.{endpoint}.{name}", value)
+
+
+def _as_int(value: Any) -> int:
+    # Los campos pueden faltar o venir como None según el modelo
+    return value if isinstance(value, int) else 0
@@ -0,0 +1,117 @@
+"""Logging estructurado y no bloqueante (cola + hilo escritor)"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+# Marca los logs verbosos por etapa: se conservan según LOG_SAMPLE_RATE
+SAMPLED = {"sampled": True}
+
+# Atributos estándar de LogRecord (lo demás se trata como campo extra)
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sampled"}
+
+_listener: Optional[QueueListener] = None
+
+
+class Payload:
+    """
+    Texto de usuario o del modelo dentro de un log (transcripciones, respuestas)
+
+    Se trunca a LOG_PAYLOAD_MAX_CHARS o se oculta con LOG_REDACT_PAYLOADS.
+    El recorte ocurre al formatear, en el hilo escritor, no al llamar al logger.
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: Any):
+        self.text = text
+
+    def __str__(self) -> str:
+        text = str(self.text)
+        if settings.log_redact_payloads:
+            return f"[{len(text)} caracteres]"
+        limit = settings.log_payload_max_chars
+        return text if len(text) <= limit else f"{text[:limit]}…(+{len(text) - limit})"
+
+
+def payload(text: Any) -> Payload:
+    """Envuelve un texto para loguearlo como argumento (`logger.info("%s", payload(t))`)"""
+    return Payload(text)
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro, con los campos `extra` incluidos"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _SamplingFilter(logging.Filter):
+    """Descarta (antes de encolar) una fracción de los logs marcados con SAMPLED"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        rate = settings.log_sample_rate
+        return rate >= 1 or random.random() < rate
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    Encola el registro sin formatearlo
+
+    QueueHandler formatea el mensaje en el hilo que llama al logger; aquí la
+    cola es del mismo proceso, así que el registro viaja intacto y el
+    formateo (args, payloads, JSON) lo hace el hilo del QueueListener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging() -> None:
+    """
+    Instala el handler con cola en el logger raíz (idempotente)
+
+    El event loop solo encola; un hilo escribe en stderr en formato
+    LOG_FORMAT (`json` o `text`).
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stderr)
+    if settings.log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _LazyQueueHandler(log_queue)
+    handler.addFilter(_SamplingFilter())
+
+    root = logging.getLogger()
+    root.setLevel(settings.log_level.upper() if settings.log_level else (logging.INFO if settings.debug else logging.WARNING))
+    root.addHandler(handler)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
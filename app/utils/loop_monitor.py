@@ -0,0 +1,91 @@
+"""Monitor de lag del event loop y detector de llamadas bloqueantes"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Optional
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """
+    Mide el lag del event loop y registra la pila cuando algo lo bloquea
+
+    - Una tarea duerme LOOP_MONITOR_INTERVAL_MS y mide cuánto tarda de más
+      en despertar: gauges `event_loop.lag_ms` (última medición) y
+      `event_loop.lag_max_ms` (máximo de las últimas ~10 s).
+    - Un hilo vigilante revisa el latido de esa tarea; si el loop lleva más
+      de LOOP_BLOCK_THRESHOLD_MS sin atenderla, toma la pila del hilo del
+      loop (la llamada que lo bloquea) y la loguea una vez por bloqueo
+      (contador `event_loop.blocked`).
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._expected_at = 0.0  # Cuándo debería despertar la tarea de medición
+        self._reported_at: Optional[float] = None
+        self._samples: Deque[float] = deque()
+
+    async def start(self) -> None:
+        """Inicia la medición en el loop actual y el hilo vigilante"""
+        if not settings.loop_monitor_enabled or self._task is not None:
+            return
+        interval = settings.loop_monitor_interval_ms / 1000
+        self._samples = deque(maxlen=max(1, int(10 / interval)))
+        self._loop_thread_id = threading.get_ident()
+        self._expected_at = time.monotonic() + interval
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure(interval))
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await asyncio.to_thread(self._watchdog.join)
+        self._task = None
+        self._watchdog = None
+
+    async def _measure(self, interval: float) -> None:
+        while True:
+            self._expected_at = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            lag_ms = max(time.monotonic() - self._expected_at, 0.0) * 1000
+            self._samples.append(lag_ms)
+            metrics.set_gauge("event_loop.lag_ms", round(lag_ms, 1))
+            metrics.set_gauge("event_loop.lag_max_ms", round(max(self._samples), 1))
+
+    def _watch(self) -> None:
+        threshold = settings.loop_block_threshold_ms / 1000
+        poll = min(settings.loop_monitor_interval_ms / 1000, threshold) / 2
+        while not self._stopped.wait(poll):
+            expected_at = self._expected_at
+            blocked_for = time.monotonic() - expected_at
+            if blocked_for < threshold or self._reported_at == expected_at:
+                continue
+            self._reported_at = expected_at
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            metrics.increment("event_loop.blocked")
+            logger.warning(
+                "Event loop bloqueado %.0f ms; pila del loop:\n%s",
+                blocked_for * 1000, "".join(traceback.format_stack(frame))
+            )
+
+
+# Instancia global (se inicia en el lifespan de la app)
+loop_monitor = LoopMonitor()
@@ -0,0 +1,194 @@
+"""Contabilidad de memoria: bytes en vuelo, picos por petición y snapshots de tracemalloc"""
+import logging
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.utils.logging_config import SAMPLED
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Marcos que no interesan en las diferencias entre snapshots
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+class MemoryAccounting:
+    """
+    Lleva la cuenta de la memoria que retienen las peticiones
+
+    - Bytes de uploads recibidos por peticiones aún en curso y bytes de
+      respuesta entregados al servidor y no enviados todavía (gauges
+      `memory.<tipo>_bytes_in_flight` y su máximo `..._max`; totales en los
+      contadores `memory.<tipo>_bytes`). Los uploads grandes se vuelcan a
+      disco (SpooledTemporaryFile), así que es una cota superior.
+    - Con tracemalloc activo, el pico de memoria de cada petición
+      (`memory.request_peak_bytes`). tracemalloc mide todo el proceso: con
+      peticiones concurrentes el pico incluye las de las demás.
+    - Snapshots de tracemalloc bajo demanda para comparar entre sí.
+
+    Los contadores se actualizan desde el event loop, sin locks.
+    """
+
+    def __init__(self):
+        self._held: Dict[str, int] = {"upload": 0, "response": 0}
+        self._held_max: Dict[str, int] = {"upload": 0, "response": 0}
+        self._tracked_requests = 0
+        self._request_peak_max = 0
+        self._snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+
+    def hold(self, kind: str, size: int) -> None:
+        """Suma `size` bytes retenidos de tipo `upload` o `response`"""
+        if not size:
+            return
+        self._held[kind] += size
+        metrics.increment(f"memory.{kind}_bytes", size)
+        metrics.set_gauge(f"memory.{kind}_bytes_in_flight", self._held[kind])
+        if self._held[kind] > self._held_max[kind]:
+            self._held_max[kind] = self._held[kind]
+            metrics.set_gauge(f"memory.{kind}_bytes_in_flight_max", self._held[kind])
+
+    def release(self, kind: str, size: int) -> None:
+        if not size:
+            return
+        self._held[kind] -= size
+        metrics.set_gauge(f"memory.{kind}_bytes_in_flight", self._held[kind])
+
+    def begin_request(self) -> Optional[int]:
+        """
+        Marca el inicio de una petición para medir su pico
+
+        Returns:
+            Optional[int]: Memoria trazada al inicio, o None sin tracemalloc
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        if self._tracked_requests == 0:
+            # Solo sin otras peticiones medidas: reiniciar el pico les borraría el suyo
+            tracemalloc.reset_peak()
+        self._tracked_requests += 1
+        return tracemalloc.get_traced_memory()[0]
+
+    def end_request(self, path: str, baseline: Optional[int]) -> None:
+        if baseline is None:
+            return
+        self._tracked_requests -= 1
+        if not tracemalloc.is_tracing():
+            return
+        peak = max(tracemalloc.get_traced_memory()[1] - baseline, 0)
+        metrics.set_gauge("memory.request_peak_bytes", peak)
+        if peak > self._request_peak_max:
+            self._request_peak_max = peak
+            metrics.set_gauge("memory.request_peak_bytes_max", peak)
+        logger.info("Pico de memoria de %s: %d KB", path, peak // 1024, extra=SAMPLED)
+
+    def take_snapshot(self) -> Dict[str, Any]:
+        """
+        Toma un snapshot de tracemalloc (lo inicia si no estaba activo)
+
+        El primer snapshot tras iniciar el trazado sirve de línea base: las
+        asignaciones anteriores no se ven.
+
+        Returns:
+            Dict[str, Any]: ID del snapshot y memoria trazada
+        """
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(settings.memory_tracemalloc_frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        snapshot_id = f"{time.strftime('%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        self._snapshots[snapshot_id] = snapshot
+        while len(self._snapshots) > settings.memory_snapshots_max:
+            self._snapshots.popitem(last=False)
+        return {
+            "id": snapshot_id,
+            "tracing_started": started,
+            "traced_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+        }
+
+    def diff(self, snapshot_id: str, against: Optional[str] = None, limit: int = 20) -> Optional[List[Dict[str, Any]]]:
+        """
+        Líneas de código cuya memoria más cambió entre dos snapshots
+
+        Args:
+            snapshot_id: Snapshot de referencia (el anterior)
+            against: Snapshot posterior; sin él se toma uno nuevo
+            limit: Máximo de líneas a retornar
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: Diferencias ordenadas por tamaño,
+            o None si algún snapshot no existe
+        """
+        old = self._snapshots.get(snapshot_id)
+        if against is None:
+            new = self._snapshots.get(self.take_snapshot()["id"]) if old is not None else None
+        else:
+            new = self._snapshots.get(against)
+        if old is None or new is None:
+            return None
+        return [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff,
+            }
+            for stat in new.compare_to(old, "lineno")[:limit]
+        ]
+
+    def clear_snapshots(self) -> None:
+        """Descarta los snapshots y detiene el trazado si no se pidió en la configuración"""
+        self._snapshots.clear()
+        if not settings.memory_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def status(self) -> Dict[str, Any]:
+        traced = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else None
+        return {
+            "rss_bytes": _rss_bytes(),
+            "upload_bytes_in_flight": self._held["upload"],
+            "response_bytes_in_flight": self._held["response"],
+            "tracemalloc": {
+                "tracing": traced is not None,
+                "current_bytes": traced[0] if traced else None,
+                "peak_bytes": traced[1] if traced else None,
+                "snapshots": list(self._snapshots),
+            },
+        }
+
+
+def estimate_sessions_bytes(sessions: Dict[str, List[Dict[str, str]]]) -> int:
+    """
+    Estimación del tamaño de las sesiones de chat en memoria
+
+    Cuenta el dict, las listas, cada mensaje y sus textos. Los roles son
+    literales compartidos y no se suman.
+    """
+    total = sys.getsizeof(sessions)
+    for session_id, history in list(sessions.items()):
+        total += sys.getsizeof(session_id) + sys.getsizeof(history)
+        for message in history:
+            total += sys.getsizeof(message) + sys.getsizeof(message.get("content", ""))
+    return total
+
+
+def _rss_bytes() -> Optional[int]:
+    # Linux: páginas residentes en /proc; en otros sistemas no se reporta
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# Instancia global
+memory_accounting = MemoryAccounting()
@@ -0,0 +1,44 @@
+"""Métricas en memoria del proceso (contadores y gauges)"""
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+
+class Metrics:
+    """
+    Registro simple de métricas expuesto en GET /metrics
+
+    Los nombres usan puntos como separador (p. ej. `single_flight.tts.saved`).
+    Es seguro usarlo desde hilos (las llamadas a OpenAI corren en `to_thread`).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def get(self, name: str) -> float:
+        """Valor actual de un contador o gauge (0 si no existe)"""
+        with self._lock:
+            return self._counters.get(name, self._gauges.get(name, 0))
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+
+
+# Instancia global
+metrics = Metrics()
@@ -0,0 +1,103 @@
+"""Profiler por muestreo para peticiones puntuales (formato collapsed / flamegraph)"""
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+_NAME_RE = re.compile(r"^[\w.-]+\.folded$")
+
+
+class SamplingProfiler:
+    """
+    Muestrea periódicamente las pilas de todos los hilos desde un hilo propio
+
+    Es un profiler de tiempo real (wall clock): incluye tanto el event loop
+    como los hilos de `asyncio.to_thread` donde corren las llamadas a
+    OpenAI, y también el tiempo en espera. Cada pila empieza con el nombre
+    del hilo. El resultado está en formato "collapsed" (una línea
+    `marco;marco;marco cuenta`), que aceptan flamegraph.pl y speedscope.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Detiene el muestreo y retorna el perfil en formato collapsed"""
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self.samples[_collapse(names.get(ident, str(ident)), frame)] += 1
+
+
+def _collapse(thread_name: str, frame: Optional[FrameType]) -> str:
+    stack: List[str] = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    stack.append(thread_name.replace(";", ":"))
+    return ";".join(reversed(stack))
+
+
+class ProfileStore:
+    """Directorio acotado de perfiles: conserva los PROFILING_MAX_FILES más recientes"""
+
+    @property
+    def directory(self) -> Path:
+        return Path(settings.profiling_dir)
+
+    def new_name(self, path: str) -> str:
+        """Nombre único para el perfil de una petición a `path`"""
+        slug = re.sub(r"[^\w]+", "-", path).strip("-") or "root"
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        return f"{stamp}-{uuid.uuid4().hex[:6]}-{slug}.folded"
+
+    def save(self, name: str, content: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / name).write_text(content, encoding="utf-8")
+        for old in self._files()[settings.profiling_max_files:]:
+            old.unlink(missing_ok=True)
+
+    def list(self) -> List[Dict]:
+        return [
+            {"name": f.name, "size_bytes": f.stat().st_size, "created_at": f.stat().st_mtime}
+            for f in self._files()
+        ]
+
+    def path(self, name: str) -> Optional[Path]:
+        """Ruta de un perfil existente (None si el nombre no es válido o no existe)"""
+        if not _NAME_RE.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def _files(self) -> List[Path]:
+        if not self.directory.is_dir():
+            return []
+        files = [f for f in self.directory.iterdir() if _NAME_RE.match(f.name)]
+        return sorted(files, key=lambda f: f.stat().st_mtime, reverse=True)
+
+
+# Instancia global
+profile_store = ProfileStore()
@@ -0,0 +1,235 @@
+"""Rate limiting por cliente con token buckets (peticiones y segundos de audio)"""
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+REQUESTS_BUCKET = "requests"
+AUDIO_BUCKET = "audio_seconds"
+
+# Cliente de la petición en curso (lo fija RateLimitMiddleware)
+_client_key: ContextVar[Optional[str]] = ContextVar("rate_limit_client", default=None)
+
+
+@dataclass(frozen=True)
+class BucketPolicy:
+    """Capacidad (ráfaga) y recarga por segundo de un bucket"""
+    capacity: float
+    refill_per_second: float
+
+    @property
+    def window_seconds(self) -> int:
+        """Tiempo en recargar el bucket completo"""
+        return math.ceil(self.capacity / self.refill_per_second)
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    allowed: bool
+    limit: float
+    remaining: float
+    reset_seconds: int
+    retry_after: int
+
+    def headers(self, policies: str) -> Dict[str, str]:
+        """Headers RateLimit-* (draft IETF) para esta decisión"""
+        headers = {
+            "RateLimit-Limit": str(int(self.limit)),
+            "RateLimit-Remaining": str(int(self.remaining)),
+            "RateLimit-Reset": str(self.reset_seconds),
+            "RateLimit-Policy": policies,
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(self.retry_after)
+        return headers
+
+
+def refill(tokens: float, elapsed: float, policy: BucketPolicy) -> float:
+    return min(policy.capacity, tokens + max(elapsed, 0.0) * policy.refill_per_second)
+
+
+def decide(tokens: float, cost: float, policy: BucketPolicy) -> Tuple[float, RateLimitDecision]:
+    """
+    Aplica `cost` sobre un bucket ya recargado
+
+    Returns:
+        Tuple[float, RateLimitDecision]: Tokens restantes y la decisión
+    """
+    # Un costo mayor que la ráfaga nunca cabría: se cobra la ráfaga completa
+    cost = min(cost, policy.capacity)
+    allowed = tokens >= cost
+    if allowed:
+        tokens -= cost
+    retry_after = 0 if allowed else math.ceil((cost - tokens) / policy.refill_per_second)
+    reset_seconds = math.ceil((policy.capacity - tokens) / policy.refill_per_second)
+    return tokens, RateLimitDecision(allowed, policy.capacity, tokens, reset_seconds, retry_after)
+
+
+class InMemoryRateLimitBackend:
+    """Buckets en memoria del proceso (un estado por worker)"""
+
+    # Cada cuánto se descartan los buckets que ya se recargaron por completo
+    PRUNE_INTERVAL_SECONDS = 60.0
+
+    def __init__(self):
+        # (cliente, bucket) -> (tokens, actualizado, momento en que vuelve a estar lleno)
+        self._buckets: Dict[Tuple[str, str], Tuple[float, float, float]] = {}
+        self._pruned_at = time.monotonic()
+
+    async def take(self, key: str, bucket: str, cost: float, policy: BucketPolicy) -> RateLimitDecision:
+        now = time.monotonic()
+        tokens, updated, _ = self._buckets.get((key, bucket), (policy.capacity, now, now))
+        tokens, decision = decide(refill(tokens, now - updated, policy), cost, policy)
+        # Cada bucket guarda su propia recarga: se descarta solo cuando descartarlo no cambia nada
+        full_at = now + (policy.capacity - tokens) / policy.refill_per_second
+        self._buckets[(key, bucket)] = (tokens, now, full_at)
+        if now - self._pruned_at >= self.PRUNE_INTERVAL_SECONDS:
+            self._prune(now)
+        return decision
+
+    def _prune(self, now: float) -> None:
+        self._pruned_at = now
+        self._buckets = {k: entry for k, entry in self._buckets.items() if entry[2] > now}
+
+
+class SQLiteRateLimitBackend:
+    """
+    Buckets en un archivo SQLite compartido por los workers del mismo host
+
+    Cada `take` lee y actualiza el bucket en una transacción inmediata, de
+    modo que varios procesos no consumen los mismos tokens.
+    """
+
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._lock = threading.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "key TEXT NOT NULL, bucket TEXT NOT NULL, tokens REAL NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (key, bucket))"
+        )
+
+    async def take(self, key: str, bucket: str, cost: float, policy: BucketPolicy) -> RateLimitDecision:
+        return await asyncio.to_thread(self._take, key, bucket, cost, policy)
+
+    def _take(self, key: str, bucket: str, cost: float, policy: BucketPolicy) -> RateLimitDecision:
+        now = time.time()  # Reloj de pared: se compara entre procesos
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated_at FROM buckets WHERE key = ? AND bucket = ?", (key, bucket)
+                ).fetchone()
+                tokens = policy.capacity if row is None else refill(row[0], now - row[1], policy)
+                tokens, decision = decide(tokens, cost, policy)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (key, bucket, tokens, updated_at) VALUES (?, ?, ?, ?)",
+                    (key, bucket, tokens, now)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return decision
+
+
+class RateLimiter:
+    """Aplica las políticas de RATE_LIMIT_* sobre el backend configurado"""
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = create_backend(settings.rate_limit_backend)
+        return self._backend
+
+    def policies(self) -> Dict[str, BucketPolicy]:
+        return {
+            REQUESTS_BUCKET: BucketPolicy(
+                settings.rate_limit_requests_burst, settings.rate_limit_requests_per_minute / 60
+            ),
+            AUDIO_BUCKET: BucketPolicy(
+                settings.rate_limit_audio_seconds_burst, settings.rate_limit_audio_seconds_per_minute / 60
+            ),
+        }
+
+    def policy_header(self) -> str:
+        """RateLimit-Policy: una entrada por bucket con su ventana de recarga"""
+        return ", ".join(
+            f'{int(policy.capacity)};w={policy.window_seconds};comment="{name}"'
+            for name, policy in self.policies().items()
+        )
+
+    async def take(self, key: str, bucket: str, cost: float = 1) -> RateLimitDecision:
+        decision = await self.backend.take(key, bucket, cost, self.policies()[bucket])
+        if not decision.allowed:
+            metrics.increment(f"rate_limit.{bucket}.rejected")
+        return decision
+
+
+def create_backend(name: str):
+    """Backend de buckets por nombre: `memory` (por proceso) o `sqlite` (compartido)"""
+    if name == "memory":
+        return InMemoryRateLimitBackend()
+    if name == "sqlite":
+        return SQLiteRateLimitBackend(settings.rate_limit_db_path)
+    raise ValueError(f"Backend de rate limit desconocido: {name}")
+
+
+def set_client_key(key: Optional[str]):
+    return _client_key.set(key)
+
+
+def reset_client_key(token) -> None:
+    _client_key.reset(token)
+
+
+async def charge_audio_seconds(seconds: Optional[float], size_bytes: Optional[int] = None) -> None:
+    """
+    Descuenta segundos de audio del bucket del cliente de la petición en curso
+
+    No hace nada fuera de una ruta limitada. Si la cabecera no trae la
+    duración (p. ej. WebM de MediaRecorder) se estima por el tamaño con un
+    bitrate bajo (RATE_LIMIT_UNKNOWN_DURATION_BYTES_PER_SECOND), es decir,
+    por exceso.
+
+    Args:
+        seconds: Duración leída de la cabecera, si se conoce
+        size_bytes: Tamaño del archivo, para estimar la duración
+
+    Raises:
+        HTTPException: 429 con Retry-After si el cliente agotó su cuota de audio
+    """
+    key = _client_key.get()
+    if key is None:
+        return
+    if not seconds and size_bytes:
+        seconds = size_bytes / settings.rate_limit_unknown_duration_bytes_per_second
+        if settings.max_audio_duration_seconds:
+            seconds = min(seconds, settings.max_audio_duration_seconds)
+    if not seconds:
+        return
+    decision = await rate_limiter.take(key, AUDIO_BUCKET, seconds)
+    if not decision.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Cuota de audio agotada. Reintente en {decision.retry_after} segundos",
+            headers=decision.headers(rate_limiter.policy_header())
+        )
+
+
+# Instancia global (backend según RATE_LIMIT_BACKEND, creado en el primer uso)
+rate_limiter = RateLimiter()
@@ -0,0 +1,111 @@
+"""Serialización de turnos por sesión de chat"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class _SessionState:
+    """Lock FIFO de una sesión y turnos registrados (en curso o en espera)"""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+        self.in_flight: Dict[str, asyncio.Future] = {}
+
+
+class SessionTurnQueue:
+    """
+    Ejecuta los turnos de una misma sesión de a uno, en orden de llegada
+
+    Sesiones distintas no comparten estado y avanzan en paralelo. Cada turno
+    puede registrarse con una clave (p. ej. el hash del audio) para detectar
+    envíos duplicados mientras el original sigue en curso. El estado de una
+    sesión se libera cuando no le quedan turnos.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, _SessionState] = {}
+
+    def find_duplicate(self, session_id: str, key: str) -> Optional[asyncio.Future]:
+        """
+        Busca un turno en curso (o en espera) con la misma clave
+
+        Returns:
+            Optional[asyncio.Future]: Resultado futuro del turno original, o None
+        """
+        state = self._sessions.get(session_id)
+        return state.in_flight.get(key) if state else None
+
+    async def run(self, session_id: str, key: Optional[str], turn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Espera su turno en la sesión y ejecuta `turn`
+
+        Args:
+            session_id: Sesión a la que pertenece el turno
+            key: Clave de deduplicación (opcional)
+            turn: Función que ejecuta el turno
+
+        Returns:
+            T: Resultado del turno (también publicado para los duplicados)
+        """
+        async with self._slot(session_id, key) as future:
+            try:
+                result = await turn()
+            except BaseException as e:
+                _settle(future, error=e)
+                raise
+            _settle(future, result=result)
+            return result
+
+    async def stream(self, session_id: str, key: Optional[str], events: AsyncIterator[T]) -> AsyncIterator[T]:
+        """Variante de `run` para turnos que emiten eventos: los reenvía dentro del turno"""
+        async with self._slot(session_id, key) as future:
+            try:
+                async for event in events:
+                    yield event
+            except BaseException as e:
+                _settle(future, error=e)
+                raise
+            _settle(future, result=None)
+
+    @asynccontextmanager
+    async def _slot(self, session_id: str, key: Optional[str]) -> AsyncIterator[asyncio.Future]:
+        state = self._sessions.setdefault(session_id, _SessionState())
+        future = asyncio.get_running_loop().create_future()
+        if key is not None:
+            state.in_flight.setdefault(key, future)
+        state.users += 1
+        try:
+            # asyncio.Lock despierta a los que esperan en orden FIFO
+            async with state.lock:
+                yield future
+        finally:
+            if not future.done():
+                future.cancel()
+            if key is not None and state.in_flight.get(key) is future:
+                del state.in_flight[key]
+            state.users -= 1
+            if state.users == 0:
+                self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        """Sesiones con turnos en curso o en espera"""
+        return len(self._sessions)
+
+
+def _settle(future: asyncio.Future, result=None, error: Optional[BaseException] = None) -> None:
+    if future.done():
+        return
+    if error is None:
+        future.set_result(result)
+    elif not isinstance(error, Exception):
+        future.cancel()  # Cancelación o cierre del stream
+    else:
+        future.set_exception(error)
+        future.exception()  # Marcada como leída: sin duplicados nadie la consume
+
+
+# Instancia global compartida por los endpoints de audio chat
+session_turns = SessionTurnQueue()
@@ -0,0 +1,76 @@
+"""Coalescencia de llamadas idénticas concurrentes (single-flight)"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from app.config import settings
+from app.utils.deadline import DeadlineExceeded, check_deadline, remaining
+from app.utils.logging_config import SAMPLED
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Comparte una sola llamada upstream entre peticiones idénticas en curso
+
+    La primera petición con una clave lanza la llamada como tarea; las que
+    llegan mientras sigue en curso esperan esa misma tarea y reciben su
+    resultado (o su excepción). Al terminar, la clave se libera: no es una
+    caché. Si quien la inició se cancela, la llamada sigue para los demás.
+    Quien se une no espera más allá de su propio deadline (504).
+
+    Métricas: `single_flight.<nombre>.calls` (llamadas reales) y
+    `single_flight.<nombre>.saved` (llamadas evitadas).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecuta `call` o se une a la llamada en curso con la misma clave
+
+        Args:
+            key: Clave que identifica peticiones equivalentes
+            call: Función que hace la llamada upstream
+
+        Returns:
+            T: Resultado compartido
+        """
+        if not settings.single_flight_enabled:
+            return await call()
+
+        task = self._calls.get(key)
+        if task is None:
+            metrics.increment(f"single_flight.{self.name}.calls")
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            return await asyncio.shield(task)
+
+        # La llamada compartida corre con el timeout de quien la inició: quien
+        # se une solo espera lo que queda de su propio deadline
+        check_deadline(self.name)
+        metrics.increment(f"single_flight.{self.name}.saved")
+        logger.info("Single-flight %s: se reutiliza una llamada en curso", self.name, extra=SAMPLED)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), remaining())
+        except asyncio.TimeoutError:
+            if task.done() and not task.cancelled() and isinstance(task.exception(), asyncio.TimeoutError):
+                raise
+            metrics.increment(f"deadline.{self.name}.aborted")
+            raise DeadlineExceeded(self.name)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Evita el aviso si todos los que esperaban se cancelaron
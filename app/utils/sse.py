@@ -0,0 +1,30 @@
+"""Utilidades para respuestas Server-Sent Events"""
+import json
+from typing import Any, AsyncIterator, Dict
+
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Evita que nginx acumule el stream
+}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> bytes:
+    """
+    Serializa un evento SSE
+
+    Args:
+        event: Nombre del evento
+        data: Payload JSON del evento
+
+    Returns:
+        bytes: Evento listo para escribir en el stream
+    """
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+def sse_response(events: AsyncIterator[bytes]) -> StreamingResponse:
+    """Envuelve un generador de eventos en una respuesta text/event-stream"""
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
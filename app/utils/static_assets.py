@@ -0,0 +1,112 @@
+"""Assets estáticos precomprimidos con ETag y soporte de 304 Not Modified"""
+import gzip
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.config import settings
+from app.utils.http_cache import etag_matches
+
+try:
+    import brotli
+except ImportError:  # Dependencia opcional: sin ella solo se sirve gzip
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+
+# Preferencia del servidor cuando el cliente acepta varias codificaciones
+_ENCODING_PREFERENCE = ("br", "gzip")
+
+
+@dataclass
+class StaticAsset:
+    """Un asset con sus variantes comprimidas y ETags por representación"""
+    media_type: str
+    bodies: Dict[str, bytes] = field(default_factory=dict)
+    etags: Dict[str, str] = field(default_factory=dict)
+
+
+class StaticAssetStore:
+    """Carga y comprime una vez los assets; los sirve desde memoria"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._assets: Dict[str, StaticAsset] = {}
+
+    def load(self) -> None:
+        """Lee y precomprime todos los assets del directorio"""
+        assets = {}
+        for path in sorted(self.directory.glob("*.html")):
+            assets[path.name] = _build_asset(path.read_bytes(), "text/html; charset=utf-8")
+        self._assets = assets
+        logger.info(f"Assets estáticos cargados: {', '.join(assets)} (brotli={'sí' if brotli else 'no'})")
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        if not self._assets:
+            self.load()
+        return self._assets.get(name)
+
+    def response(self, request: Request, name: str) -> Response:
+        """
+        Construye la respuesta para un asset según los headers de la petición
+
+        Args:
+            request: Petición (Accept-Encoding, If-None-Match)
+            name: Nombre del archivo en el directorio de assets
+
+        Returns:
+            Response: 200 con la mejor codificación aceptada, o 304 si el ETag coincide
+        """
+        asset = self.get(name)
+        encoding = _negotiate_encoding(request.headers.get("accept-encoding", ""), asset)
+        etag = asset.etags[encoding]
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={settings.static_cache_max_age}",
+            "Vary": "Accept-Encoding",
+        }
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=asset.bodies[encoding], media_type=asset.media_type, headers=headers)
+
+
+def _build_asset(content: bytes, media_type: str) -> StaticAsset:
+    digest = hashlib.sha256(content).hexdigest()[:32]
+    asset = StaticAsset(media_type=media_type)
+    asset.bodies["identity"] = content
+    asset.bodies["gzip"] = gzip.compress(content, compresslevel=9, mtime=0)
+    if brotli is not None:
+        asset.bodies["br"] = brotli.compress(content, quality=11)
+    # ETag fuerte distinto por codificación: son representaciones distintas
+    for encoding in asset.bodies:
+        suffix = "" if encoding == "identity" else f"-{encoding}"
+        asset.etags[encoding] = f'"{digest}{suffix}"'
+    return asset
+
+
+def _negotiate_encoding(accept_encoding: str, asset: StaticAsset) -> str:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    for encoding in _ENCODING_PREFERENCE:
+        if encoding in asset.bodies and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+# Instancia global (se carga en el lifespan de la app)
+static_assets = StaticAssetStore(STATIC_DIR)
@@ -0,0 +1 @@
+"""Benchmarks de rutas críticas en proceso"""
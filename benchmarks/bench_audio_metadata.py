@@ -0,0 +1,30 @@
+"""Benchmark del parser de cabeceras de audio
+
+Uso:
+    python -m benchmarks.bench_audio_metadata
+"""
+import io
+import os
+import timeit
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from app.utils.audio_metadata import probe_audio  # noqa: E402
+from benchmarks.samples import SAMPLES  # noqa: E402
+
+DURATIONS = (3.0, 60.0)
+
+
+def main(number: int = 2000) -> None:
+    print(f"{'formato':<8}{'duración':>10}{'tamaño':>12}{'µs/archivo':>14}")
+    for audio_format, make_sample in SAMPLES.items():
+        for duration in DURATIONS:
+            data = make_sample(duration=duration)
+            buffer = io.BytesIO(data)
+            assert probe_audio(buffer) is not None
+            seconds = min(timeit.repeat(lambda: probe_audio(buffer), number=number, repeat=5))
+            print(f"{audio_format:<8}{duration:>9.0f}s{len(data):>12}{seconds / number * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Benchmark de las rutas críticas en proceso, con línea base y comparación
+
+Mide el costo de nuestro propio código alrededor de las llamadas a OpenAI
+(que se reemplazan por respuestas fijas, así que corre sin red):
+validación y guardado del upload, base64 del TTS y de /voice-agent-audio,
+prompt con historial del audio chat, construcción de las respuestas y el
+motor del pipeline. Cada caso se mide con varios tamaños realistas.
+
+Uso:
+    python -m benchmarks.bench_hot_paths                   # solo medir
+    python -m benchmarks.bench_hot_paths --save            # guardar línea base
+    python -m benchmarks.bench_hot_paths --compare         # comparar (exit 1 si hay regresiones)
+    python -m benchmarks.bench_hot_paths --compare --threshold 0.10 --only context
+
+La línea base depende de la máquina: se guarda y compara en el mismo equipo.
+"""
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from fastapi import UploadFile  # noqa: E402
+
+from app.models.schemas import VoiceAgentResponse  # noqa: E402
+from app.routes import audio_chat  # noqa: E402
+from app.services import tts_service  # noqa: E402
+from app.services.pipeline import Pipeline, PipelineContext, Stage  # noqa: E402
+from app.utils.audio_utils import save_temp_file, validate_audio_file  # noqa: E402
+from app.utils.json_response import FastJSONResponse  # noqa: E402
+from benchmarks.samples import make_wav  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+
+# Audio de entrada (WAV 16 kHz mono) y de respuesta (MP3 a 48 kbps como el TTS)
+UPLOAD_DURATIONS = (3.0, 30.0, 120.0)
+RESPONSE_DURATIONS = (3.0, 30.0, 120.0)
+MP3_BYTES_PER_SECOND = 48000 // 8
+HISTORY_LENGTHS = (0, 6, 100)
+
+TRANSCRIPTION = "¿Qué tiempo hará mañana en Bogotá? Tengo que salir temprano y no sé si llevar paraguas."
+RESPONSE_TEXT = (
+    "Mañana se espera un día parcialmente nublado en Bogotá, con una máxima de 19 grados "
+    "y probabilidad de lluvia del 40% por la tarde. Te recomiendo llevar paraguas."
+)
+
+# Un caso: (nombre, tamaño, función async sin argumentos, parches activos mientras se mide)
+Case = Tuple[str, str, Callable[[], Awaitable[Any]], List[Any]]
+
+
+def _history(length: int) -> List[Dict[str, str]]:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": TRANSCRIPTION if i % 2 == 0 else RESPONSE_TEXT}
+        for i in range(length)
+    ]
+
+
+def _upload_cases() -> List[Case]:
+    cases = []
+    for duration in UPLOAD_DURATIONS:
+        upload = UploadFile(file=io.BytesIO(make_wav(duration=duration)), filename="audio.wav")
+        size = f"{duration:.0f}s wav"
+
+        async def save(upload=upload):
+            upload.file.seek(0)
+            os.unlink(await save_temp_file(upload))
+
+        cases.append(("validate_audio_file", size, lambda upload=upload: validate_audio_file(upload), []))
+        cases.append(("save_temp_file+unlink", size, save, []))
+    return cases
+
+
+def _base64_cases() -> List[Case]:
+    cases = []
+    for duration in RESPONSE_DURATIONS:
+        audio = os.urandom(int(duration * MP3_BYTES_PER_SECOND))
+        encoded = base64.b64encode(audio).decode("utf-8")
+        size = f"{duration:.0f}s mp3"
+
+        async def decode(encoded=encoded):
+            base64.b64decode(encoded)
+
+        # Las iteraciones son secuenciales: single-flight no comparte resultados entre ellas
+        tts = patch.object(tts_service.tts_router, "call", _returning(SimpleNamespace(content=audio)))
+        cases.append(("generate_speech (TTS simulado)", size, lambda: tts_service.generate_speech(RESPONSE_TEXT), [tts]))
+        cases.append(("voice_agent_audio b64decode", size, decode, []))
+    return cases
+
+
+def _context_cases() -> List[Case]:
+    cases = []
+    for length in HISTORY_LENGTHS:
+        history = _history(length)
+        size = f"{length} mensajes"
+
+        async def prompt(history=history):
+            audio_chat.build_context_prompt(TRANSCRIPTION, history)
+
+        async def with_context(history=history):
+            await audio_chat.process_text_with_context(TRANSCRIPTION, history)
+
+        llm = patch.object(audio_chat, "process_text", _returning(RESPONSE_TEXT))
+        cases.append(("build_context_prompt", size, prompt, []))
+        cases.append(("process_text_with_context (LLM simulado)", size, with_context, [llm]))
+    return cases
+
+
+def _response_cases() -> List[Case]:
+    cases = []
+    history = _history(20)
+    for duration in RESPONSE_DURATIONS:
+        audio_base64 = base64.b64encode(os.urandom(int(duration * MP3_BYTES_PER_SECOND))).decode("utf-8")
+        size = f"{duration:.0f}s mp3"
+
+        async def voice_response(audio_base64=audio_base64):
+            result = VoiceAgentResponse.model_construct(
+                transcription=TRANSCRIPTION, response_text=RESPONSE_TEXT,
+                audio_base64=audio_base64, processing_time=2.34, usage=None
+            )
+            FastJSONResponse(result.model_dump(exclude_none=True))
+
+        async def chat_response(audio_base64=audio_base64):
+            result = audio_chat.AudioChatResponse.model_construct(
+                session_id="9f1c2d3e-0000-4000-8000-000000000000", transcription=TRANSCRIPTION,
+                response_text=RESPONSE_TEXT, audio_base64=audio_base64, new_messages=history[-2:],
+                cursor=len(history), conversation_history=history, processing_time=2.34, usage=None
+            )
+            FastJSONResponse(result.model_dump(exclude_none=True))
+
+        cases.append(("VoiceAgentResponse", size, voice_response, []))
+        cases.append(("AudioChatResponse (+historial)", size, chat_response, []))
+    return cases
+
+
+def _pipeline_cases() -> List[Case]:
+    async def noop(ctx):
+        return None
+
+    pipeline = Pipeline("bench", [Stage(f"s{i}", noop, output=f"s{i}") for i in range(5)])
+    return [("pipeline.run (5 etapas vacías)", "-", lambda: pipeline.run(PipelineContext("bench")), [])]
+
+
+def _returning(value: Any) -> Callable[..., Awaitable[Any]]:
+    async def result(*args, **kwargs):
+        return value
+    return result
+
+
+def all_cases() -> List[Case]:
+    return _upload_cases() + _base64_cases() + _context_cases() + _response_cases() + _pipeline_cases()
+
+
+def measure(loop: asyncio.AbstractEventLoop, run: Callable[[], Awaitable[Any]], repeat: int = 5,
+            min_seconds: float = 0.05) -> float:
+    """
+    Segundos por operación (el mínimo entre `repeat` rondas)
+
+    Cada ronda ejecuta la operación las veces necesarias para durar al
+    menos `min_seconds`, dentro de un solo run_until_complete.
+    """
+    async def rounds(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            await run()
+        return time.perf_counter() - start
+
+    number = 1
+    while True:
+        elapsed = loop.run_until_complete(rounds(number))
+        if elapsed >= min_seconds:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(min_seconds / elapsed) + 1)
+    best = min(loop.run_until_complete(rounds(number)) for _ in range(repeat))
+    return best / number
+
+
+def run_suite(only: Optional[str] = None, repeat: int = 5) -> Dict[str, float]:
+    """Ejecuta los casos (filtrados por `only`) y retorna µs/op por `nombre [tamaño]`"""
+    results = {}
+    loop = asyncio.new_event_loop()
+    # save_temp_file escribe en ./temp_audio: se usa un directorio desechable
+    with tempfile.TemporaryDirectory() as workdir, contextlib.chdir(workdir):
+        try:
+            for name, size, run, patches in all_cases():
+                key = f"{name} [{size}]"
+                if only and only not in key:
+                    continue
+                with contextlib.ExitStack() as stack:
+                    for patcher in patches:
+                        stack.enter_context(patcher)
+                    results[key] = measure(loop, run, repeat) * 1e6
+                print(f"{key:<58}{results[key]:>12.1f} µs/op", flush=True)
+        finally:
+            loop.close()
+    return results
+
+
+def save_baseline(results: Dict[str, float], path: Path) -> None:
+    data = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} {platform.node()}",
+        "results_us": results,
+    }
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"\nLínea base guardada en {path}")
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """
+    Compara contra la línea base
+
+    Returns:
+        List[str]: Casos cuyo tiempo creció más que `threshold` (0.25 = 25%)
+    """
+    regressions = []
+    print(f"\n{'caso':<58}{'base µs':>12}{'actual µs':>12}{'cambio':>9}")
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<58}{'-':>12}{current:>12.1f}{'nuevo':>9}")
+            continue
+        change = current / base - 1 if base else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  REGRESIÓN"
+        print(f"{key:<58}{base:>12.1f}{current:>12.1f}{change:>+9.0%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--save", action="store_true", help="Guardar los resultados como línea base")
+    mode.add_argument("--compare", action="store_true", help="Comparar contra la línea base")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Archivo de línea base")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Aumento relativo que cuenta como regresión (0.25 = 25%%)")
+    parser.add_argument("--only", help="Solo los casos cuyo nombre contiene este texto")
+    parser.add_argument("--repeat", type=int, default=5, help="Rondas por caso (se toma la mejor)")
+    args = parser.parse_args(argv)
+    baseline_path = args.baseline.resolve()
+
+    baseline = None
+    if args.compare:
+        if not baseline_path.exists():
+            parser.error(f"No existe la línea base {baseline_path}; genérela con --save")
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+
+    results = run_suite(args.only, args.repeat)
+
+    if args.save:
+        save_baseline(results, baseline_path)
+        return 0
+    if baseline is not None:
+        print(f"Línea base: {baseline['created_at']}, Python {baseline['python']}, {baseline['machine']}")
+        regressions = compare(results, baseline["results_us"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresiones por encima del {args.threshold:.0%}")
+            return 1
+        print("\nSin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
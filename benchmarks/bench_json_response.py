@@ -0,0 +1,81 @@
+"""Benchmark de la serialización de respuestas con audio en base64
+
+Compara el camino por defecto de FastAPI (validar contra response_model,
+jsonable_encoder y JSONResponse) con FastJSONResponse, con orjson y con
+el serializador de pydantic-core.
+
+Uso:
+    python -m benchmarks.bench_json_response
+"""
+import base64
+import os
+import timeit
+import tracemalloc
+from unittest.mock import patch
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.models.schemas import VoiceAgentResponse  # noqa: E402
+from app.utils import json_response  # noqa: E402
+from app.utils.json_response import FastJSONResponse  # noqa: E402
+
+# Segundos de respuesta hablada; MP3 a 48 kbps como el TTS
+DURATIONS = (3.0, 30.0, 120.0)
+MP3_BYTES_PER_SECOND = 48000 // 8
+
+
+def _fields(duration: float) -> dict:
+    audio = os.urandom(int(duration * MP3_BYTES_PER_SECOND))
+    return {
+        "transcription": "¿Qué tiempo hará mañana en Bogotá?",
+        "response_text": "Mañana se espera un día parcialmente nublado con una máxima de 19 grados.",
+        "audio_base64": base64.b64encode(audio).decode("utf-8"),
+        "processing_time": 2.34,
+    }
+
+
+def fastapi_default(fields: dict) -> bytes:
+    model = VoiceAgentResponse.model_validate(fields)
+    return JSONResponse(jsonable_encoder(model, exclude_none=True)).body
+
+
+def fast_path(fields: dict) -> bytes:
+    model = VoiceAgentResponse.model_construct(**fields)
+    return FastJSONResponse(model.model_dump(exclude_none=True)).body
+
+
+def fast_path_pydantic_core(fields: dict) -> bytes:
+    with patch.object(json_response, "orjson", None):
+        return fast_path(fields)
+
+
+def _peak_kb(render, fields: dict) -> float:
+    tracemalloc.start()
+    render(fields)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main(number: int = 50) -> None:
+    renders = {"fastapi": fastapi_default, "pydantic-core": fast_path_pydantic_core}
+    if json_response.orjson is not None:
+        renders["orjson"] = fast_path
+
+    print(f"{'duración':>9}{'base64':>10}  {'serializador':<15}{'ms/resp':>9}{'pico KB':>10}")
+    for duration in DURATIONS:
+        fields = _fields(duration)
+        assert len({render(fields) for render in renders.values()}) == 1
+        for name, render in renders.items():
+            seconds = min(timeit.repeat(lambda: render(fields), number=number, repeat=5))
+            print(
+                f"{duration:>8.0f}s{len(fields['audio_base64']) // 1024:>8}KB  {name:<15}"
+                f"{seconds / number * 1e3:>9.3f}{_peak_kb(render, fields):>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
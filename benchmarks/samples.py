@@ -0,0 +1,83 @@
+"""Generadores de archivos de audio sintéticos (solo cabeceras y relleno)"""
+import struct
+
+
+def make_wav(duration: float = 3.0, sample_rate: int = 16000, channels: int = 1) -> bytes:
+    """WAV PCM 16-bit con silencio"""
+    byte_rate = sample_rate * channels * 2
+    data = b"\x00" * int(duration * byte_rate)
+    fmt = struct.pack("<HHIIHH", 1, channels, sample_rate, byte_rate, channels * 2, 16)
+    return (
+        b"RIFF" + struct.pack("<I", 36 + len(data)) + b"WAVE"
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+        + b"data" + struct.pack("<I", len(data)) + data
+    )
+
+
+def _ogg_page(packet: bytes, granule: int, sequence: int, serial: int = 0x1234) -> bytes:
+    segments = [255] * (len(packet) // 255) + [len(packet) % 255]
+    header = struct.pack("<4sBBqIIIB", b"OggS", 0, 0, granule, serial, sequence, 0, len(segments))
+    return header + bytes(segments) + packet
+
+
+def make_ogg_opus(duration: float = 3.0, channels: int = 1, input_rate: int = 48000) -> bytes:
+    """OGG/Opus con cabecera OpusHead y una página final con el granule total"""
+    pre_skip = 312
+    head = b"OpusHead" + struct.pack("<BBHIhB", 1, channels, pre_skip, input_rate, 0, 0)
+    tags = b"OpusTags" + struct.pack("<I", 0) + struct.pack("<I", 0)
+    audio = b"\x00" * 4000
+    granule = int(duration * 48000) + pre_skip
+    return _ogg_page(head, 0, 0) + _ogg_page(tags, 0, 1) + _ogg_page(audio, granule, 2)
+
+
+def _ebml(element_id: int, payload: bytes) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    size = bytes([0x01]) + len(payload).to_bytes(7, "big")  # VINT de 8 bytes
+    return id_bytes + size + payload
+
+
+def make_webm(duration: float = 3.0, sample_rate: int = 48000, channels: int = 1) -> bytes:
+    """WebM con Info (Duration) y una pista de audio, seguido de un cluster"""
+    info = _ebml(0x2AD7B1, (1_000_000).to_bytes(3, "big")) + _ebml(0x4489, struct.pack(">d", duration * 1000))
+    audio = _ebml(0xB5, struct.pack(">f", sample_rate)) + _ebml(0x9F, bytes([channels]))
+    track = _ebml(0xAE, _ebml(0xD7, b"\x01") + _ebml(0x86, b"A_OPUS") + _ebml(0xE1, audio))
+    cluster = _ebml(0x1F43B675, b"\x00" * 4000)
+    segment = _ebml(0x1549A966, info) + _ebml(0x1654AE6B, track) + cluster
+    header = _ebml(0x1A45DFA3, _ebml(0x4282, b"webm"))
+    return header + _ebml(0x18538067, segment)
+
+
+def make_mp3(duration: float = 3.0, bitrate: int = 128, with_id3: bool = True) -> bytes:
+    """MP3 CBR (MPEG-1 Layer III, 44.1 kHz, estéreo) con frames vacíos"""
+    bitrate_index = (32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320).index(bitrate) + 1
+    frame_header = bytes([0xFF, 0xFB, (bitrate_index << 4) | 0x00, 0x00])
+    frame_length = 144 * bitrate * 1000 // 44100
+    frames = int(duration * 44100 / 1152)
+    frame = frame_header + b"\x00" * (frame_length - 4)
+    tag = b"ID3\x04\x00\x00" + bytes([0, 0, 0, 10]) + b"\x00" * 10 if with_id3 else b""
+    return tag + frame * frames
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def make_m4a(duration: float = 3.0, sample_rate: int = 44100, channels: int = 2) -> bytes:
+    """M4A con mdat antes de moov (caso típico sin faststart)"""
+    mvhd = _box(b"mvhd", struct.pack(">B3xIIII", 0, 0, 0, 1000, int(duration * 1000)) + b"\x00" * 80)
+    hdlr = _box(b"hdlr", struct.pack(">4x4s4s", b"\x00" * 4, b"soun") + b"\x00" * 13)
+    entry = _box(b"mp4a", b"\x00" * 6 + struct.pack(">H", 1) + b"\x00" * 8
+                 + struct.pack(">HHHHI", channels, 16, 0, 0, sample_rate << 16))
+    stsd = _box(b"stsd", struct.pack(">4xI", 1) + entry)
+    trak = _box(b"trak", _box(b"mdia", hdlr + _box(b"minf", _box(b"stbl", stsd))))
+    ftyp = _box(b"ftyp", b"M4A \x00\x00\x00\x00M4A isom")
+    return ftyp + _box(b"mdat", b"\x00" * 4000) + _box(b"moov", mvhd + trak)
+
+
+SAMPLES = {
+    ".wav": make_wav,
+    ".ogg": make_ogg_opus,
+    ".webm": make_webm,
+    ".mp3": make_mp3,
+    ".m4a": make_m4a,
+}
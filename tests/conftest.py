@@ -0,0 +1,14 @@
+"""Fixtures compartidas por los tests"""
+import pytest
+from app.utils.rate_limit import InMemoryRateLimitBackend, rate_limiter
+
+# Upload mínimo que pasa la validación de formato (firma WAV)
+FAKE_WAV = b"RIFF\x24\x00\x00\x00WAVEfmt " + b"fake audio content"
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limit_buckets():
+    """Cada test empieza con los buckets de rate limit llenos"""
+    rate_limiter._backend = InMemoryRateLimitBackend()
+    yield
+    rate_limiter._backend = None
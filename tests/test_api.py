@@ -6,6 +6,7 @@ import io
 import os
 from pathlib import Path
 from app.main import app
+from tests.conftest import FAKE_WAV
 
 client = TestClient(app)
 
@@ -44,7 +45,7 @@ async def test_voice_agent_success(mock_tts, mock_llm, mock_asr):
     mock_tts.return_value = "ZmFrZV9hdWRpb19iYXNlNjQ="  # fake_audio_base64
     
     # Crear archivo de prueba
-    audio_content = b"fake audio content"
+    audio_content = FAKE_WAV
     files = {
         "audio": ("test.wav", io.BytesIO(audio_content), "audio/wav")
     }
@@ -98,6 +99,34 @@ def test_voice_agent_large_file():
     assert response.status_code == 400
 
 
+def test_voice_agent_content_not_audio():
+    """Test con extensión válida pero contenido que no es audio"""
+    files = {
+        "audio": ("test.wav", io.BytesIO(b"<html>no es audio</html>"), "audio/wav")
+    }
+    
+    response = client.post("/voice-agent", files=files)
+    assert response.status_code == 400
+    assert "Formato no permitido" in response.json()["error"]
+
+
+def test_voice_agent_large_file_rejected_by_content_length():
+    """Test que el guard rechaza por Content-Length sin procesar multipart"""
+    with patch('app.main.validate_audio_file') as mock_validate:
+        response = client.post(
+            "/voice-agent",
+            content=b"x" * 64,
+            headers={
+                "Content-Type": "multipart/form-data; boundary=xyz",
+                "Content-Length": str(50 * 1024 * 1024)
+            }
+        )
+    
+    assert response.status_code == 400
+    assert "Archivo muy grande" in response.json()["error"]
+    assert not mock_validate.called
+
+
 def test_docs_available():
     """Test que verifica que la documentación está disponible"""
     response = client.get("/docs")
@@ -0,0 +1,148 @@
+"""Tests para el audio chat conversacional"""
+import asyncio
+import io
+from unittest.mock import patch
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routes.audio_chat import chat_sessions
+from tests.conftest import FAKE_WAV
+
+client = TestClient(app)
+
+
+def _turn(data=None):
+    files = {"audio": ("turno.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+    return client.post("/audio-chat/", files=files, data=data or {})
+
+
+@patch('app.routes.audio_chat.generate_speech')
+@patch('app.routes.audio_chat.process_text')
+@patch('app.routes.audio_chat.transcribe_audio')
+def test_audio_chat_returns_only_new_messages(mock_asr, mock_llm, mock_tts):
+    """Cada turno retorna solo sus mensajes y un cursor creciente"""
+    mock_asr.side_effect = ["Tengo una pregunta", "¿Qué hora es?"]
+    mock_llm.side_effect = ["Claro, dime.", "Son las tres."]
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    first = _turn().json()
+    second = _turn({"session_id": first["session_id"], "cursor": first["cursor"]}).json()
+    
+    assert first["cursor"] == 2
+    assert "conversation_history" not in first
+    assert second["cursor"] == 4
+    assert [m["content"] for m in second["new_messages"]] == ["¿Qué hora es?", "Son las tres."]
+
+
+@patch('app.routes.audio_chat.generate_speech')
+@patch('app.routes.audio_chat.process_text')
+@patch('app.routes.audio_chat.transcribe_audio')
+def test_audio_chat_stale_cursor_and_full_history(mock_asr, mock_llm, mock_tts):
+    """Un cursor atrasado recupera lo perdido; include_history da todo"""
+    mock_asr.side_effect = ["uno", "dos", "tres"]
+    mock_llm.side_effect = ["r1", "r2", "r3"]
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    session_id = _turn().json()["session_id"]
+    _turn({"session_id": session_id})
+    catch_up = _turn({"session_id": session_id, "cursor": 2}).json()
+    
+    assert [m["content"] for m in catch_up["new_messages"]] == ["dos", "r2", "tres", "r3"]
+    
+    mock_asr.side_effect = ["cuatro"]
+    mock_llm.side_effect = ["r4"]
+    full = _turn({"session_id": session_id, "include_history": "true"}).json()
+    assert len(full["conversation_history"]) == 8
+    assert full["cursor"] == 8
+
+
+def _seed_session(messages):
+    chat_sessions["sesion-historial"] = [{"role": "user", "content": str(i)} for i in range(messages)]
+    return "sesion-historial"
+
+
+def test_history_pagination():
+    """Paginación por cursor y limit"""
+    session_id = _seed_session(5)
+    
+    page = client.get(f"/audio-chat/{session_id}/history", params={"limit": 2}).json()
+    assert [m["content"] for m in page["history"]] == ["0", "1"]
+    assert page["next_cursor"] == 2
+    
+    last = client.get(f"/audio-chat/{session_id}/history", params={"after": 4, "limit": 2}).json()
+    assert [m["content"] for m in last["history"]] == ["4"]
+    assert last["next_cursor"] is None
+    assert last["message_count"] == 5
+
+
+def test_history_conditional_request():
+    """If-None-Match con el ETag vigente responde 304 hasta que cambia la sesión"""
+    session_id = _seed_session(3)
+    url = f"/audio-chat/{session_id}/history"
+    
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    
+    from app.routes.audio_chat import chat_sessions
+    chat_sessions[session_id].append({"role": "assistant", "content": "nuevo"})
+    
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+async def _concurrent_turns(session_id):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        async def post():
+            files = {"audio": ("turno.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+            return await async_client.post("/audio-chat/", files=files, data={"session_id": session_id})
+        return await asyncio.gather(post(), post())
+
+
+def _slow_asr(texts):
+    async def transcribe(path):
+        await asyncio.sleep(0.02)
+        return texts.pop(0)
+    return transcribe
+
+
+@pytest.mark.asyncio
+@patch('app.routes.audio_chat.generate_speech')
+@patch('app.routes.audio_chat.process_text')
+async def test_concurrent_turns_same_session_are_serialized(mock_llm, mock_tts):
+    """Dos envíos simultáneos no intercalan mensajes en el historial"""
+    mock_llm.side_effect = ["r1", "r2"]
+    mock_tts.return_value = "ZmFrZQ=="
+    chat_sessions["serial"] = []
+    
+    with patch('app.routes.audio_chat.transcribe_audio', new=_slow_asr(["t1", "t2"])):
+        first, second = await _concurrent_turns("serial")
+    
+    assert first.status_code == second.status_code == 200
+    assert [m["content"] for m in chat_sessions["serial"]] == ["t1", "r1", "t2", "r2"]
+
+
+@pytest.mark.asyncio
+@patch('app.routes.audio_chat.generate_speech')
+@patch('app.routes.audio_chat.process_text')
+async def test_duplicate_turn_policies(mock_llm, mock_tts):
+    """Con reject el duplicado recibe 409; con coalesce comparte el resultado"""
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    mock_llm.side_effect = ["r1", "r2"]
+    chat_sessions["dup-reject"] = []
+    with patch('app.routes.audio_chat.settings.chat_duplicate_turn_policy', "reject"), \
+            patch('app.routes.audio_chat.transcribe_audio', new=_slow_asr(["t1", "t2"])):
+        responses = await _concurrent_turns("dup-reject")
+    assert sorted(r.status_code for r in responses) == [200, 409]
+    assert len(chat_sessions["dup-reject"]) == 2
+    
+    mock_llm.side_effect = ["r1", "r2"]
+    chat_sessions["dup-coalesce"] = []
+    with patch('app.routes.audio_chat.settings.chat_duplicate_turn_policy', "coalesce"), \
+            patch('app.routes.audio_chat.transcribe_audio', new=_slow_asr(["t1", "t2"])):
+        first, second = await _concurrent_turns("dup-coalesce")
+    assert first.json()["response_text"] == second.json()["response_text"] == "r1"
+    assert len(chat_sessions["dup-coalesce"]) == 2
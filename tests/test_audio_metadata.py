@@ -0,0 +1,63 @@
+"""Tests para el parser de cabeceras de audio"""
+import io
+import pytest
+from fastapi import HTTPException, UploadFile
+from unittest.mock import patch
+from app.utils.audio_metadata import probe_audio
+from app.utils.audio_utils import validate_audio_file
+from benchmarks.samples import make_wav, make_ogg_opus, make_webm, make_mp3, make_m4a
+
+
+@pytest.mark.parametrize("data,audio_format,sample_rate,channels", [
+    (make_wav(duration=2.5, sample_rate=16000, channels=1), ".wav", 16000, 1),
+    (make_ogg_opus(duration=2.5, channels=2, input_rate=24000), ".ogg", 24000, 2),
+    (make_webm(duration=2.5, sample_rate=48000, channels=1), ".webm", 48000, 1),
+    (make_mp3(duration=2.5), ".mp3", 44100, 2),
+    (make_m4a(duration=2.5, sample_rate=44100, channels=2), ".m4a", 44100, 2),
+])
+def test_probe_audio_formats(data, audio_format, sample_rate, channels):
+    """Test de duración, sample rate y canales por formato"""
+    info = probe_audio(io.BytesIO(data))
+    
+    assert info.format == audio_format
+    assert info.sample_rate == sample_rate
+    assert info.channels == channels
+    assert info.duration == pytest.approx(2.5, abs=0.05)
+
+
+def test_probe_audio_restores_position():
+    """El parser no altera la posición del archivo"""
+    buffer = io.BytesIO(make_wav())
+    buffer.seek(7)
+    probe_audio(buffer)
+    assert buffer.tell() == 7
+
+
+def test_probe_audio_truncated_header():
+    """Cabecera truncada: se conoce el formato pero no la duración"""
+    info = probe_audio(io.BytesIO(make_m4a()[:20]))
+    assert info.format == ".m4a"
+    assert info.duration is None
+
+
+def test_probe_audio_unknown():
+    """Contenido no reconocido"""
+    assert probe_audio(io.BytesIO(b"no es audio")) is None
+
+
+@pytest.mark.asyncio
+async def test_validate_rejects_long_audio():
+    """La validación aplica el límite de duración"""
+    upload = UploadFile(file=io.BytesIO(make_wav(duration=5.0)), filename="largo.wav")
+    with patch('app.utils.audio_utils.settings.max_audio_duration_seconds', 4):
+        with pytest.raises(HTTPException) as exc_info:
+            await validate_audio_file(upload)
+    assert "Audio muy largo" in exc_info.value.detail
+
+
+@pytest.mark.asyncio
+async def test_validate_returns_audio_info():
+    """La validación expone los metadatos leídos"""
+    upload = UploadFile(file=io.BytesIO(make_wav(duration=1.0)), filename="corto.wav")
+    info = await validate_audio_file(upload)
+    assert info.duration == pytest.approx(1.0)
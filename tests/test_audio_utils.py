@@ -0,0 +1,42 @@
+"""Tests para las utilidades de audio"""
+import io
+import pytest
+from fastapi import HTTPException, UploadFile
+from app.utils.audio_utils import sniff_audio_format, validate_audio_file
+from tests.conftest import FAKE_WAV
+
+
+@pytest.mark.parametrize("header,expected", [
+    (FAKE_WAV, ".wav"),
+    (b"OggS\x00\x02" + b"\x00" * 10, ".ogg"),
+    (b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81", ".webm"),
+    (b"ID3\x04\x00\x00\x00\x00\x00\x00", ".mp3"),
+    (b"\xff\xfb\x90\x64\x00\x00", ".mp3"),
+    (b"\x00\x00\x00\x20ftypM4A \x00\x00", ".m4a"),
+])
+def test_sniff_audio_format_known(header, expected):
+    """Test de detección de contenedores soportados"""
+    assert sniff_audio_format(header) == expected
+
+
+@pytest.mark.parametrize("header", [
+    b"",
+    b"not audio at all",
+    b"RIFF\x24\x00\x00\x00AVI LIST",
+    b"\xff\xf1\x50\x80",  # ADTS (AAC), no MP3
+])
+def test_sniff_audio_format_unknown(header):
+    """Test con firmas que no son audio permitido"""
+    assert sniff_audio_format(header) is None
+
+
+@pytest.mark.asyncio
+async def test_validate_ignores_extension():
+    """El formato se decide por el contenido, no por el nombre"""
+    upload = UploadFile(file=io.BytesIO(b"OggS" + b"\x00" * 40), filename="grabacion.bin")
+    await validate_audio_file(upload)
+    
+    fake = UploadFile(file=io.BytesIO(b"MZ\x90\x00" + b"\x00" * 40), filename="audio.wav")
+    with pytest.raises(HTTPException) as exc_info:
+        await validate_audio_file(fake)
+    assert exc_info.value.status_code == 400
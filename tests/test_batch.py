@@ -0,0 +1,112 @@
+"""Tests para el endpoint batch"""
+import io
+import json
+import asyncio
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from tests.conftest import FAKE_WAV
+
+client = TestClient(app)
+
+
+def _files(*names_and_contents):
+    return [("audios", (name, io.BytesIO(content), "audio/wav")) for name, content in names_and_contents]
+
+
+def _records(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+@patch('app.routes.batch.generate_speech')
+@patch('app.routes.batch.process_text')
+@patch('app.routes.batch.transcribe_audio')
+def test_batch_streams_ndjson_per_item(mock_asr, mock_llm, mock_tts):
+    """Cada archivo produce una línea; los errores son por item"""
+    mock_asr.return_value = "Hola"
+    mock_llm.return_value = "¡Hola!"
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    response = client.post("/voice-agent/batch", files=_files(
+        ("a.wav", FAKE_WAV),
+        ("b.txt", b"no es audio"),
+        ("c.wav", FAKE_WAV),
+    ))
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = {r["index"]: r for r in _records(response)}
+    assert set(records) == {0, 1, 2}
+    assert records[0]["status"] == "ok"
+    assert records[0]["audio_base64"] == "ZmFrZQ=="
+    assert records[1]["status"] == "error"
+    assert "Formato no permitido" in records[1]["error"]
+    assert records[2]["status"] == "ok"
+
+
+@patch('app.routes.batch.generate_speech')
+@patch('app.routes.batch.process_text')
+@patch('app.routes.batch.transcribe_audio')
+def test_batch_invalid_first_file_is_a_per_item_error(mock_asr, mock_llm, mock_tts):
+    """La guardia de uploads no rechaza el batch entero por el formato del primer archivo"""
+    mock_asr.return_value = "Hola"
+    mock_llm.return_value = "¡Hola!"
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    response = client.post("/voice-agent/batch", files=_files(("a.txt", b"no es audio"), ("b.wav", FAKE_WAV)))
+    
+    assert response.status_code == 200
+    records = {r["index"]: r for r in _records(response)}
+    assert records[0]["status"] == "error"
+    assert "Formato no permitido" in records[0]["error"]
+    assert records[1]["status"] == "ok"
+
+
+@patch('app.routes.batch.generate_speech')
+@patch('app.routes.batch.process_text')
+@patch('app.routes.batch.transcribe_audio')
+def test_batch_item_failure_does_not_fail_batch(mock_asr, mock_llm, mock_tts):
+    """Un fallo del pipeline afecta solo a su item"""
+    mock_asr.side_effect = ["Hola", Exception("Error al transcribir audio: timeout")]
+    mock_llm.return_value = "¡Hola!"
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    with patch('app.routes.batch.settings.batch_max_concurrency', 1):
+        response = client.post("/voice-agent/batch", files=_files(("a.wav", FAKE_WAV), ("b.wav", FAKE_WAV)))
+    
+    statuses = sorted(r["status"] for r in _records(response))
+    assert statuses == ["error", "ok"]
+
+
+@patch('app.routes.batch.generate_speech')
+@patch('app.routes.batch.process_text')
+@patch('app.routes.batch.transcribe_audio')
+def test_batch_respects_concurrency_limit(mock_asr, mock_llm, mock_tts):
+    """No se ejecutan más items en paralelo que el límite configurado"""
+    running = 0
+    peak = 0
+    
+    async def slow_asr(path):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return "Hola"
+    
+    mock_asr.side_effect = slow_asr
+    mock_llm.return_value = "¡Hola!"
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    with patch('app.routes.batch.settings.batch_max_concurrency', 2):
+        response = client.post("/voice-agent/batch", files=_files(*[(f"{i}.wav", FAKE_WAV) for i in range(6)]))
+    
+    assert len(_records(response)) == 6
+    assert peak == 2
+
+
+def test_batch_too_many_files():
+    """Límite de archivos por petición"""
+    with patch('app.routes.batch.settings.batch_max_files', 1):
+        response = client.post("/voice-agent/batch", files=_files(("a.wav", FAKE_WAV), ("b.wav", FAKE_WAV)))
+    assert response.status_code == 400
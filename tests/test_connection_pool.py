@@ -0,0 +1,97 @@
+"""Tests para el pool de conexiones pre-calentado"""
+import asyncio
+import time
+from unittest.mock import Mock, patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.connection_pool import ConnectionPool, connection_pool
+from app.services.llm_service import process_text
+
+
+@pytest.mark.asyncio
+async def test_warm_up_probes_each_connection_then_ready():
+    """Se envía una sonda por conexión y luego el pool queda listo"""
+    pool = ConnectionPool()
+    
+    with patch.object(pool, '_probe_once') as mock_probe, \
+            patch('app.services.connection_pool.settings.http_pool_warm_connections', 3), \
+            patch('app.services.connection_pool.settings.http_keepalive_interval_seconds', 0):
+        await pool.start()
+        assert not pool.ready
+        await asyncio.gather(*pool._tasks)
+    
+    assert pool.ready
+    assert mock_probe.call_count == 3
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_probes_share_one_client():
+    """Las sondas corren en hilos a la vez pero todas usan el mismo cliente httpx"""
+    pool = ConnectionPool()
+    created = []
+    
+    def slow_client(**kwargs):
+        time.sleep(0.01)  # Ensancha la ventana de la carrera
+        client = Mock()
+        created.append(client)
+        return client
+    
+    with patch('app.services.connection_pool.DefaultHttpxClient', side_effect=slow_client), \
+            patch('app.services.connection_pool.all_base_urls', return_value=["https://api.example.com/v1"]):
+        assert await pool._probe(4) == 4
+        await asyncio.gather(*(asyncio.to_thread(lambda: pool.client) for _ in range(4)))
+    
+    assert len(created) == 1
+    assert created[0].get.call_count == 4
+
+
+def test_probe_sends_no_credentials():
+    """Las sondas pueden ir a gateways de terceros: no llevan la API key"""
+    pool = ConnectionPool()
+    pool._client = Mock()
+    
+    pool._probe_once("https://gateway.example.com/v1")
+    
+    url = pool._client.get.call_args.args[0]
+    assert url == "https://gateway.example.com/v1/models"
+    assert "headers" not in pool._client.get.call_args.kwargs
+
+
+@pytest.mark.asyncio
+async def test_warm_up_failure_still_becomes_ready():
+    """Si las sondas fallan el servicio arranca igual (con conexiones en frío)"""
+    pool = ConnectionPool()
+    
+    with patch.object(pool, '_probe_once', side_effect=Exception("Connection error")), \
+            patch('app.services.connection_pool.settings.http_pool_warm_connections', 2), \
+            patch('app.services.connection_pool.settings.http_keepalive_interval_seconds', 0):
+        await pool.start()
+        await asyncio.gather(*pool._tasks)
+    
+    assert pool.ready
+    await pool.stop()
+
+
+def test_ready_endpoint_reflects_warm_up():
+    """/ready responde 503 durante el pre-calentamiento"""
+    client = TestClient(app)
+    
+    with patch.object(connection_pool, 'ready', False):
+        assert client.get("/ready").status_code == 503
+    with patch.object(connection_pool, 'ready', True):
+        assert client.get("/ready").json() == {"status": "ready"}
+
+
+@pytest.mark.asyncio
+async def test_services_share_pooled_http_client():
+    """Los clientes OpenAI reutilizan el cliente httpx del pool"""
+    mock_response = Mock()
+    mock_response.choices = [Mock(message=Mock(content="Hola"))]
+    
+    with patch('app.services.llm_service.OpenAI') as mock_openai:
+        mock_openai.return_value.chat.completions.create.return_value = mock_response
+        await process_text("¿Qué hora es?")
+    
+    assert mock_openai.call_args.kwargs["http_client"] is connection_pool.client
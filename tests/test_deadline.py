@@ -0,0 +1,216 @@
+"""Tests para la propagación del deadline entre etapas"""
+import asyncio
+import io
+from unittest.mock import Mock, patch
+import httpx
+import openai
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.endpoint_router import EndpointRouter
+from app.services.llm_service import process_text
+from app.utils import deadline
+from app.utils.single_flight import SingleFlight
+from app.utils.deadline import (
+    DeadlineExceeded, check_deadline, mark_arrival, parse_timeout_header, reset_arrival,
+    stage_timeout, start_deadline
+)
+from tests.conftest import FAKE_WAV
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def clear_deadline():
+    # start_deadline fuera de una petición deja el deadline en el contexto del test
+    yield
+    deadline._deadline.set(None)
+
+
+def _llm_client(content="Son las diez"):
+    mock_client = Mock()
+    mock_client.chat.completions.create.return_value.choices = [Mock(message=Mock(content=content))]
+    return mock_client
+
+
+def test_parse_timeout_header():
+    """Valores inválidos o no positivos se ignoran"""
+    assert parse_timeout_header(b"2.5") == 2.5
+    assert parse_timeout_header(b"abc") is None
+    assert parse_timeout_header(b"0") is None
+    assert parse_timeout_header(None) is None
+
+
+def test_client_header_overrides_endpoint_default_up_to_max():
+    """X-Request-Timeout manda sobre el default, con DEADLINE_MAX_SECONDS como tope"""
+    token = mark_arrival(None)
+    try:
+        with patch("app.utils.deadline.settings.deadline_endpoint_seconds", {"voice_agent": 12.0}):
+            assert start_deadline("voice_agent") == 12.0
+    finally:
+        reset_arrival(token)
+
+    token = mark_arrival(1000.0)
+    try:
+        with patch("app.utils.deadline.settings.deadline_max_seconds", 90.0):
+            assert start_deadline("voice_agent") == 90.0
+        assert stage_timeout(30.0) == 30.0  # El timeout de la etapa sigue siendo el máximo
+    finally:
+        reset_arrival(token)
+
+
+def test_check_deadline_aborts_when_stage_does_not_fit():
+    """Sin tiempo suficiente para la latencia esperada se lanza 504"""
+    token = mark_arrival(1.0)
+    try:
+        start_deadline("voice_agent")
+        check_deadline("llm", expected_seconds=0.5)
+        with pytest.raises(DeadlineExceeded) as exc_info:
+            check_deadline("llm", expected_seconds=5.0)
+        assert exc_info.value.status_code == 504
+        assert 0 < stage_timeout(30.0) <= 1.0
+    finally:
+        reset_arrival(token)
+
+
+@pytest.mark.asyncio
+async def test_llm_timeout_is_remaining_budget():
+    """La llamada al LLM recibe como timeout lo que queda del deadline"""
+    mock_client = _llm_client()
+    token = mark_arrival(5.0)
+    try:
+        start_deadline("voice_agent")
+        with patch("app.services.llm_service.OpenAI", return_value=mock_client):
+            await process_text("¿Qué hora es?")
+    finally:
+        reset_arrival(token)
+
+    timeout = mock_client.chat.completions.create.call_args.kwargs["timeout"]
+    assert 4.0 < timeout <= 5.0
+
+
+@pytest.mark.asyncio
+async def test_router_skips_call_when_expected_latency_exceeds_budget():
+    """Con la latencia EWMA del endpoint por encima de lo que queda no se llama upstream"""
+    router = EndpointRouter("llm")
+    router.endpoints[0].latency_ewma = 3.0
+    request = Mock()
+    token = mark_arrival(1.0)
+    try:
+        start_deadline("voice_agent")
+        with pytest.raises(DeadlineExceeded):
+            await router.call(request)
+    finally:
+        reset_arrival(token)
+    assert not request.called
+
+
+@pytest.mark.asyncio
+async def test_spent_deadline_is_not_charged_to_the_endpoint():
+    """El timeout por el presupuesto del cliente es un 504, no un error del endpoint"""
+    router = EndpointRouter("llm")
+    endpoint = router.endpoints[0]
+    
+    async def request(endpoint):
+        await asyncio.sleep(0.1)
+        raise openai.APITimeoutError(request=httpx.Request("POST", "http://test"))
+    
+    token = mark_arrival(0.05)
+    try:
+        start_deadline("voice_agent")
+        with pytest.raises(DeadlineExceeded):
+            await router.call(request)
+    finally:
+        reset_arrival(token)
+    assert endpoint.error_ewma == 0.0
+
+
+@pytest.mark.asyncio
+async def test_router_retries_single_endpoint_within_budget():
+    """Un error transitorio se reintenta en el mismo endpoint si el deadline lo permite"""
+    router = EndpointRouter("llm")
+    calls = []
+    
+    async def flaky(endpoint):
+        calls.append(endpoint.name)
+        if len(calls) == 1:
+            raise openai.APIConnectionError(request=httpx.Request("POST", "http://test"))
+        return "ok"
+    
+    token = mark_arrival(5.0)
+    try:
+        start_deadline("voice_agent")
+        with patch("app.services.endpoint_router.settings.router_retry_backoff_seconds", 0.01):
+            assert await router.call(flaky) == "ok"
+    finally:
+        reset_arrival(token)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_router_does_not_retry_when_budget_does_not_cover_latency():
+    """Sin tiempo para la espera y la latencia EWMA del endpoint se propaga el error"""
+    router = EndpointRouter("llm")
+    router.endpoints[0].latency_ewma = 0.5
+    request = Mock(side_effect=openai.APIConnectionError(request=httpx.Request("POST", "http://test")))
+    
+    async def failing(endpoint):
+        return request(endpoint)
+    
+    token = mark_arrival(1.0)
+    try:
+        start_deadline("voice_agent")
+        with patch("app.services.endpoint_router.settings.router_retry_backoff_seconds", 1.0):
+            with pytest.raises(openai.APIConnectionError):
+                await router.call(failing)
+    finally:
+        reset_arrival(token)
+    assert request.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_follower_waits_only_its_own_budget():
+    """Quien se une a una llamada compartida recibe 504 al agotar su deadline; la llamada sigue"""
+    flight = SingleFlight("llm")
+    release = asyncio.Event()
+
+    async def upstream():
+        await release.wait()
+        return "respuesta"
+
+    async def follower():
+        token = mark_arrival(0.1)
+        try:
+            start_deadline("voice_agent")
+            return await flight.do("clave", upstream)
+        finally:
+            reset_arrival(token)
+
+    leader = asyncio.create_task(flight.do("clave", upstream))
+    await asyncio.sleep(0)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    with pytest.raises(DeadlineExceeded):
+        await asyncio.create_task(follower())
+    assert loop.time() - started < 0.5
+
+    release.set()
+    assert await leader == "respuesta"
+
+
+@patch("app.main.transcribe_audio")
+def test_voice_agent_returns_504_before_llm_when_budget_is_spent(mock_asr):
+    """Si ASR consume el presupuesto, el LLM no se llega a llamar"""
+    async def slow_transcription(path):
+        await asyncio.sleep(0.2)
+        return "¿Qué hora es?"
+    mock_asr.side_effect = slow_transcription
+    mock_client = _llm_client()
+
+    with patch("app.services.llm_service.OpenAI", return_value=mock_client):
+        files = {"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+        response = client.post("/voice-agent", files=files, headers={"X-Request-Timeout": "0.1"})
+
+    assert response.status_code == 504
+    assert "llm" in response.json()["error"]
+    assert not mock_client.chat.completions.create.called
@@ -0,0 +1,138 @@
+"""Tests para el enrutamiento y failover entre endpoints"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+import httpx
+import openai
+import pytest
+from app.services.endpoint_router import EndpointRouter, settings
+from app.services.llm_service import process_text
+
+
+def _connection_error():
+    return openai.APIConnectionError(request=httpx.Request("POST", "http://test"))
+
+
+@pytest.fixture
+def make_router():
+    """Router de la etapa llm con los endpoints dados; la configuración se restaura siempre"""
+    with patch('app.services.endpoint_router.settings.llm_endpoints', []):
+        def build(endpoints):
+            settings.llm_endpoints = endpoints
+            return EndpointRouter("llm")
+        yield build
+
+
+@pytest.mark.asyncio
+async def test_prefers_fastest_endpoint_adjusted_by_weight(make_router):
+    router = make_router([
+        {"base_url": "http://a/v1", "name": "a"},
+        {"base_url": "http://b/v1", "name": "b", "weight": 3},
+    ])
+    a, b = router.endpoints
+    router.record(a, 0.2, ok=True)
+    router.record(b, 0.4, ok=True)  # Más lento, pero con el triple de peso
+    
+    assert [e.name for e in router.candidates()] == ["b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_failover_and_cooldown(make_router):
+    """Un endpoint que falla cede al siguiente y, tras varios errores, queda en cuarentena"""
+    router = make_router([{"base_url": "http://a/v1", "name": "a"}, {"base_url": "http://b/v1", "name": "b"}])
+    tried = []
+    
+    async def request(endpoint):
+        tried.append(endpoint.name)
+        if endpoint.name == "a":
+            raise _connection_error()
+        return "ok"
+    
+    assert await router.call(request) == "ok"
+    assert await router.call(request) == "ok"
+    
+    assert tried == ["a", "b", "b"]  # Tras el primer error "a" pasa al final
+
+
+@pytest.mark.asyncio
+async def test_client_errors_do_not_fail_over(make_router):
+    router = make_router([{"base_url": "http://a/v1"}, {"base_url": "http://b/v1"}])
+    tried = []
+    
+    async def request(endpoint):
+        tried.append(endpoint.base_url)
+        raise ValueError("petición inválida")
+    
+    with pytest.raises(ValueError):
+        await router.call(request)
+    assert len(tried) == 1
+
+
+@pytest.mark.asyncio
+async def test_error_rate_decays_without_traffic(make_router):
+    """Un endpoint que dejó de recibir llamadas tras un error recupera su lugar con el tiempo"""
+    router = make_router([{"base_url": "http://a/v1", "name": "a"}, {"base_url": "http://b/v1", "name": "b"}])
+    a, b = router.endpoints
+    router.record(a, 0.2, ok=True)
+    router.record(b, 0.25, ok=True)
+    router.record(a, 0.2, ok=False)  # Por debajo del umbral: sin cuarentena
+    assert [e.name for e in router.candidates()] == ["b", "a"]
+    
+    a.error_updated_at -= 10 * settings.router_error_half_life_seconds
+    assert [e.name for e in router.candidates()] == ["a", "b"]
+
+
+class _StandIn(BaseHTTPRequestHandler):
+    """Servidor local que imita /v1/chat/completions"""
+    status = 200
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "id": "chatcmpl-local",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-5-nano",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"Respuesta desde {self.server.server_port}"},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3}
+        }).encode()
+        self.send_response(self.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+class _Failing(_StandIn):
+    status = 503
+
+
+@pytest.fixture
+def stand_in_servers():
+    servers = [ThreadingHTTPServer(("127.0.0.1", 0), handler) for handler in (_Failing, _StandIn)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield [f"http://127.0.0.1:{server.server_port}/v1" for server in servers]
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_process_text_fails_over_between_local_servers(stand_in_servers):
+    """Con el primer endpoint caído la respuesta llega del segundo"""
+    failing, healthy = stand_in_servers
+    endpoints = [{"base_url": failing, "weight": 10}, {"base_url": healthy}]
+    
+    with patch('app.services.endpoint_router.settings.llm_endpoints', endpoints):
+        result = await process_text("¿Cuál es la capital de Colombia?")
+    
+    assert result == f"Respuesta desde {healthy.split(':')[-1].split('/')[0]}"
@@ -0,0 +1,101 @@
+"""Tests para las respuestas locales del fast path"""
+import io
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.fast_path import FastPathEngine, normalize_utterance
+from app.utils.metrics import metrics
+from tests.conftest import FAKE_WAV
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_normalize_utterance():
+    assert normalize_utterance("¡Adiós!") == "adios"
+    assert normalize_utterance("  ¿Puedes repetir, por favor? ") == "puedes repetir"
+
+
+@pytest.mark.parametrize("text,intent", [
+    ("Hola.", "greeting"),
+    ("¡Muchas gracias!", "thanks"),
+    ("Adiós", "goodbye"),
+    ("Buenas noches", "greeting"),
+])
+def test_trivial_utterances_are_answered_locally(text, intent):
+    answer = FastPathEngine().match(text)
+    assert answer is not None
+    assert answer.intent == intent
+
+
+def test_only_whole_utterances_match():
+    """Un mensaje que solo empieza con un saludo va al LLM"""
+    assert FastPathEngine().match("Hola, ¿qué tiempo hace en Bogotá?") is None
+
+
+def test_repeat_replays_last_assistant_message():
+    history = [
+        {"role": "user", "content": "¿Qué hora es?"},
+        {"role": "assistant", "content": "Son las tres."},
+    ]
+    engine = FastPathEngine()
+    
+    assert engine.match("Repite, por favor", history).response_text == "Son las tres."
+    assert engine.match("Repite") is None  # Sin historial no hay nada que repetir
+
+
+def test_hit_rate_metrics():
+    engine = FastPathEngine()
+    engine.match("gracias")
+    engine.match("¿Cuál es la capital de Francia?")
+    
+    assert metrics.get("fast_path.hits.thanks") == 1
+    assert metrics.get("fast_path.hit_rate") == 0.5
+
+
+def test_disabled_fast_path():
+    with patch('app.services.fast_path.settings.fast_path_enabled', False):
+        assert FastPathEngine().match("hola") is None
+
+
+@patch('app.routes.audio_chat.generate_speech')
+@patch('app.routes.audio_chat.process_text')
+@patch('app.routes.audio_chat.transcribe_audio')
+def test_audio_chat_repeat_skips_llm(mock_asr, mock_llm, mock_tts):
+    """'Repite' en una sesión retorna la respuesta anterior sin llamar al LLM"""
+    mock_asr.side_effect = ["¿Qué hora es?", "¿Puedes repetir?"]
+    mock_llm.return_value = "Son las tres."
+    mock_tts.return_value = "ZmFrZQ=="
+    client = TestClient(app)
+    
+    def turn(data=None):
+        files = {"audio": ("turno.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+        return client.post("/audio-chat/", files=files, data=data or {}).json()
+    
+    first = turn()
+    second = turn({"session_id": first["session_id"]})
+    
+    assert second["response_text"] == "Son las tres."
+    assert mock_llm.call_count == 1
+
+
+@patch('app.routes.audio_chat.generate_speech')
+@patch('app.services.llm_service._process_text')
+@patch('app.routes.audio_chat.transcribe_audio')
+def test_audio_chat_miss_is_evaluated_once(mock_asr, mock_llm, mock_tts):
+    """Un turno que va al LLM cuenta una sola evaluación del fast path"""
+    mock_asr.return_value = "¿Qué hora es?"
+    mock_llm.return_value = "Son las tres."
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    files = {"audio": ("turno.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+    response = TestClient(app).post("/audio-chat/", files=files)
+    
+    assert response.json()["response_text"] == "Son las tres."
+    assert metrics.get("fast_path.evaluated") == 1
+    assert metrics.get("fast_path.hits") == 0
@@ -0,0 +1,254 @@
+"""Tests para los jobs asíncronos"""
+import asyncio
+import hashlib
+import hmac
+import io
+import json
+import sqlite3
+import time
+import httpx
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.job_queue import (
+    JobStore, JobWorkerPool, JOB_QUEUED, JOB_RUNNING, WEBHOOK_SIGNATURE_HEADER, WEBHOOK_TIMESTAMP_HEADER,
+    job_pipeline, webhook_allowed
+)
+from tests.conftest import FAKE_WAV
+
+
+@pytest.fixture
+def jobs_client(tmp_path):
+    """Cliente con lifespan activo y base de jobs temporal"""
+    with patch('app.services.job_queue.settings.jobs_db_path', str(tmp_path / "jobs.db")), \
+            patch('app.services.job_queue.settings.jobs_poll_interval_seconds', 0.05), \
+            patch('app.main.settings.phrase_bank_enabled', False), \
+            patch('app.main.settings.http_pool_warm_connections', 0):
+        with TestClient(app) as client:
+            yield client
+
+
+def _wait_for_status(client, job_id, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        data = client.get(f"/jobs/{job_id}").json()
+        if data["status"] in ("completed", "failed"):
+            return data
+        time.sleep(0.02)
+    raise AssertionError("El job no terminó a tiempo")
+
+
+@patch('app.services.job_queue.generate_speech')
+@patch('app.services.job_queue.process_text')
+@patch('app.services.job_queue.transcribe_audio')
+def test_job_submit_and_poll(mock_asr, mock_llm, mock_tts, jobs_client):
+    """El submit responde 202 de inmediato y el resultado queda disponible"""
+    mock_asr.return_value = "Hola"
+    mock_llm.return_value = "¡Hola!"
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    response = jobs_client.post("/jobs/", files={"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")})
+    
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    data = _wait_for_status(jobs_client, job_id)
+    assert data["status"] == "completed"
+    assert data["result"]["response_text"] == "¡Hola!"
+    assert data["expires_at"] is not None
+
+
+@patch('app.services.job_queue.transcribe_audio')
+def test_job_failure_is_recorded(mock_asr, jobs_client):
+    """Un error del pipeline deja el job en estado failed"""
+    mock_asr.side_effect = Exception("Error al transcribir audio: timeout")
+    
+    response = jobs_client.post("/jobs/", files={"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")})
+    data = _wait_for_status(jobs_client, response.json()["job_id"])
+    
+    assert data["status"] == "failed"
+    assert "timeout" in data["error"]
+
+
+def test_job_invalid_audio(jobs_client):
+    """La validación ocurre antes de encolar"""
+    response = jobs_client.post("/jobs/", files={"audio": ("a.wav", io.BytesIO(b"no es audio"), "audio/wav")})
+    assert response.status_code == 400
+
+
+def test_job_not_found(jobs_client):
+    """Job inexistente"""
+    assert jobs_client.get("/jobs/no-existe").status_code == 404
+
+
+def test_store_requeues_only_stale_claims_and_expires(tmp_path):
+    """Reabrir la base no roba jobs con heartbeat vigente; los vencidos se re-encolan y expiran por TTL"""
+    db_path = str(tmp_path / "jobs.db")
+    store = JobStore(db_path)
+    job_id = store.create("a.wav", "/tmp/a.wav", None)
+    assert store.claim_next()["id"] == job_id
+    
+    other = JobStore(db_path)  # Otro proceso (p. ej. un worker de uvicorn reiniciado)
+    assert other.get(job_id)["status"] == JOB_RUNNING
+    
+    with patch('app.services.job_queue.settings.jobs_claim_timeout_seconds', -1):
+        assert other.requeue_stale() == 1
+    assert other.claim_next()["status"] == JOB_QUEUED
+    assert other.get(job_id)["claimed_by"] == other.owner
+    
+    # El dueño original ya no puede guardar su resultado
+    assert not store.finish(job_id, {"response_text": "tarde"}, None, ttl_seconds=60)
+    store.close()
+    
+    assert other.finish(job_id, {"response_text": "ok"}, None, ttl_seconds=-1)
+    assert other.get(job_id) is None
+    assert other.purge_expired() == ["/tmp/a.wav"]
+    other.close()
+
+
+@pytest.mark.asyncio
+async def test_requeued_job_keeps_audio_for_new_owner(tmp_path):
+    """Si el claim venció mientras corría, el worker original no borra el audio del nuevo dueño"""
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(FAKE_WAV)
+    db_path = str(tmp_path / "jobs.db")
+    pool = JobWorkerPool()
+    pool.store = JobStore(db_path)
+    pool.store.create("a.wav", str(audio), None)
+    job = pool.store.claim_next()
+    other = JobStore(db_path)
+    
+    async def stolen(ctx):
+        with patch('app.services.job_queue.settings.jobs_claim_timeout_seconds', -1):
+            other.requeue_stale()
+        assert other.claim_next() is not None
+        return ctx
+    
+    with patch.object(job_pipeline, "run", stolen):
+        await pool._run(job)
+    
+    assert audio.exists()
+    assert other.get(job["id"])["status"] == JOB_RUNNING
+    pool.store.close()
+    other.close()
+
+
+def test_webhook_requires_allowed_host(jobs_client):
+    """Sin el host en la lista (o sin secreto) el webhook se rechaza antes de encolar"""
+    files = {"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+    response = jobs_client.post("/jobs/", files=files, data={"webhook_url": "http://169.254.169.254/latest"})
+    assert response.status_code == 400
+    
+    with patch('app.services.job_queue.settings.jobs_webhook_allowed_hosts', ["hooks.example.com"]):
+        assert not webhook_allowed("https://hooks.example.com/done")  # falta el secreto
+        with patch('app.services.job_queue.settings.jobs_webhook_secret', "s3cr3t"):
+            assert webhook_allowed("https://hooks.example.com/done")
+            assert not webhook_allowed("https://hooks.example.com.evil.io/done")
+            assert not webhook_allowed("ftp://hooks.example.com/done")
+
+
+@pytest.mark.asyncio
+async def test_webhook_is_signed(tmp_path):
+    """La notificación lleva una firma HMAC del timestamp y el body enviados"""
+    pool = JobWorkerPool()
+    pool.store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = pool.store.create("a.wav", "/tmp/a.wav", "https://hooks.example.com/done")
+    pool.store.claim_next()
+    pool.store.finish(job_id, {"response_text": "ok"}, None, ttl_seconds=60)
+    sent = {}
+    
+    async def fake_post(self, url, content, headers):
+        sent.update(url=url, content=content, headers=headers)
+        return httpx.Response(200)
+    
+    with patch('app.services.job_queue.settings.jobs_webhook_allowed_hosts', ["hooks.example.com"]), \
+            patch('app.services.job_queue.settings.jobs_webhook_secret', "s3cr3t"), \
+            patch.object(httpx.AsyncClient, "post", fake_post):
+        await pool._notify("https://hooks.example.com/done", job_id)
+    pool.store.close()
+    
+    timestamp = sent["headers"][WEBHOOK_TIMESTAMP_HEADER]
+    expected = hmac.new(b"s3cr3t", timestamp.encode() + b"." + sent["content"], hashlib.sha256).hexdigest()
+    assert sent["headers"][WEBHOOK_SIGNATURE_HEADER] == f"sha256={expected}"
+    assert json.loads(sent["content"])["job_id"] == job_id
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_keeps_its_audio(tmp_path):
+    """Si el pool se detiene a mitad de un job, el audio queda para el reintento al reiniciar"""
+    audio = tmp_path / "a.wav"
+    audio.write_bytes(FAKE_WAV)
+    pool = JobWorkerPool()
+    pool.store = JobStore(str(tmp_path / "jobs.db"))
+    pool.store.create("a.wav", str(audio), None)
+    job = pool.store.claim_next()
+    started = asyncio.Event()
+    
+    async def slow_asr(path):
+        started.set()
+        await asyncio.sleep(10)
+    
+    with patch('app.services.job_queue.transcribe_audio', slow_asr):
+        task = asyncio.create_task(pool._run(job))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    assert audio.exists()
+    assert pool.store.get(job["id"])["status"] == JOB_RUNNING
+    pool.store.close()
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_store_errors(tmp_path):
+    """Un error al guardar el resultado se registra y el worker sigue tomando jobs"""
+    pool = JobWorkerPool()
+    pool.store = JobStore(str(tmp_path / "jobs.db"))
+    pool._wakeup = asyncio.Event()
+    for name in ("a.wav", "b.wav"):
+        pool.store.create(name, str(tmp_path / name), None)
+    finish = pool.store.finish
+    finished = []
+    
+    def flaky_finish(job_id, *args):
+        if not finished:
+            finished.append(None)
+            raise sqlite3.OperationalError("database is locked")
+        finished.append(job_id)
+        return finish(job_id, *args)
+    
+    async def fake_run(ctx):
+        return ctx
+    
+    with patch.object(pool.store, "finish", flaky_finish), \
+            patch.object(job_pipeline, "run", fake_run), \
+            patch('app.services.job_queue.settings.jobs_poll_interval_seconds', 0.01):
+        worker = asyncio.create_task(pool._worker(0))
+        for _ in range(200):
+            if len(finished) == 2:
+                break
+            await asyncio.sleep(0.01)
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+    pool.store.close()
+    
+    assert len(finished) == 2
+
+
+@pytest.mark.asyncio
+async def test_webhook_skipped_when_job_expired(tmp_path):
+    """Si el resultado expiró antes de notificar no se envía nada (ni falla el worker)"""
+    pool = JobWorkerPool()
+    pool.store = JobStore(str(tmp_path / "jobs.db"))
+    job_id = pool.store.create("a.wav", "/tmp/a.wav", "https://hooks.example.com/done")
+    pool.store.claim_next()
+    pool.store.finish(job_id, {"response_text": "ok"}, None, ttl_seconds=-1)
+    
+    with patch('app.services.job_queue.settings.jobs_webhook_allowed_hosts', ["hooks.example.com"]), \
+            patch('app.services.job_queue.settings.jobs_webhook_secret', "s3cr3t"), \
+            patch.object(httpx.AsyncClient, "post") as mock_post:
+        await pool._notify("https://hooks.example.com/done", job_id)
+    pool.store.close()
+    
+    assert not mock_post.called
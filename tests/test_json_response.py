@@ -0,0 +1,33 @@
+"""Tests para la serialización rápida de respuestas con audio"""
+import json
+from unittest.mock import patch
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.models.schemas import VoiceAgentResponse
+from app.utils import json_response
+from app.utils.json_response import FastJSONResponse
+
+FIELDS = {
+    "transcription": "¿Qué hora es?",
+    "response_text": "Son las diez y cuarto",
+    "audio_base64": "ZmFrZSBhdWRpbw==" * 100,
+    "processing_time": 1.5,
+    "usage": None,
+}
+
+
+def test_same_bytes_as_fastapi_default_path():
+    """El cuerpo es idéntico al que produce FastAPI con response_model_exclude_none"""
+    expected = JSONResponse(jsonable_encoder(VoiceAgentResponse(**FIELDS), exclude_none=True)).body
+    model = VoiceAgentResponse.model_construct(**FIELDS)
+
+    assert FastJSONResponse(model.model_dump(exclude_none=True)).body == expected
+    with patch.object(json_response, "orjson", None):
+        assert FastJSONResponse(model.model_dump(exclude_none=True)).body == expected
+
+
+def test_non_ascii_is_not_escaped():
+    """Los textos en español salen en UTF-8, como con JSONResponse"""
+    body = FastJSONResponse({"text": "canción"}).body
+    assert "canción".encode("utf-8") in body
+    assert json.loads(body) == {"text": "canción"}
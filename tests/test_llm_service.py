@@ -1,7 +1,7 @@
 """Tests para el servicio LLM"""
 import pytest
 from unittest.mock import Mock, patch
-from app.services.llm_service import process_text
+from app.services.llm_service import process_text, process_text_stream, FALLBACK_RESPONSE
 
 
 @pytest.mark.asyncio
@@ -89,3 +89,38 @@ async def test_process_text_empty_input():
         
         result = await process_text("")
         assert isinstance(result, str)
+
+
+def _chunk(content):
+    """Chunk de streaming con un delta de texto"""
+    chunk = Mock()
+    chunk.choices = [Mock()]
+    chunk.choices[0].delta.content = content
+    return chunk
+
+
+@pytest.mark.asyncio
+async def test_process_text_stream_yields_deltas():
+    """Test de streaming de tokens"""
+    with patch('app.services.llm_service.OpenAI') as mock_openai:
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = iter([_chunk("¡Hola"), _chunk(None), _chunk("!")])
+        mock_openai.return_value = mock_client
+        
+        deltas = [delta async for delta in process_text_stream("¿Qué hora es?")]
+        
+        assert deltas == ["¡Hola", "!"]
+        assert mock_client.chat.completions.create.call_args.kwargs['stream'] is True
+
+
+@pytest.mark.asyncio
+async def test_process_text_stream_empty_uses_fallback():
+    """Si el stream no trae texto se emite la respuesta por defecto"""
+    with patch('app.services.llm_service.OpenAI') as mock_openai:
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = iter([_chunk(None)])
+        mock_openai.return_value = mock_client
+        
+        deltas = [delta async for delta in process_text_stream("¿Qué hora es?")]
+        
+        assert deltas == [FALLBACK_RESPONSE]
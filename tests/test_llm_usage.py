@@ -0,0 +1,80 @@
+"""Tests para el presupuesto de reasoning y la contabilidad de tokens del LLM"""
+import io
+from unittest.mock import Mock, patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.llm_service import process_text
+from app.utils.llm_usage import current_usage, track_llm_usage
+from app.utils.metrics import metrics
+from tests.conftest import FAKE_WAV
+
+
+def _completion(text="¡Hola!", prompt=12, completion=80, reasoning=64):
+    response = Mock()
+    response.choices = [Mock(message=Mock(content=text))]
+    response.usage = Mock(
+        prompt_tokens=prompt,
+        completion_tokens=completion,
+        completion_tokens_details=Mock(reasoning_tokens=reasoning)
+    )
+    return response
+
+
+@pytest.mark.asyncio
+async def test_endpoint_profile_overrides_defaults():
+    """El perfil del endpoint define reasoning_effort y max_completion_tokens"""
+    profiles = {"voice_agent_stream": {"reasoning_effort": "minimal", "max_completion_tokens": 300}}
+    
+    with patch('app.services.llm_service.OpenAI') as mock_openai, \
+            patch('app.services.llm_service.settings.llm_endpoint_profiles', profiles):
+        mock_openai.return_value.chat.completions.create.return_value = _completion()
+        
+        track_llm_usage("voice_agent_stream")
+        await process_text("¿Qué hora es?")
+        stream_kwargs = mock_openai.return_value.chat.completions.create.call_args.kwargs
+        
+        track_llm_usage("voice_agent")
+        await process_text("¿Qué hora es?")
+        default_kwargs = mock_openai.return_value.chat.completions.create.call_args.kwargs
+    
+    assert stream_kwargs["reasoning_effort"] == "minimal"
+    assert stream_kwargs["max_completion_tokens"] == 300
+    assert "reasoning_effort" not in default_kwargs
+    assert default_kwargs["max_completion_tokens"] == 1000
+
+
+@pytest.mark.asyncio
+async def test_usage_is_accumulated_per_request_and_in_metrics():
+    metrics.reset()
+    
+    with patch('app.services.llm_service.OpenAI') as mock_openai:
+        mock_openai.return_value.chat.completions.create.return_value = _completion()
+        usage = track_llm_usage("audio_chat")
+        await process_text("¿Qué hora es?")
+        await process_text("¿Qué tiempo hace?")
+    
+    assert current_usage() is usage
+    assert usage.as_dict() == {"prompt_tokens": 24, "completion_tokens": 160, "reasoning_tokens": 128, "calls": 2}
+    assert metrics.get("llm.audio_chat.reasoning_tokens") == 128
+    assert metrics.get("llm.calls") == 2
+
+
+@patch('app.main.generate_speech')
+@patch('app.main.transcribe_audio')
+def test_voice_agent_includes_usage_when_enabled(mock_asr, mock_tts):
+    """Con LLM_USAGE_IN_RESPONSE la respuesta incluye los tokens"""
+    mock_asr.return_value = "¿Qué hora es?"
+    mock_tts.return_value = "ZmFrZQ=="
+    client = TestClient(app)
+    files = {"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+    
+    with patch('app.services.llm_service.OpenAI') as mock_openai:
+        mock_openai.return_value.chat.completions.create.return_value = _completion()
+        hidden = client.post("/voice-agent", files=files).json()
+        with patch('app.main.settings.llm_usage_in_response', True):
+            files["audio"][1].seek(0)
+            shown = client.post("/voice-agent", files=files).json()
+    
+    assert "usage" not in hidden
+    assert shown["usage"]["reasoning_tokens"] == 64
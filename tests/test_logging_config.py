@@ -0,0 +1,57 @@
+"""Tests para el logging estructurado (JSON, muestreo, payloads)"""
+import json
+import logging
+import queue
+from unittest.mock import patch
+from app.utils.logging_config import (
+    JsonFormatter, SAMPLED, _LazyQueueHandler, _SamplingFilter, payload
+)
+
+
+def _record(msg="mensaje %s", args=("x",), **extra):
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_payload_truncates_long_text():
+    """Las transcripciones largas se recortan indicando cuánto falta"""
+    with patch("app.utils.logging_config.settings.log_payload_max_chars", 5):
+        assert str(payload("Hola mundo")) == "Hola …(+5)"
+        assert str(payload("Hola")) == "Hola"
+
+
+def test_payload_redacted():
+    """Con redacción solo se loguea la longitud"""
+    with patch("app.utils.logging_config.settings.log_redact_payloads", True):
+        assert str(payload("dato sensible")) == "[13 caracteres]"
+
+
+def test_json_formatter_includes_extra_fields():
+    """Cada registro es una línea JSON con los campos extra"""
+    line = JsonFormatter().format(_record(session_id="abc", **SAMPLED))
+    entry = json.loads(line)
+    assert entry["message"] == "mensaje x"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
+    assert entry["session_id"] == "abc"
+    assert "sampled" not in entry
+
+
+def test_sampling_filter_drops_only_sampled_records():
+    """Con LOG_SAMPLE_RATE=0 se descartan los verbosos, no los demás"""
+    sampling = _SamplingFilter()
+    with patch("app.utils.logging_config.settings.log_sample_rate", 0.0):
+        assert not sampling.filter(_record(**SAMPLED))
+        assert sampling.filter(_record())
+
+
+def test_queue_handler_defers_formatting():
+    """El registro se encola con sus args sin formatear"""
+    log_queue = queue.SimpleQueue()
+    handler = _LazyQueueHandler(log_queue)
+    text = payload("Hola")
+    handler.handle(_record(args=(text,)))
+    queued = log_queue.get_nowait()
+    assert queued.args == (text,)
+    assert queued.msg == "mensaje %s"
@@ -0,0 +1,53 @@
+"""Tests para el monitor de lag del event loop"""
+import asyncio
+import logging
+import time
+from unittest.mock import patch
+import pytest
+from app.utils.loop_monitor import LoopMonitor
+from app.utils.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def fast_monitor():
+    metrics.reset()
+    with patch("app.utils.loop_monitor.settings.loop_monitor_interval_ms", 10.0), \
+            patch("app.utils.loop_monitor.settings.loop_block_threshold_ms", 50.0):
+        yield
+    metrics.reset()
+
+
+def blocking_handler():
+    time.sleep(0.2)  # Llamada síncrona dentro del loop, como un cliente bloqueante
+
+
+@pytest.mark.asyncio
+async def test_lag_is_exported_as_gauge():
+    """Sin bloqueos el lag queda por debajo del umbral"""
+    monitor = LoopMonitor()
+    await monitor.start()
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    assert "event_loop.lag_ms" in metrics.snapshot()["gauges"]
+    assert metrics.get("event_loop.blocked") == 0
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_logs_offending_stack(caplog):
+    """Un callback que bloquea el loop se loguea una vez, con su pila"""
+    monitor = LoopMonitor()
+    await monitor.start()
+    try:
+        await asyncio.sleep(0.03)
+        with caplog.at_level(logging.WARNING, logger="app.utils.loop_monitor"):
+            blocking_handler()
+            await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    assert metrics.get("event_loop.blocked") == 1
+    assert "blocking_handler" in caplog.text
+    assert metrics.snapshot()["gauges"]["event_loop.lag_max_ms"] >= 150
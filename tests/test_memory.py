@@ -0,0 +1,79 @@
+"""Tests para la contabilidad de memoria y los endpoints de snapshots"""
+import io
+import tracemalloc
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.memory import estimate_sessions_bytes, memory_accounting
+from app.utils.metrics import metrics
+from tests.conftest import FAKE_WAV
+
+ADMIN = {"X-Admin-Token": "secreto"}
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def admin_token():
+    metrics.reset()
+    with patch("app.config.settings.admin_token", "secreto"):
+        yield
+    memory_accounting.clear_snapshots()
+    metrics.reset()
+
+
+def test_estimate_sessions_bytes_grows_with_history():
+    """El estimado crece con el texto de los mensajes"""
+    small = {"s1": [{"role": "user", "content": "hola"}]}
+    large = {"s1": [{"role": "user", "content": "hola" * 1000}]}
+    assert estimate_sessions_bytes(large) - estimate_sessions_bytes(small) >= 3996
+
+
+@patch('app.main.generate_speech')
+@patch('app.main.process_text')
+@patch('app.main.transcribe_audio')
+def test_upload_and_response_bytes_are_counted(mock_asr, mock_llm, mock_tts):
+    """Los bytes del upload y de la respuesta se suman y se liberan al terminar"""
+    mock_asr.return_value = "¿Qué hora es?"
+    mock_llm.return_value = "Son las diez"
+    mock_tts.return_value = "ZmFrZQ==" * 1000
+
+    files = {"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+    response = client.post("/voice-agent", files=files)
+
+    assert response.status_code == 200
+    assert metrics.get("memory.upload_bytes") > len(FAKE_WAV)
+    assert metrics.get("memory.response_bytes") >= len(response.content)
+    gauges = metrics.snapshot()["gauges"]
+    assert gauges["memory.upload_bytes_in_flight"] == 0
+    assert gauges["memory.response_bytes_in_flight"] == 0
+
+
+def test_snapshot_diff_points_to_allocating_line():
+    """La diferencia entre snapshots señala la línea que retuvo memoria"""
+    was_tracing = tracemalloc.is_tracing()
+    first = client.post("/admin/memory/snapshots", headers=ADMIN).json()
+    assert first["tracing_started"] is not was_tracing
+
+    retained = [bytes(1024) for _ in range(2000)]  # ~2 MB retenidos
+    diff = client.get(f"/admin/memory/snapshots/{first['id']}/diff", headers=ADMIN).json()
+    top = diff["top"][0]
+    assert "test_memory.py" in top["location"]
+    assert top["size_diff_bytes"] >= 2000 * 1024
+    del retained
+
+    assert client.get("/admin/memory/snapshots/nope/diff", headers=ADMIN).status_code == 404
+    client.delete("/admin/memory/snapshots", headers=ADMIN)
+    assert tracemalloc.is_tracing() is was_tracing
+
+
+def test_memory_status_includes_chat_sessions():
+    """El estado reporta RSS y el tamaño estimado de las sesiones"""
+    with patch.dict("app.routes.audio_chat.chat_sessions", {"s": [{"role": "user", "content": "hola"}]}, clear=True):
+        status = client.get("/admin/memory", headers=ADMIN).json()
+
+    assert status["chat_sessions"]["sessions"] == 1
+    assert status["chat_sessions"]["messages"] == 1
+    assert status["chat_sessions"]["estimated_bytes"] > 0
+    assert metrics.snapshot()["gauges"]["memory.chat_sessions_bytes"] == status["chat_sessions"]["estimated_bytes"]
@@ -0,0 +1,112 @@
+"""Tests para el banco de frases pre-sintetizadas"""
+import asyncio
+import base64
+import io
+from unittest.mock import AsyncMock, Mock, patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.phrase_bank import PhraseBank
+from app.services.llm_service import FALLBACK_RESPONSE
+from app.services.tts_service import generate_speech
+from tests.conftest import FAKE_WAV
+
+
+@pytest.fixture
+def bank_dir(tmp_path):
+    with patch('app.services.phrase_bank.settings.phrase_bank_dir', str(tmp_path)):
+        yield tmp_path
+
+
+@pytest.mark.asyncio
+async def test_load_synthesizes_once_then_reads_disk(bank_dir):
+    """La primera carga sintetiza; la siguiente lee los MP3 guardados"""
+    synthesize = AsyncMock(return_value=base64.b64encode(b"mp3").decode())
+    
+    bank = PhraseBank()
+    await bank.load(synthesize)
+    assert synthesize.await_count == 6  # fallback + error + thinking + 3 respuestas del fast path
+    assert bank.get("error") == b"mp3"
+    assert bank.lookup(FALLBACK_RESPONSE) == b"mp3"
+    
+    synthesize.reset_mock()
+    await PhraseBank().load(synthesize)
+    assert synthesize.await_count == 0
+
+
+@pytest.mark.asyncio
+async def test_load_survives_tts_errors(bank_dir):
+    """Un fallo de TTS al arrancar no impide iniciar la app"""
+    bank = PhraseBank()
+    await bank.load(AsyncMock(side_effect=Exception("Connection error")))
+    assert bank.get("error") is None
+
+
+@pytest.mark.asyncio
+async def test_start_loads_in_background_within_timeout(bank_dir):
+    """El arranque no espera al TTS; al agotar el tope se sirven las frases ya listas"""
+    release = asyncio.Event()
+    
+    async def synthesize(text):
+        if text != FALLBACK_RESPONSE:
+            await release.wait()
+        return base64.b64encode(b"mp3").decode()
+    
+    bank = PhraseBank()
+    with patch('app.services.phrase_bank.settings.phrase_bank_load_timeout_seconds', 0.1):
+        await bank.start(synthesize)
+        assert not bank.ready
+        assert bank.get("error") is None  # Mientras tanto, TTS bajo demanda
+        await asyncio.sleep(0.3)
+    
+    assert bank.ready
+    assert bank.lookup(FALLBACK_RESPONSE) == b"mp3"
+    assert bank.get("error") is None
+    await bank.stop()
+
+
+@pytest.mark.asyncio
+async def test_generate_speech_serves_fallback_from_bank(bank_dir):
+    """El texto de fallback se sirve sin llamar a la API de TTS"""
+    bank = PhraseBank()
+    await bank.load(AsyncMock(return_value=base64.b64encode(b"fallback-mp3").decode()))
+    
+    with patch('app.services.tts_service.phrase_bank', bank), \
+            patch('app.services.tts_service.OpenAI') as mock_openai:
+        result = await generate_speech(FALLBACK_RESPONSE)
+    
+    assert base64.b64decode(result) == b"fallback-mp3"
+    assert not mock_openai.called
+
+
+async def _fake_stream(path):
+    yield True, "Hola"
+
+
+async def _slow_llm(text):
+    await asyncio.sleep(0.05)
+    yield "¡Hola!"
+
+
+async def _fake_tts(text):
+    yield b"mp3"
+
+
+@patch('app.routes.streaming.generate_speech_stream', new=_fake_tts)
+@patch('app.routes.streaming.process_text_stream', new=_slow_llm)
+@patch('app.routes.streaming.transcribe_audio_stream', new=_fake_stream)
+def test_stream_emits_filler_while_llm_thinks():
+    """Si el primer token tarda, se emite el filler antes de la respuesta"""
+    bank = Mock()
+    bank.get_base64.return_value = "ZmlsbGVy"
+    
+    with patch('app.routes.streaming.phrase_bank', bank), \
+            patch('app.routes.streaming.settings.thinking_filler_enabled', True), \
+            patch('app.routes.streaming.settings.thinking_filler_delay_ms', 10):
+        response = TestClient(app).post(
+            "/voice-agent/stream", files={"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+        )
+    
+    names = [block.split("\n")[0][len("event: "):] for block in response.text.strip().split("\n\n")]
+    assert names.index("filler") < names.index("response_text")
+    bank.get_base64.assert_called_with("thinking")
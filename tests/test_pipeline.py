@@ -0,0 +1,130 @@
+"""Tests para el motor del pipeline de voz"""
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.services.pipeline import Pipeline, PipelineContext, Stage, limited, timed
+
+
+def _value(value):
+    async def run(ctx):
+        return value
+    return run
+
+
+@pytest.mark.asyncio
+async def test_stages_run_in_order_and_share_outputs():
+    """Cada etapa ve la salida de las anteriores y se mide su duración"""
+    async def upper(ctx):
+        return ctx["text"].upper()
+
+    pipeline = Pipeline("p", [Stage("read", _value("hola"), output="text"), Stage("upper", upper, output="result")])
+    ctx = await pipeline.run(PipelineContext("test"))
+
+    assert ctx["result"] == "HOLA"
+    assert list(ctx.timings) == ["read", "upper"]
+
+
+@pytest.mark.asyncio
+async def test_pipeline_hooks_wrap_stage_hooks():
+    """Los hooks del pipeline son más externos que los de la etapa"""
+    log = []
+
+    def tracer(name):
+        async def hook(stage, ctx, proceed):
+            log.append(f"{name}:{stage.name}:in")
+            result = await proceed()
+            log.append(f"{name}:{stage.name}:out")
+            return result
+        return hook
+
+    pipeline = Pipeline("p", [Stage("a", _value(1), hooks=[tracer("stage")])], hooks=[tracer("pipeline"), timed])
+    await pipeline.run(PipelineContext("test"))
+
+    assert log == ["pipeline:a:in", "stage:a:in", "stage:a:out", "pipeline:a:out"]
+
+
+@pytest.mark.asyncio
+async def test_events_overlap_with_consumer_and_propagate_errors():
+    """Los eventos llegan mientras la etapa corre; su error se propaga tras ellos"""
+    consumer_saw_first = asyncio.Event()
+
+    async def streaming(ctx):
+        await ctx.emit("delta", {"n": 1})
+        await asyncio.wait_for(consumer_saw_first.wait(), timeout=1)
+        await ctx.emit("delta", {"n": 2})
+        raise RuntimeError("falló")
+
+    pipeline = Pipeline("p", [Stage("stream", streaming)])
+    received = []
+    with pytest.raises(RuntimeError):
+        async for event in pipeline.events(PipelineContext("test")):
+            received.append(event)
+            consumer_saw_first.set()
+
+    assert received == [("delta", {"n": 1}), ("delta", {"n": 2})]
+
+
+@pytest.mark.asyncio
+async def test_events_cancel_stages_when_consumer_stops():
+    """Si el consumidor abandona el stream, la etapa en curso se cancela"""
+    cancelled = asyncio.Event()
+
+    async def endless(ctx):
+        try:
+            while True:
+                await ctx.emit("tick", {})
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    events = Pipeline("p", [Stage("endless", endless)]).events(PipelineContext("test"))
+    await events.__anext__()
+    await events.aclose()
+
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_handle_maps_errors_and_removes_temp_file(tmp_path):
+    """Los errores inesperados son 500, las HTTPException pasan tal cual y el temporal se elimina"""
+    audio = tmp_path / "audio.wav"
+    audio.write_bytes(b"x")
+
+    async def fail(ctx):
+        raise RuntimeError("sin conexión")
+
+    pipeline = Pipeline("p", [Stage("save", _value(str(audio)), output="audio_path"), Stage("fail", fail)])
+    with pytest.raises(HTTPException) as exc_info:
+        await pipeline.handle(PipelineContext("test"), "Error en el procesamiento")
+
+    assert exc_info.value.status_code == 500
+    assert exc_info.value.detail == "Error en el procesamiento: sin conexión"
+    assert not audio.exists()
+
+    async def reject(ctx):
+        raise HTTPException(status_code=400, detail="Formato no soportado")
+
+    with pytest.raises(HTTPException) as exc_info:
+        await Pipeline("p", [Stage("validate", reject)]).handle(PipelineContext("test"), "Error")
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_limited_uses_semaphore_from_context():
+    """Las etapas comparten el semáforo del contexto: nunca más ejecuciones que su límite"""
+    running = 0
+    peak = 0
+    
+    async def slow(ctx):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+    
+    semaphore = asyncio.Semaphore(2)
+    pipeline = Pipeline("p", [Stage("slow", slow)], hooks=[timed, limited("semaphore")])
+    await asyncio.gather(*(pipeline.run(PipelineContext("test", values={"semaphore": semaphore})) for _ in range(5)))
+    
+    assert peak == 2
+
@@ -0,0 +1,96 @@
+"""Tests para el profiler por petición y los endpoints de administración"""
+import io
+import time
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.profiler import SamplingProfiler, profile_store
+from tests.conftest import FAKE_WAV
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def profiling(tmp_path):
+    with patch("app.config.settings.profiling_enabled", True), \
+            patch("app.config.settings.profiling_dir", str(tmp_path)), \
+            patch("app.config.settings.admin_token", "secreto"), \
+            patch("app.config.settings.profiling_interval_ms", 1.0):
+        yield tmp_path
+
+
+def _busy_wait(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pass
+
+
+def _post(headers):
+    files = {"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+    return client.post("/voice-agent", files=files, headers=headers)
+
+
+def test_sampling_profiler_collapsed_output():
+    """Las pilas muestreadas salen en formato collapsed, empezando por el hilo"""
+    profiler = SamplingProfiler(0.001)
+    profiler.start()
+    _busy_wait(0.1)
+    collapsed = profiler.stop()
+
+    busy = [line for line in collapsed.splitlines() if "_busy_wait" in line]
+    assert busy
+    stack, count = busy[0].rsplit(" ", 1)
+    assert stack.startswith("MainThread;")
+    assert int(count) > 0
+
+
+def test_profile_store_is_bounded(profiling):
+    """Se conservan solo los PROFILING_MAX_FILES perfiles más recientes"""
+    with patch("app.config.settings.profiling_max_files", 2):
+        for i in range(4):
+            profile_store.save(f"p{i}.folded", "main 1\n")
+    assert len(profile_store.list()) == 2
+    assert profile_store.path("../p3.folded") is None
+
+
+@patch('app.main.generate_speech')
+@patch('app.main.process_text')
+@patch('app.main.transcribe_audio')
+def test_admin_header_profiles_request_and_lists_it(mock_asr, mock_llm, mock_tts, profiling):
+    """Con X-Profile y token de admin se guarda el perfil y se descarga por /admin"""
+    async def transcribe(path):
+        _busy_wait(0.05)  # Trabajo de CPU en el event loop: visible en las pilas
+        return "¿Qué hora es?"
+    mock_asr.side_effect = transcribe
+    mock_llm.return_value = "Son las diez"
+    mock_tts.return_value = "ZmFrZQ=="
+
+    response = _post({"X-Profile": "1", "X-Admin-Token": "secreto"})
+    assert response.status_code == 200
+    name = response.headers["X-Profile-Id"]
+
+    listing = client.get("/admin/profiles", headers={"X-Admin-Token": "secreto"})
+    assert [p["name"] for p in listing.json()["profiles"]] == [name]
+    download = client.get(f"/admin/profiles/{name}", headers={"X-Admin-Token": "secreto"})
+    assert download.status_code == 200
+    assert "transcribe (test_profiling.py" in download.text
+
+
+@patch('app.main.generate_speech')
+@patch('app.main.process_text')
+@patch('app.main.transcribe_audio')
+def test_requests_not_profiled_without_valid_token(mock_asr, mock_llm, mock_tts, profiling):
+    """Un token inválido no activa el profiler y /admin lo rechaza"""
+    mock_asr.return_value = "¿Qué hora es?"
+    mock_llm.return_value = "Son las diez"
+    mock_tts.return_value = "ZmFrZQ=="
+
+    response = _post({"X-Profile": "1", "X-Admin-Token": "otro"})
+    assert "X-Profile-Id" not in response.headers
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "otro"}).status_code == 401
+
+
+def test_admin_hidden_without_token():
+    """Sin ADMIN_TOKEN configurado las rutas /admin no existen"""
+    assert client.get("/admin/profiles").status_code == 404
@@ -0,0 +1,144 @@
+"""Tests para el rate limiting por cliente"""
+import io
+import time
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.audio_metadata import AudioInfo
+from app.utils.rate_limit import (
+    AUDIO_BUCKET, REQUESTS_BUCKET, BucketPolicy, InMemoryRateLimitBackend, SQLiteRateLimitBackend
+)
+from tests.conftest import FAKE_WAV
+
+client = TestClient(app)
+
+
+def _post(headers=None):
+    files = {"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")}
+    return client.post("/voice-agent", files=files, headers=headers or {})
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend_factory", [
+    lambda tmp_path: InMemoryRateLimitBackend(),
+    lambda tmp_path: SQLiteRateLimitBackend(str(tmp_path / "rl.db")),
+])
+async def test_token_bucket_allows_burst_then_rejects(backend_factory, tmp_path):
+    backend = backend_factory(tmp_path)
+    policy = BucketPolicy(capacity=2, refill_per_second=0.5)
+    
+    first = await backend.take("ip:1", REQUESTS_BUCKET, 1, policy)
+    second = await backend.take("ip:1", REQUESTS_BUCKET, 1, policy)
+    third = await backend.take("ip:1", REQUESTS_BUCKET, 1, policy)
+    other_client = await backend.take("ip:2", REQUESTS_BUCKET, 1, policy)
+    
+    assert first.allowed and second.allowed and other_client.allowed
+    assert not third.allowed
+    assert third.retry_after == 2  # 1 token a 0.5 tokens/s
+
+
+@pytest.mark.asyncio
+async def test_memory_prune_uses_each_bucket_refill():
+    """Podar tras un take de peticiones no reinicia un bucket de audio que sigue recargándose"""
+    backend = InMemoryRateLimitBackend()
+    await backend.take("ip:1", AUDIO_BUCKET, 60, BucketPolicy(capacity=60, refill_per_second=1))
+    await backend.take("ip:1", REQUESTS_BUCKET, 1, BucketPolicy(capacity=10, refill_per_second=1))
+    
+    backend._prune(time.monotonic() + 5)  # Peticiones ya llenas; al audio le faltan ~55 s
+    
+    assert list(backend._buckets) == [("ip:1", AUDIO_BUCKET)]
+    decision = await backend.take("ip:1", AUDIO_BUCKET, 60, BucketPolicy(capacity=60, refill_per_second=1))
+    assert not decision.allowed
+
+
+@patch('app.main.generate_speech')
+@patch('app.main.process_text')
+@patch('app.main.transcribe_audio')
+def test_requests_bucket_returns_429_with_headers(mock_asr, mock_llm, mock_tts):
+    mock_asr.return_value = "Hola"
+    mock_llm.return_value = "¡Hola!"
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    with patch('app.utils.rate_limit.settings.rate_limit_requests_burst', 2), \
+            patch('app.middleware.rate_limit.settings.rate_limit_api_keys', ["cliente-a", "cliente-b"]):
+        ok = _post({"X-API-Key": "cliente-a"})
+        _post({"X-API-Key": "cliente-a"})
+        limited = _post({"X-API-Key": "cliente-a"})
+        other = _post({"X-API-Key": "cliente-b"})
+    
+    assert ok.status_code == 200
+    assert ok.headers["RateLimit-Limit"] == "2"
+    assert ok.headers["RateLimit-Remaining"] == "1"
+    assert "RateLimit-Policy" in ok.headers
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    assert other.status_code == 200
+
+
+@patch('app.main.generate_speech')
+@patch('app.main.process_text')
+@patch('app.main.transcribe_audio')
+def test_audio_seconds_bucket_returns_429(mock_asr, mock_llm, mock_tts):
+    """Un cliente sin cuota de audio recibe 429 al validar el archivo"""
+    mock_asr.return_value = "Hola"
+    mock_llm.return_value = "¡Hola!"
+    mock_tts.return_value = "ZmFrZQ=="
+    info = AudioInfo(format=".wav", duration=120.0, sample_rate=16000, channels=1)
+    
+    with patch('app.utils.audio_utils.probe_audio', return_value=info), \
+            patch('app.utils.rate_limit.settings.rate_limit_audio_seconds_burst', 100):
+        response = _post({"X-API-Key": "cliente-audio"})
+        response = _post({"X-API-Key": "cliente-audio"})
+    
+    assert response.status_code == 429
+    assert "audio" in response.json()["error"]
+    assert "Retry-After" in response.headers
+
+
+@patch('app.main.generate_speech')
+@patch('app.main.process_text')
+@patch('app.main.transcribe_audio')
+def test_unlimited_paths_and_disabled_limiter(mock_asr, mock_llm, mock_tts):
+    mock_asr.return_value = "Hola"
+    mock_llm.return_value = "¡Hola!"
+    mock_tts.return_value = "ZmFrZQ=="
+    assert "RateLimit-Limit" not in client.get("/health").headers
+    
+    with patch('app.middleware.rate_limit.settings.rate_limit_enabled', False):
+        response = _post()
+    assert "RateLimit-Limit" not in response.headers
+
+
+@patch('app.main.generate_speech')
+@patch('app.main.process_text')
+@patch('app.main.transcribe_audio')
+def test_unknown_api_keys_share_the_ip_bucket(mock_asr, mock_llm, mock_tts):
+    """Cambiar de X-Api-Key (no configurada) en cada petición no da un bucket nuevo"""
+    mock_asr.return_value = "Hola"
+    mock_llm.return_value = "¡Hola!"
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    with patch('app.utils.rate_limit.settings.rate_limit_requests_burst', 2):
+        responses = [_post({"X-API-Key": f"inventada-{i}", "X-Session-Id": f"s{i}"}) for i in range(3)]
+    
+    assert [r.status_code for r in responses] == [200, 200, 429]
+
+
+@patch('app.main.generate_speech')
+@patch('app.main.process_text')
+@patch('app.main.transcribe_audio')
+def test_audio_without_duration_is_charged_by_size(mock_asr, mock_llm, mock_tts):
+    """Un audio sin duración en la cabecera consume cuota estimada por su tamaño"""
+    mock_asr.return_value = "Hola"
+    mock_llm.return_value = "¡Hola!"
+    mock_tts.return_value = "ZmFrZQ=="
+    
+    with patch('app.utils.audio_utils.probe_audio', return_value=None), \
+            patch('app.utils.rate_limit.settings.rate_limit_unknown_duration_bytes_per_second', 1), \
+            patch('app.utils.rate_limit.settings.rate_limit_audio_seconds_burst', len(FAKE_WAV) + 10):
+        first = _post()
+        second = _post()
+    
+    assert first.status_code == 200
+    assert second.status_code == 429
@@ -0,0 +1,79 @@
+"""Tests para la serialización de turnos por sesión"""
+import asyncio
+import pytest
+from app.utils.session_turns import SessionTurnQueue
+
+
+@pytest.mark.asyncio
+async def test_turns_of_one_session_run_in_order_without_overlap():
+    """Dos turnos de la misma sesión nunca se intercalan"""
+    queue = SessionTurnQueue()
+    log = []
+    
+    def turn(name):
+        async def run():
+            log.append(f"{name}:start")
+            await asyncio.sleep(0.01)
+            log.append(f"{name}:end")
+            return name
+        return run
+    
+    results = await asyncio.gather(queue.run("s1", None, turn("a")), queue.run("s1", None, turn("b")))
+    
+    assert results == ["a", "b"]
+    assert log == ["a:start", "a:end", "b:start", "b:end"]
+    assert len(queue) == 0
+
+
+@pytest.mark.asyncio
+async def test_different_sessions_run_in_parallel():
+    """Sesiones distintas no se esperan entre sí"""
+    queue = SessionTurnQueue()
+    both_running = asyncio.Event()
+    running = []
+    
+    async def turn():
+        running.append(1)
+        if len(running) == 2:
+            both_running.set()
+        await asyncio.wait_for(both_running.wait(), timeout=1)
+    
+    await asyncio.gather(queue.run("s1", None, turn), queue.run("s2", None, turn))
+
+
+@pytest.mark.asyncio
+async def test_duplicate_key_exposes_original_result():
+    """Un duplicado en curso se detecta y puede esperar el resultado original"""
+    queue = SessionTurnQueue()
+    release = asyncio.Event()
+    
+    async def turn():
+        await release.wait()
+        return "respuesta"
+    
+    original = asyncio.create_task(queue.run("s1", "hash", turn))
+    await asyncio.sleep(0)
+    duplicate = queue.find_duplicate("s1", "hash")
+    assert duplicate is not None
+    assert queue.find_duplicate("s2", "hash") is None
+    
+    release.set()
+    assert await original == "respuesta"
+    assert await duplicate == "respuesta"
+    assert queue.find_duplicate("s1", "hash") is None
+
+
+@pytest.mark.asyncio
+async def test_failed_turn_releases_session():
+    """Un turno con error no bloquea los siguientes"""
+    queue = SessionTurnQueue()
+    
+    async def failing():
+        raise ValueError("boom")
+    
+    async def ok():
+        return "ok"
+    
+    with pytest.raises(ValueError):
+        await queue.run("s1", "hash", failing)
+    assert await queue.run("s1", "hash", ok) == "ok"
@@ -0,0 +1,92 @@
+"""Tests para la coalescencia de llamadas (single-flight) y las métricas"""
+import asyncio
+from unittest.mock import Mock, patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.tts_service import generate_speech
+from app.utils.metrics import metrics
+from app.utils.single_flight import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_calls_share_one_upstream_call():
+    """Tres llamadas idénticas simultáneas hacen una sola llamada real"""
+    flight = SingleFlight("test")
+    calls = []
+    
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "resultado"
+    
+    results = await asyncio.gather(*(flight.do("k", call) for _ in range(3)))
+    
+    assert results == ["resultado"] * 3
+    assert len(calls) == 1
+    assert metrics.get("single_flight.test.calls") == 1
+    assert metrics.get("single_flight.test.saved") == 2
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_key_released():
+    """Los que esperan reciben el mismo error; la siguiente llamada es nueva"""
+    flight = SingleFlight("test")
+    
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise Exception("Error al generar audio: timeout")
+    
+    results = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+    assert all("timeout" in str(r) for r in results)
+    
+    async def ok():
+        return "ok"
+    
+    assert await flight.do("k", ok) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_disabled_single_flight_calls_every_time():
+    flight = SingleFlight("test")
+    calls = []
+    
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+    
+    with patch('app.utils.single_flight.settings.single_flight_enabled', False):
+        await asyncio.gather(flight.do("k", call), flight.do("k", call))
+    
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_speech_coalesces_identical_text():
+    """El mismo texto sintetizado a la vez genera una sola llamada TTS"""
+    mock_response = Mock()
+    mock_response.content = b"audio"
+    
+    with patch('app.services.tts_service.OpenAI') as mock_openai:
+        mock_openai.return_value.audio.speech.create.return_value = mock_response
+        results = await asyncio.gather(generate_speech("Bienvenidos"), generate_speech("Bienvenidos"))
+    
+    assert results[0] == results[1]
+    assert mock_openai.return_value.audio.speech.create.call_count == 1
+
+
+def test_metrics_endpoint():
+    metrics.increment("single_flight.tts.saved", 4)
+    
+    response = TestClient(app).get("/metrics")
+    
+    assert response.status_code == 200
+    assert response.json()["counters"]["single_flight.tts.saved"] == 4
@@ -0,0 +1,40 @@
+"""Tests para las páginas demo servidas como assets precomprimidos"""
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("path", ["/test-audio", "/audio-chat/demo"])
+def test_demo_page_gzip_with_cache_headers(path):
+    """La página se sirve comprimida con ETag y Cache-Control"""
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+    
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].startswith('"')
+    assert "max-age" in response.headers["cache-control"]
+    assert "<!DOCTYPE html>" in response.text
+
+
+@pytest.mark.parametrize("path", ["/test-audio", "/audio-chat/demo"])
+def test_demo_page_not_modified(path):
+    """If-None-Match con el ETag vigente responde 304 sin body"""
+    etag = client.get(path, headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    
+    response = client.get(path, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_demo_page_identity_has_distinct_etag():
+    """Sin compresión se sirve el HTML original con su propio ETag"""
+    plain = client.get("/test-audio", headers={"Accept-Encoding": "identity"})
+    compressed = client.get("/test-audio", headers={"Accept-Encoding": "gzip"})
+    
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != compressed.headers["etag"]
+    assert plain.text == compressed.text  # httpx descomprime gzip de forma transparente
@@ -0,0 +1,109 @@
+"""Tests para el voice agent con SSE"""
+import io
+import base64
+import json
+from unittest.mock import Mock, patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.asr_service import transcribe_audio_stream
+from tests.conftest import FAKE_WAV
+
+client = TestClient(app)
+
+
+def parse_sse(text):
+    """Convierte el cuerpo SSE en una lista de (evento, datos)"""
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.mark.asyncio
+async def test_transcribe_audio_stream_yields_partials(tmp_path):
+    """Los deltas del modelo se emiten como parciales y al final el texto completo"""
+    events = [
+        Mock(type="transcript.text.delta", delta="Hola, "),
+        Mock(type="transcript.text.delta", delta="mundo"),
+        Mock(type="transcript.text.done", text="Hola, mundo."),
+    ]
+    audio_path = tmp_path / "audio.wav"
+    audio_path.write_bytes(FAKE_WAV)
+    
+    with patch('app.services.asr_service.OpenAI') as mock_openai:
+        mock_openai.return_value.audio.transcriptions.create.return_value = iter(events)
+        results = [item async for item in transcribe_audio_stream(str(audio_path))]
+    
+    assert results == [(False, "Hola, "), (False, "mundo"), (True, "Hola, mundo.")]
+    assert mock_openai.return_value.audio.transcriptions.create.call_args.kwargs["stream"] is True
+
+
+async def _fake_stream(path):
+    yield False, "Hola"
+    yield False, " mundo"
+    yield True, "Hola mundo"
+
+
+async def _fake_llm(text, skip_fast_path=False):
+    for delta in ["¡Ho", "la!"]:
+        yield delta
+
+
+async def _fake_tts(text):
+    for chunk in [b"ID3", b"\xff\xfb"]:
+        yield chunk
+
+
+@patch('app.routes.streaming.generate_speech_stream', new=_fake_tts)
+@patch('app.routes.streaming.process_text_stream', new=_fake_llm)
+@patch('app.routes.streaming.transcribe_audio_stream', new=_fake_stream)
+def test_voice_agent_stream_events():
+    """El stream emite cada etapa en orden y termina con los tiempos"""
+    response = client.post("/voice-agent/stream", files={"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")})
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [name for name, _ in events] == [
+        "transcription_delta", "transcription_delta", "transcription",
+        "response_text", "response_text", "audio", "audio", "timings"
+    ]
+    assert events[2][1]["text"] == "Hola mundo"
+    assert "".join(data["delta"] for name, data in events if name == "response_text") == "¡Hola!"
+    audio = b"".join(base64.b64decode(data["chunk"]) for name, data in events if name == "audio")
+    assert audio == b"ID3\xff\xfb"
+    assert set(events[-1][1]) >= {"asr", "llm", "tts", "total"}
+
+
+async def _failing_llm(text):
+    raise Exception("Error al procesar texto: timeout")
+    yield
+
+
+@patch('app.routes.streaming.process_text_stream', new=_failing_llm)
+@patch('app.routes.streaming.transcribe_audio_stream', new=_fake_stream)
+def test_voice_agent_stream_error_event():
+    """Un fallo a mitad del pipeline se informa como evento error"""
+    response = client.post("/voice-agent/stream", files={"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")})
+    
+    events = parse_sse(response.text)
+    assert events[-1][0] == "error"
+    assert "timeout" in events[-1][1]["error"]
+
+
+@patch('app.routes.streaming.generate_speech_stream', new=_fake_tts)
+@patch('app.routes.audio_chat.process_text_stream', new=_fake_llm)
+@patch('app.routes.streaming.transcribe_audio_stream', new=_fake_stream)
+def test_audio_chat_stream_updates_history():
+    """La variante de audio chat emite la sesión y actualiza el historial"""
+    response = client.post("/audio-chat/stream", files={"audio": ("a.wav", io.BytesIO(FAKE_WAV), "audio/wav")})
+    
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "session"
+    assert names[-2:] == ["history", "timings"]
+    history = events[-2][1]
+    assert history["cursor"] == 2
+    assert [m["content"] for m in history["new_messages"]] == ["Hola mundo", "¡Hola!"]
@@ -2,7 +2,7 @@
 import pytest
 from unittest.mock import Mock, patch
 import base64
-from app.services.tts_service import generate_speech
+from app.services.tts_service import generate_speech, generate_speech_stream
 
 
 @pytest.mark.asyncio
@@ -101,3 +101,22 @@ async def test_generate_speech_long_text():
         
         assert isinstance(result, str)
         assert len(result) > 0
+
+
+@pytest.mark.asyncio
+async def test_generate_speech_stream_chunks():
+    """Test de streaming de audio por fragmentos"""
+    mock_response = Mock()
+    mock_response.iter_bytes.return_value = iter([b"chunk1", b"chunk2"])
+    
+    with patch('app.services.tts_service.OpenAI') as mock_openai:
+        mock_client = Mock()
+        stream_context = mock_client.audio.speech.with_streaming_response.create.return_value
+        stream_context.__enter__ = Mock(return_value=mock_response)
+        stream_context.__exit__ = Mock(return_value=None)
+        mock_openai.return_value = mock_client
+        
+        chunks = [chunk async for chunk in generate_speech_stream("Hola")]
+        
+        assert chunks == [b"chunk1", b"chunk2"]
+        assert stream_context.__exit__.called
@@ -0,0 +1,77 @@
+"""Tests para el guard ASGI de uploads"""
+import pytest
+from app.middleware.upload_guard import UploadGuardMiddleware
+
+
+def _multipart(content: bytes) -> bytes:
+    return (
+        b'--xyz\r\nContent-Disposition: form-data; name="audio"; filename="a.wav"\r\n'
+        b"Content-Type: audio/wav\r\n\r\n" + content + b"\r\n--xyz--\r\n"
+    )
+
+
+async def _run(middleware, chunks, headers):
+    """Ejecuta el middleware con un body entregado en trozos"""
+    sent = []
+    delivered = []
+    pending = list(chunks)
+
+    async def receive():
+        chunk = pending.pop(0)
+        delivered.append(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": bool(pending)}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": "/voice-agent", "headers": headers}
+    await middleware(scope, receive, send)
+    return sent, delivered
+
+
+async def _consume_app(scope, receive, send):
+    """App de prueba que lee todo el body y responde 200"""
+    while True:
+        message = await receive()
+        if not message.get("more_body"):
+            break
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+@pytest.mark.asyncio
+async def test_guard_aborts_oversized_stream_without_content_length():
+    """Sin Content-Length, corta al superar el límite sin leer el resto"""
+    body = _multipart(b"RIFF\x00\x00\x00\x00WAVE" + b"x" * 4000)
+    chunks = [body[i:i + 512] for i in range(0, len(body), 512)]
+    guard = UploadGuardMiddleware(_consume_app, max_body_bytes=1024)
+    
+    sent, delivered = await _run(guard, chunks, [(b"content-type", b"multipart/form-data; boundary=xyz")])
+    
+    assert sent[0]["status"] == 400
+    assert len(delivered) < len(chunks)
+
+
+@pytest.mark.asyncio
+async def test_guard_rejects_non_audio_on_first_chunk():
+    """El sniffing rechaza contenido no-audio en el primer trozo"""
+    body = _multipart(b"%PDF-1.7" + b"x" * 4000)
+    chunks = [body[:256], body[256:]]
+    guard = UploadGuardMiddleware(_consume_app, max_body_bytes=1024 * 1024)
+    
+    sent, delivered = await _run(guard, chunks, [(b"content-type", b"multipart/form-data; boundary=xyz")])
+    
+    assert sent[0]["status"] == 400
+    assert b"Formato no permitido" in sent[1]["body"]
+    assert len(delivered) == 1
+
+
+@pytest.mark.asyncio
+async def test_guard_passes_valid_audio():
+    """Un upload válido llega intacto a la aplicación"""
+    body = _multipart(b"OggS" + b"\x00" * 100)
+    guard = UploadGuardMiddleware(_consume_app, max_body_bytes=1024 * 1024)
+    
+    sent, _ = await _run(guard, [body[:60], body[60:]], [(b"content-type", b"multipart/form-data; boundary=xyz")])
+    
+    assert sent[0]["status"] == 200